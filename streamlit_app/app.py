@@ -9,7 +9,7 @@ from pathlib import Path
 from components.style import load_global_styles
 from components.topbar import render_topbar
 from components.sidebar import render_sidebar
-from utils.data_loader import get_dashboard_kpis, get_sales_over_time, load_reviews
+from utils.kpi_snapshots import get_kpi_snapshot, month_over_month, start_scheduled_refresh
 
 # Configuration de la page
 st.set_page_config(
@@ -33,6 +33,13 @@ from database.auth_db import init_database, create_default_users
 init_database()
 create_default_users()
 
+# Préchauffage des caches de données et des modèles (thread en arrière-plan)
+from utils.warmup import warmup_in_background
+warmup_in_background()
+
+# Rafraîchissement périodique des snapshots de KPIs (thread en arrière-plan)
+start_scheduled_refresh()
+
 # CSS moderne global (déplacé dans assets/styles.css)
 
 # Vérifier si l'utilisateur est authentifié
@@ -123,25 +130,11 @@ if not st.session_state.get('authenticated', False):
     # Statistiques de la plateforme
     st.markdown("### 📈 Statistiques de la plateforme")
     
-    kpis = get_dashboard_kpis()
-    monthly_sales = get_sales_over_time()
-
-    def _pct_delta(current, previous):
-        if previous is None or pd.isna(previous) or previous == 0:
-            return None
-        return (current - previous) / previous * 100
-
-    orders_delta = None
-    if len(monthly_sales) >= 2:
-        last_orders = monthly_sales.iloc[-1]['order_id']
-        prev_orders = monthly_sales.iloc[-2]['order_id']
-        orders_delta = _pct_delta(last_orders, prev_orders)
-
-    reviews = load_reviews()
-    reviews_monthly = reviews.set_index('review_creation_date').resample('ME')['review_score'].mean().dropna()
-    rating_delta = None
-    if len(reviews_monthly) >= 2:
-        rating_delta = reviews_monthly.iloc[-1] - reviews_monthly.iloc[-2]
+    # KPIs et variations mensuelles lus depuis le dernier snapshot
+    snapshot = get_kpi_snapshot()
+    kpis = snapshot['kpis']
+    orders_delta = month_over_month(snapshot['monthly'], 'orders')
+    rating_delta = month_over_month(snapshot['monthly'], 'avg_rating', relative=False)
 
     col1, col2, col3, col4 = st.columns(4)
     
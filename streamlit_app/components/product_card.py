@@ -6,9 +6,11 @@ import streamlit as st
 import pandas as pd
 from utils.data_loader import get_product_review_stats, get_product_review_comments, get_state_options, get_product_seller_state_map
 from utils.shipping_forecast import get_shipping_forecast_model
+from utils.delivery_eta import get_eta_matrix
+from utils.geolocation import get_zip_centroids
 from components.translations import get_text
 
-def render_product_card(product, show_actions=True, key_prefix=""):
+def render_product_card(product, show_actions=True, key_prefix="", eta_matrix=None):
     """
     Affiche une carte produit
     
@@ -16,6 +18,7 @@ def render_product_card(product, show_actions=True, key_prefix=""):
         product: Series pandas avec les infos du produit
         show_actions: Afficher les boutons d'action
         key_prefix: Préfixe unique pour éviter les collisions de clés
+        eta_matrix: Matrice des délais résolue une fois par la page (défaut: get_eta_matrix())
     """
     
     # Image placeholder
@@ -28,6 +31,14 @@ def render_product_card(product, show_actions=True, key_prefix=""):
     # Badge bestseller si beaucoup de ventes
     is_bestseller = product.get('total_sales', 0) > 100
     
+    # Délai estimé vers l'état de livraison choisi dans le catalogue (matrice précalculée)
+    eta_matrix = eta_matrix if eta_matrix is not None else get_eta_matrix()
+    eta_days = eta_matrix.eta_days(product.get('product_id'), st.session_state.get('delivery_state', 'SP'))
+    eta_html = (
+        f"<div style='font-size: 0.85rem; color: #009739; margin: 0.5rem 0;'>🚚 {eta_days:.1f} {get_text('days')}</div>"
+        if eta_days is not None else ''
+    )
+    
     # HTML de la carte
     st.markdown(f"""
     <div class="product-card fade-in">
@@ -59,6 +70,7 @@ def render_product_card(product, show_actions=True, key_prefix=""):
                 📦 {product.get('product_weight_g', 0):.0f}g
                 {' | 📏 ' + str(int(product.get('product_length_cm', 0))) + 'x' + str(int(product.get('product_width_cm', 0))) + 'x' + str(int(product.get('product_height_cm', 0))) + 'cm' if not pd.isna(product.get('product_length_cm')) else ''}
             </div>
+            {eta_html}
         </div>
     </div>
     """, unsafe_allow_html=True)
@@ -158,29 +170,27 @@ def render_product_detail(product, recommendation_engine):
         st.markdown(f"#### 🚚 {get_text('delivery_estimate')}")
 
         state_options = get_state_options() or ['SP', 'RJ', 'MG']
+        delivery_state = st.session_state.get('delivery_state', 'SP')
         customer_state = st.selectbox(
             "État du client",
             options=state_options,
+            index=state_options.index(delivery_state) if delivery_state in state_options else 0,
             key=f"cust_state_{product.get('product_id')}"
         )
 
         seller_state_map = get_product_seller_state_map()
         seller_state = seller_state_map.get(product.get('product_id')) or customer_state
 
-        if st.button("📦 Calculer la livraison", key=f"ship_calc_{product.get('product_id')}"):
+        # Délai précalculé affiché directement; prédiction à la demande sinon
+        eta_days = get_eta_matrix().eta_days(product.get('product_id'), customer_state)
+        if eta_days is not None:
+            st.info(f"📦 Livraison estimée: **{eta_days:.1f} {get_text('days')}**")
+        elif st.button("📦 Calculer la livraison", key=f"ship_calc_{product.get('product_id')}"):
             shipping_model = get_shipping_forecast_model()
-            state_coords = {
-                'SP': (-23.55, -46.63),
-                'RJ': (-22.91, -43.17),
-                'MG': (-19.92, -43.94),
-                'PR': (-25.42, -49.27),
-                'RS': (-30.03, -51.23),
-                'BA': (-12.97, -38.51),
-                'SC': (-27.59, -48.55)
-            }
-
-            customer_lat, customer_lng = state_coords.get(customer_state, (-23.55, -46.63))
-            seller_lat, seller_lng = state_coords.get(seller_state, (-23.55, -46.63))
+            # Sans code postal, le centroïde de l'état (dataset de géolocalisation) est utilisé
+            zip_centroids = get_zip_centroids()
+            customer_lat, customer_lng = zip_centroids.coordinates(None, customer_state)
+            seller_lat, seller_lng = zip_centroids.coordinates(None, seller_state)
 
             order_data = {
                 'seller_id': None,
@@ -22,12 +22,15 @@ TRANSLATIONS = {
         'price_asc': 'Prix croissant',
         'price_desc': 'Prix décroissant',
         'rating_desc': 'Meilleures notes',
+        'eta_asc': 'Livraison la plus rapide',
         'products_found': 'produits trouvés',
         'add_to_cart': 'Ajouter au panier',
         'product_details': 'Détails du produit',
         'reviews': 'Avis clients',
         'delivery_estimate': 'Estimation de livraison',
         'days': 'jours',
+        'delivery_to': 'Livraison vers',
+        'max_delivery_days': 'Délai de livraison max (jours)',
         'recommendations': 'Vous aimerez aussi',
         'sentiment_analysis': 'Analyse des sentiments',
         'positive': 'Positif',
@@ -56,12 +59,15 @@ TRANSLATIONS = {
         'price_asc': 'Price: Low to High',
         'price_desc': 'Price: High to Low',
         'rating_desc': 'Top rated',
+        'eta_asc': 'Fastest delivery',
         'products_found': 'products found',
         'add_to_cart': 'Add to cart',
         'product_details': 'Product details',
         'reviews': 'Customer reviews',
         'delivery_estimate': 'Delivery estimate',
         'days': 'days',
+        'delivery_to': 'Deliver to',
+        'max_delivery_days': 'Max delivery time (days)',
         'recommendations': 'You might also like',
         'sentiment_analysis': 'Sentiment Analysis',
         'positive': 'Positive',
@@ -90,12 +96,15 @@ TRANSLATIONS = {
         'price_asc': 'Menor preço',
         'price_desc': 'Maior preço',
         'rating_desc': 'Mais bem avaliados',
+        'eta_asc': 'Entrega mais rápida',
         'products_found': 'produtos encontrados',
         'add_to_cart': 'Adicionar ao carrinho',
         'product_details': 'Detalhes do produto',
         'reviews': 'Avaliações',
         'delivery_estimate': 'Prazo de entrega',
         'days': 'dias',
+        'delivery_to': 'Entregar em',
+        'max_delivery_days': 'Prazo máximo de entrega (dias)',
         'recommendations': 'Você também pode gostar',
         'sentiment_analysis': 'Análise de sentimentos',
         'positive': 'Positivo',
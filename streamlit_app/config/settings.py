@@ -7,10 +7,29 @@ from pathlib import Path
 
 CONFIG_FILE = Path(__file__).parent / "models_config.json"
 
+# (date de modification, taille) -> configuration déjà lue
+_config_cache = (None, None)
+
 def load_config():
-    """Charge la configuration depuis le fichier JSON"""
+    """
+    Charge la configuration depuis le fichier JSON
+
+    Le fichier n'est relu que si sa date de modification ou sa taille a
+    changé (ex. enregistrement depuis la page Gestion des Modèles): les
+    vérifications d'empreinte appellent get_app_settings à chaque accès au
+    cache. Le dict retourné est partagé et ne doit pas être modifié.
+    """
+    global _config_cache
+    stat = CONFIG_FILE.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached_key, config = _config_cache
+    if cached_key == key:
+        return config
+
     with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        config = json.load(f)
+    _config_cache = (key, config)
+    return config
 
 def get_model_config(model_type):
     """Retourne la configuration d'un modèle spécifique"""
@@ -31,7 +50,6 @@ def get_app_settings():
 PRODUCTS_PER_PAGE = 12
 RECOMMENDATIONS_COUNT = 4
 DEFAULT_LANGUAGE = 'fr'
-CACHE_TTL = 3600
 
 # Couleurs du thème Brésil
 BRAZIL_COLORS = {
@@ -0,0 +1,177 @@
+"""
+Stockage des snapshots de KPIs (SQLite)
+
+Chaque rafraîchissement enregistre les KPIs globaux et leur série mensuelle,
+identifiés par l'empreinte des données sources. Les pages lisent le dernier
+snapshot au lieu de recalculer les agrégats; l'historique est conservé pour
+que les variations d'un mois sur l'autre soient de simples lectures.
+"""
+
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent / "kpi_snapshots.db"
+
+# KPI -> type SQL (les comptes sont relus en entiers)
+KPI_TYPES = {
+    'total_orders': 'INTEGER',
+    'total_revenue': 'REAL',
+    'total_products': 'INTEGER',
+    'total_customers': 'INTEGER',
+    'total_sellers': 'INTEGER',
+    'avg_rating': 'REAL',
+    'delivered_orders': 'INTEGER',
+    'avg_delivery_time': 'REAL'
+}
+KPI_COLUMNS = tuple(KPI_TYPES)
+
+MONTHLY_TYPES = {'orders': 'INTEGER', 'revenue': 'REAL', 'avg_rating': 'REAL'}
+MONTHLY_COLUMNS = tuple(MONTHLY_TYPES)
+
+
+def _connect():
+    """Connexion à la base (attente en cas d'écriture concurrente)"""
+    return sqlite3.connect(DB_PATH, timeout=30)
+
+
+def init_kpi_store():
+    """Initialise les tables de snapshots"""
+    conn = _connect()
+    cursor = conn.cursor()
+
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS kpi_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            source_fingerprint TEXT NOT NULL,
+            {', '.join(f'{col} {sql_type}' for col, sql_type in KPI_TYPES.items())}
+        )
+    """)
+
+    # Série mensuelle de chaque snapshot (mois au format AAAA-MM)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS kpi_monthly (
+            snapshot_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            {', '.join(f'{col} {sql_type}' for col, sql_type in MONTHLY_TYPES.items())},
+            PRIMARY KEY (snapshot_id, month),
+            FOREIGN KEY (snapshot_id) REFERENCES kpi_snapshots(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_kpi_snapshots_fingerprint
+        ON kpi_snapshots (source_fingerprint, id)
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def save_snapshot(source_fingerprint: str, kpis: dict, monthly: list) -> int:
+    """
+    Enregistre un snapshot
+
+    Args:
+        source_fingerprint: Empreinte des données à partir desquelles les KPIs ont été calculés
+        kpis: Dict des KPIs globaux (clés KPI_COLUMNS)
+        monthly: Liste de dicts {'month': 'AAAA-MM', 'orders', 'revenue', 'avg_rating'}
+
+    Returns:
+        Identifiant du snapshot
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+
+    cursor.execute(f"""
+        INSERT INTO kpi_snapshots (source_fingerprint, {', '.join(KPI_COLUMNS)})
+        VALUES (?, {', '.join('?' for _ in KPI_COLUMNS)})
+    """, (source_fingerprint, *(_to_sql(kpis.get(col)) for col in KPI_COLUMNS)))
+    snapshot_id = cursor.lastrowid
+
+    cursor.executemany(f"""
+        INSERT INTO kpi_monthly (snapshot_id, month, {', '.join(MONTHLY_COLUMNS)})
+        VALUES (?, ?, {', '.join('?' for _ in MONTHLY_COLUMNS)})
+    """, [
+        (snapshot_id, row['month'], *(_to_sql(row.get(col)) for col in MONTHLY_COLUMNS))
+        for row in monthly
+    ])
+
+    conn.commit()
+    conn.close()
+    return snapshot_id
+
+
+def get_latest_snapshot(source_fingerprint: str = None) -> dict:
+    """
+    Dernier snapshot (éventuellement pour une empreinte donnée)
+
+    Returns:
+        dict avec 'id', 'created_at', 'source_fingerprint' et les KPIs, None si absent
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+
+    query = f"SELECT id, created_at, source_fingerprint, {', '.join(KPI_COLUMNS)} FROM kpi_snapshots"
+    params = ()
+    if source_fingerprint is not None:
+        query += " WHERE source_fingerprint = ?"
+        params = (source_fingerprint,)
+    cursor.execute(query + " ORDER BY id DESC LIMIT 1", params)
+
+    row = cursor.fetchone()
+    conn.close()
+
+    if row is None:
+        return None
+    return _snapshot_dict(row)
+
+
+def get_snapshot_history(limit: int = 30) -> list:
+    """Snapshots les plus récents, du plus récent au plus ancien"""
+    conn = _connect()
+    cursor = conn.cursor()
+
+    cursor.execute(f"""
+        SELECT id, created_at, source_fingerprint, {', '.join(KPI_COLUMNS)}
+        FROM kpi_snapshots
+        ORDER BY id DESC
+        LIMIT ?
+    """, (limit,))
+
+    snapshots = [_snapshot_dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return snapshots
+
+
+def get_monthly_kpis(snapshot_id: int) -> list:
+    """Série mensuelle d'un snapshot, triée par mois"""
+    conn = _connect()
+    cursor = conn.cursor()
+
+    cursor.execute(f"""
+        SELECT month, {', '.join(MONTHLY_COLUMNS)}
+        FROM kpi_monthly
+        WHERE snapshot_id = ?
+        ORDER BY month
+    """, (snapshot_id,))
+
+    monthly = [dict(zip(('month',) + MONTHLY_COLUMNS, row)) for row in cursor.fetchall()]
+    conn.close()
+    return monthly
+
+
+def _snapshot_dict(row):
+    """Ligne de kpi_snapshots -> dict"""
+    return dict(zip(('id', 'created_at', 'source_fingerprint') + KPI_COLUMNS, row))
+
+
+def _to_sql(value):
+    """Valeur numérique stockable (NaN -> NULL)"""
+    if value is None or value != value:
+        return None
+    return float(value)
+
+
+# Initialiser la base au chargement du module
+init_kpi_store()
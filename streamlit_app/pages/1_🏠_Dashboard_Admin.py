@@ -10,15 +10,7 @@ import pandas as pd
 import numpy as np
 from components.auth import require_admin
 from components.charts import *
-from utils.data_loader import (
-    get_dashboard_kpis,
-    get_sales_over_time,
-    get_category_performance,
-    get_geographic_distribution,
-    load_reviews,
-    load_orders,
-    load_order_items
-)
+from utils.olap_cube import get_olap_cube
 
 # Vérification des droits admin
 require_admin()
@@ -44,15 +36,47 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Chargement des données
+# Chargement du cube pré-agrégé (mois × état × catégorie × statut)
 with st.spinner("🔄 Chargement des données..."):
-    kpis = get_dashboard_kpis()
-    sales_over_time = get_sales_over_time()
-    category_perf = get_category_performance()
-    geo_dist = get_geographic_distribution()
-    orders = load_orders()
-    order_items = load_order_items()
-    reviews = load_reviews()
+    cube = get_olap_cube()
+
+# Filtres: chaque widget est un roll-up du sous-cube sélectionné
+with st.expander("🔎 Filtres", expanded=False):
+    months = cube.dimension_values('month')
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        period = st.select_slider(
+            "Période",
+            options=months,
+            value=(months[0], months[-1]) if months else None,
+            format_func=lambda m: m.strftime('%Y-%m')
+        ) if months else (None, None)
+    with col2:
+        selected_states = st.multiselect("États", cube.dimension_values('customer_state'))
+    with col3:
+        selected_categories = st.multiselect("Catégories", cube.dimension_values('category'))
+
+# Bornes laissées ouvertes sur la période complète: le cube entier garde les
+# lignes sans commande connue, comme get_dashboard_kpis
+start = period[0] if months and period[0] != months[0] else None
+end = period[1] if months and period[1] != months[-1] else None
+is_filtered = start is not None or end is not None or bool(selected_states) or bool(selected_categories)
+
+view = cube.slice(
+    start=start,
+    end=end,
+    states=selected_states or None,
+    categories=selected_categories or None
+)
+
+kpis = view.kpis()
+if kpis['total_orders'] == 0:
+    st.warning("⚠️ Aucune commande ne correspond à ces filtres")
+    st.stop()
+
+sales_over_time = view.sales_over_time()
+category_perf = view.category_performance()
+geo_dist = view.geographic_distribution()
 
 # Calculs de tendances mensuelles
 sales_over_time = sales_over_time.sort_values('month')
@@ -66,8 +90,7 @@ else:
     revenue_growth = 0
 
 # Nouveaux clients par mois (premier achat)
-first_purchase = orders.groupby('customer_id')['order_purchase_timestamp'].min()
-new_customers_by_month = first_purchase.dt.to_period('M').value_counts().sort_index()
+new_customers_by_month = view.monthly('new_customers')
 new_customers_growth = 0
 if len(new_customers_by_month) >= 2:
     last_new = new_customers_by_month.iloc[-1]
@@ -75,22 +98,15 @@ if len(new_customers_by_month) >= 2:
     new_customers_growth = ((last_new - prev_new) / prev_new * 100) if prev_new > 0 else 0
 
 # Nouveaux vendeurs par mois (première vente)
-items_orders = order_items.merge(
-    orders[['order_id', 'order_purchase_timestamp']],
-    on='order_id',
-    how='left'
-)
-first_sale = items_orders.groupby('seller_id')['order_purchase_timestamp'].min()
-new_sellers_by_month = first_sale.dt.to_period('M').value_counts().sort_index()
+new_sellers_by_month = view.monthly('new_sellers')
 new_sellers_growth = 0
 if len(new_sellers_by_month) >= 2:
     last_new_sellers = new_sellers_by_month.iloc[-1]
     prev_new_sellers = new_sellers_by_month.iloc[-2]
     new_sellers_growth = ((last_new_sellers - prev_new_sellers) / prev_new_sellers * 100) if prev_new_sellers > 0 else 0
 
-# Tendance de satisfaction (note moyenne mensuelle)
-reviews['review_creation_date'] = pd.to_datetime(reviews['review_creation_date'])
-monthly_rating = reviews.set_index('review_creation_date').resample('ME')['review_score'].mean().dropna()
+# Tendance de satisfaction (note moyenne par mois de création des avis)
+monthly_rating = view.monthly_rating()
 rating_growth = 0
 if len(monthly_rating) >= 2:
     rating_growth = monthly_rating.iloc[-1] - monthly_rating.iloc[-2]
@@ -119,18 +135,20 @@ with col2:
         suffix=""
     )
 
+# Comptes distincts non additifs: sur une sélection, les cartes montrent les
+# clients et vendeurs apparus pour la première fois dans la sélection
 with col3:
     create_kpi_chart(
-        kpis['total_customers'],
-        "Clients Actifs",
+        kpis['new_customers'] if is_filtered else kpis['total_customers'],
+        "Nouveaux Clients" if is_filtered else "Clients Actifs",
         delta=new_customers_growth,
         suffix=""
     )
 
 with col4:
     create_kpi_chart(
-        kpis['total_sellers'],
-        "Vendeurs",
+        kpis['new_sellers'] if is_filtered else kpis['total_sellers'],
+        "Nouveaux Vendeurs" if is_filtered else "Vendeurs",
         delta=new_sellers_growth,
         suffix=""
     )
@@ -253,30 +271,29 @@ st.markdown("---")
 # ========================================
 st.markdown("## 💬 Analyse des Avis Clients")
 
-reviews = load_reviews()
+reviews_dist = view.review_distribution()
 
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_reviews = len(reviews)
+    total_reviews = int(reviews_dist.sum())
     st.metric("Total Avis", f"{total_reviews:,}")
 
 with col2:
-    avg_score = reviews['review_score'].mean()
+    avg_score = kpis['avg_rating']
     st.metric("Note Moyenne", f"{avg_score:.2f} / 5")
 
 with col3:
-    positive_reviews = len(reviews[reviews['review_score'] >= 4])
-    positive_pct = (positive_reviews / total_reviews * 100)
+    positive_reviews = reviews_dist.loc[[4, 5]].sum()
+    positive_pct = (positive_reviews / total_reviews * 100) if total_reviews else 0
     st.metric("Avis Positifs", f"{positive_pct:.1f}%")
 
 with col4:
-    negative_reviews = len(reviews[reviews['review_score'] <= 2])
-    negative_pct = (negative_reviews / total_reviews * 100)
+    negative_reviews = reviews_dist.loc[[1, 2]].sum()
+    negative_pct = (negative_reviews / total_reviews * 100) if total_reviews else 0
     st.metric("Avis Négatifs", f"{negative_pct:.1f}%")
 
 # Distribution des notes
-reviews_dist = reviews['review_score'].value_counts().sort_index()
 reviews_df = pd.DataFrame({
     'note': reviews_dist.index,
     'count': reviews_dist.values
@@ -298,40 +315,29 @@ st.markdown("---")
 # ========================================
 st.markdown("## 🚚 Performance de Livraison")
 
-orders = load_orders()
-
-# Calculer les délais
-orders['delivery_time'] = (
-    orders['order_delivered_customer_date'] - 
-    orders['order_purchase_timestamp']
-).dt.days
-
-delivered_orders = orders[orders['order_status'] == 'delivered'].copy()
+delivery_totals = view.rollup(measures=['orders', 'delivered_orders', 'on_time_orders'])
 
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    avg_delivery = delivered_orders['delivery_time'].mean()
+    avg_delivery = view.delivery_mean()
     st.metric("Délai Moyen", f"{avg_delivery:.1f} jours")
 
 with col2:
-    median_delivery = delivered_orders['delivery_time'].median()
+    median_delivery = view.delivery_median()
     st.metric("Délai Médian", f"{median_delivery:.0f} jours")
 
 with col3:
-    on_time = len(orders[
-        (orders['order_delivered_customer_date'] <= orders['order_estimated_delivery_date']) &
-        (orders['order_status'] == 'delivered')
-    ])
-    on_time_pct = (on_time / len(delivered_orders) * 100)
+    on_time = delivery_totals['on_time_orders']
+    on_time_pct = (on_time / delivery_totals['delivered_orders'] * 100) if delivery_totals['delivered_orders'] else 0
     st.metric("Livraisons à Temps", f"{on_time_pct:.1f}%")
 
 with col4:
-    delivery_rate = (len(delivered_orders) / len(orders) * 100)
+    delivery_rate = (delivery_totals['delivered_orders'] / delivery_totals['orders'] * 100)
     st.metric("Taux de Livraison", f"{delivery_rate:.1f}%")
 
 # Distribution des délais
-delivery_dist = delivered_orders['delivery_time'].value_counts().sort_index()
+delivery_dist = view.delivery_distribution()
 delivery_df = pd.DataFrame({
     'days': delivery_dist.index,
     'count': delivery_dist.values
@@ -10,11 +10,19 @@ from components.sidebar import render_sidebar
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from pathlib import Path
 from components.auth import require_admin
 from components.translations import get_text
 from components.charts import create_line_chart, create_bar_chart, create_kpi_chart
-from utils.data_loader import load_orders, load_customers, load_sellers, load_order_items, load_products
-from utils.shipping_forecast import get_shipping_forecast_model
+from utils.data_loader import load_customers, load_sellers, load_order_items, load_products, get_orders_with_delivery_time
+from utils.shipping_forecast import (
+    get_batch_download_limit,
+    get_shipping_forecast_model,
+    new_batch_output_path,
+    score_batch,
+    score_csv_stream
+)
+from utils.geolocation import get_zip_centroids
 
 # Vérification des droits admin
 require_admin()
@@ -292,19 +300,10 @@ if mode == "🔮 Prédiction Unique":
                         'product_description_lenght': 500
                     }
                     
-                    # Données de géolocalisation (simplifiées - utilise des coordonnées moyennes par état)
-                    state_coords = {
-                        'SP': (-23.55, -46.63),
-                        'RJ': (-22.91, -43.17),
-                        'MG': (-19.92, -43.94),
-                        'PR': (-25.42, -49.27),
-                        'RS': (-30.03, -51.23),
-                        'BA': (-12.97, -38.51),
-                        'SC': (-27.59, -48.55)
-                    }
-                    
-                    customer_lat, customer_lng = state_coords.get(customer_state, (-23.55, -46.63))
-                    seller_lat, seller_lng = state_coords.get(seller_state, (-23.55, -46.63))
+                    # Données de géolocalisation (centroïde du préfixe postal, sinon de l'état)
+                    zip_centroids = get_zip_centroids()
+                    customer_lat, customer_lng = zip_centroids.coordinates(customer_zip, customer_state)
+                    seller_lat, seller_lng = zip_centroids.coordinates(seller_zip, seller_state)
                     
                     geolocation_data = {
                         'customer_lat': customer_lat,
@@ -403,7 +402,96 @@ elif mode == "📊 Prédiction par Lot":
     
     uploaded_file = st.file_uploader("📁 Upload fichier CSV", type=['csv'])
     
-    if uploaded_file is not None:
+    # Fichiers volumineux: lecture, prédiction et écriture par blocs (mémoire bornée)
+    streaming = uploaded_file is not None and st.toggle(
+        "🌊 Mode streaming (gros fichiers)",
+        value=uploaded_file.size > 20 * 1024 * 1024,
+        help="Le fichier est lu, prédit et écrit par blocs dans un fichier de résultats proposé au téléchargement"
+    )
+    
+    if streaming:
+        try:
+            st.dataframe(pd.read_csv(uploaded_file, nrows=5), width='stretch')
+            
+            output_format = st.radio("Format du résultat", ["csv", "parquet"], horizontal=True)
+            
+            if st.button("🚀 Lancer les Prédictions", type="primary"):
+                # Le résultat précédent de la session n'est plus proposé
+                previous = st.session_state.pop('batch_stream_result', None)
+                if previous is not None:
+                    Path(previous['path']).unlink(missing_ok=True)
+                
+                # Dossier géré: les résultats abandonnés sont purgés par âge
+                output_path = str(new_batch_output_path(output_format))
+                
+                progress_bar = st.progress(0.0, text="🔄 Traitement en cours...")
+                
+                def update_progress(rows, fraction):
+                    progress_bar.progress(min(fraction, 1.0), text=f"🔄 {rows:,} lignes traitées")
+                
+                summary = score_csv_stream(
+                    shipping_model,
+                    uploaded_file,
+                    output_path,
+                    get_zip_centroids(),
+                    fmt=output_format,
+                    progress=update_progress
+                )
+                progress_bar.empty()
+                st.session_state['batch_stream_result'] = {
+                    'file_id': uploaded_file.file_id,
+                    'path': output_path,
+                    'format': output_format,
+                    **summary
+                }
+            
+            result = st.session_state.get('batch_stream_result')
+            if result is not None and not Path(result['path']).exists():
+                st.warning("⚠️ Résultat expiré, relancer les prédictions")
+                st.session_state.pop('batch_stream_result')
+                result = None
+            if result is not None and result['file_id'] == uploaded_file.file_id:
+                st.success(f"✅ {result['rows']:,} lignes traitées, {result['predicted']:,} prédictions")
+                
+                # Statistiques
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.metric("Délai Moyen", f"{result['mean_days']:.1f} jours")
+                
+                with col2:
+                    st.metric("Min", f"{result['min_days']:.1f} jours")
+                
+                with col3:
+                    st.metric("Max", f"{result['max_days']:.1f} jours")
+                
+                # Aperçu: le résultat complet reste sur disque
+                st.markdown("#### 📋 Aperçu des Résultats")
+                st.dataframe(result['preview'], width='stretch')
+                
+                # Export: le fichier n'est lu qu'au clic, mais Streamlit le charge alors
+                # entièrement en mémoire pour le servir, d'où la limite de taille
+                output_size = Path(result['path']).stat().st_size
+                if output_size > get_batch_download_limit():
+                    st.info(
+                        f"📁 Résultat trop volumineux pour le téléchargement ({output_size / 1024 ** 2:,.0f} Mo), "
+                        f"disponible sur le serveur: {result['path']}"
+                    )
+                else:
+                    mime = "text/csv" if result['format'] == "csv" else "application/vnd.apache.parquet"
+                    st.download_button(
+                        "💾 Télécharger les Résultats",
+                        Path(result['path']).read_bytes,
+                        f"predictions_delivery.{result['format']}",
+                        mime,
+                        on_click='ignore',
+                        width='stretch'
+                    )
+        
+        except Exception as e:
+            st.error(f"❌ Erreur: {str(e)}")
+    
+    elif uploaded_file is not None:
         try:
             df_batch = pd.read_csv(uploaded_file)
             
@@ -413,62 +501,19 @@ elif mode == "📊 Prédiction par Lot":
             
             if st.button("🚀 Lancer les Prédictions", type="primary"):
                 with st.spinner("🔄 Traitement en cours..."):
-                    predictions = []
-                    distances = []
+                    progress_bar = st.progress(0.0)
                     
-                    state_coords = {
-                        'SP': (-23.55, -46.63),
-                        'RJ': (-22.91, -43.17),
-                        'MG': (-19.92, -43.94),
-                        'PR': (-25.42, -49.27),
-                        'RS': (-30.03, -51.23),
-                        'BA': (-12.97, -38.51),
-                        'SC': (-27.59, -48.55)
-                    }
+                    def update_progress(done, total):
+                        progress_bar.progress(done / max(total, 1), text=f"{done:,} / {total:,} lignes")
                     
-                    for _, row in df_batch.iterrows():
-                        customer_state = row.get('customer_state', 'SP')
-                        seller_state = row.get('seller_state', 'SP')
-                        
-                        customer_lat, customer_lng = state_coords.get(customer_state, (-23.55, -46.63))
-                        seller_lat, seller_lng = state_coords.get(seller_state, (-23.55, -46.63))
-                        
-                        order_data = {
-                            'seller_id': row.get('seller_id'),
-                            'customer_state': customer_state,
-                            'seller_state': seller_state,
-                            'customer_zip_code_prefix': row.get('customer_zip_code_prefix', 10000),
-                            'seller_zip_code_prefix': row.get('seller_zip_code_prefix', 10000),
-                            'product_weight_g': row.get('product_weight_g', 500),
-                            'price': row.get('price', 100.0),
-                            'product_length_cm': row.get('product_length_cm', 20),
-                            'product_width_cm': row.get('product_width_cm', 15),
-                            'product_height_cm': row.get('product_height_cm', 10),
-                            'freight_value': row.get('freight_value', row.get('price', 100.0) * 0.15),
-                            'num_items': row.get('num_items', 1),
-                            'num_unique_sellers': row.get('num_unique_sellers', 1),
-                            'total_freight_value': row.get('total_freight_value', row.get('freight_value', 15.0)),
-                            'total_payment_value': row.get('total_payment_value', row.get('price', 100.0)),
-                            'num_payments': row.get('num_payments', 1),
-                            'purchase_date': pd.Timestamp.now(),
-                            'product_category_name': row.get('product_category_name', 'None'),
-                            'customer_state_geo': row.get('customer_state_geo', customer_state),
-                            'seller_state_geo': row.get('seller_state_geo', seller_state),
-                            'product_name_lenght': row.get('product_name_lenght', 50),
-                            'product_description_lenght': row.get('product_description_lenght', 500)
-                        }
-                        
-                        geolocation_data = {
-                            'customer_lat': customer_lat,
-                            'customer_lng': customer_lng,
-                            'seller_lat': seller_lat,
-                            'seller_lng': seller_lng
-                        }
-                        
-                        pred = shipping_model.predict(order_data, geolocation_data)
-                        predictions.append(pred if pred is not None else np.nan)
-                        dist = shipping_model.haversine_distance(customer_lat, customer_lng, seller_lat, seller_lng)
-                        distances.append(dist)
+                    # Préparation, coordonnées, distances et modèle: un passage vectorisé par bloc de lignes
+                    predictions, distances = score_batch(
+                        shipping_model,
+                        df_batch,
+                        get_zip_centroids(),
+                        progress=update_progress
+                    )
+                    progress_bar.empty()
                     
                     df_batch['predicted_delivery_days'] = predictions
                     df_batch['distance_km'] = distances
@@ -510,18 +555,13 @@ elif mode == "📊 Prédiction par Lot":
 elif mode == "📈 Analyse Historique":
     st.markdown("### 📈 Analyse des Performances Historiques")
     
-    orders = load_orders()
+    # Délais réels calculés une fois et partagés entre sessions
+    orders = get_orders_with_delivery_time()
     
     if orders is not None:
-        # Calcul des délais réels
-        orders['order_purchase_timestamp'] = pd.to_datetime(orders['order_purchase_timestamp'])
-        orders['order_delivered_customer_date'] = pd.to_datetime(orders['order_delivered_customer_date'])
-        
-        delivered_orders = orders[orders['order_status'] == 'delivered'].copy()
-        delivered_orders['delivery_days'] = (
-            delivered_orders['order_delivered_customer_date'] - 
-            delivered_orders['order_purchase_timestamp']
-        ).dt.days
+        delivered_orders = orders[orders['order_status'] == 'delivered'].rename(
+            columns={'delivery_time': 'delivery_days'}
+        )
         
         # Métriques globales
         col1, col2, col3, col4 = st.columns(4)
@@ -14,7 +14,7 @@ import nltk
 from components.auth import require_admin
 from components.translations import get_text
 from components.charts import create_bar_chart, create_pie_chart, create_kpi_chart, create_line_chart
-from utils.data_loader import load_reviews, load_orders, load_products, load_order_items, load_sellers
+from utils.data_loader import load_reviews, load_orders, load_products, load_order_items, load_sellers, get_reviews_with_sentiment, sentiment_buckets
 from utils.model_manager import ModelManager, load_sentiment_model
 
 # Vérification des droits admin
@@ -493,19 +493,14 @@ elif mode == "📊 Analyse par Lot":
                         else:
                             # Fallback basé sur review_score si pas de modèle
                             scores = df_batch['review_score'] if 'review_score' in df_batch.columns else pd.Series([3] * len(df_batch))
-                            for score in scores:
-                                if score >= 4:
-                                    raw_labels.append('positive')
-                                    sentiments.append('Positif')
-                                    confidences.append(0.75)
-                                elif score <= 2:
-                                    raw_labels.append('negative')
-                                    sentiments.append('Négatif')
-                                    confidences.append(0.70)
-                                else:
-                                    raw_labels.append('neutral')
-                                    sentiments.append('Neutre')
-                                    confidences.append(0.60)
+                            labels = sentiment_buckets(scores, missing='neutral')
+                            raw_labels = labels.astype(object).tolist()
+                            sentiments = labels.map({
+                                'positive': 'Positif',
+                                'neutral': 'Neutre',
+                                'negative': 'Négatif'
+                            }).astype(object).tolist()
+                            confidences = labels.map({'positive': 0.75, 'neutral': 0.60, 'negative': 0.70}).astype(float).tolist()
 
                         df_batch['predicted_label'] = raw_labels
                         df_batch['predicted_sentiment'] = sentiments
@@ -564,14 +559,10 @@ elif mode == "📊 Analyse par Lot":
 elif mode == "📈 Dashboard Sentiments":
     st.markdown("### 📈 Dashboard des Sentiments Globaux")
     
-    reviews = load_reviews()
+    # Avis classés par sentiment (calculé une fois, partagé entre sessions)
+    reviews = get_reviews_with_sentiment()
     
     if reviews is not None:
-        # Classification basée sur le score
-        reviews['sentiment'] = reviews['review_score'].apply(
-            lambda x: 'Positif' if x >= 4 else ('Négatif' if x <= 2 else 'Neutre')
-        )
-        
         # Métriques globales
         col1, col2, col3, col4 = st.columns(4)
         
@@ -626,7 +617,6 @@ elif mode == "📈 Dashboard Sentiments":
         # Évolution temporelle
         st.markdown("#### 📊 Évolution Temporelle")
         
-        reviews['review_creation_date'] = pd.to_datetime(reviews['review_creation_date'])
         monthly_sentiment = reviews.set_index('review_creation_date').resample('ME')['review_score'].mean()
         
         chart3 = create_line_chart(
@@ -677,16 +667,19 @@ elif mode == "🏪 Analyse par Vendeur":
         reviews_items = reviews.merge(order_items[['order_id', 'seller_id']], on='order_id', how='inner')
         
         # Classification
-        reviews_items['sentiment'] = reviews_items['review_score'].apply(
-            lambda x: 'Positif' if x >= 4 else ('Négatif' if x <= 2 else 'Neutre')
-        )
+        sentiment = sentiment_buckets(reviews_items['review_score'], missing='neutral')
         
         # Agrégation par vendeur
-        seller_sentiments = reviews_items.groupby('seller_id').agg({
+        seller_sentiments = reviews_items[['seller_id', 'review_id', 'review_score']].assign(
+            positive=(sentiment == 'positive').to_numpy(),
+            negative=(sentiment == 'negative').to_numpy()
+        ).groupby('seller_id', observed=True).agg({
             'review_id': 'count',
-            'review_score': 'mean'
+            'review_score': 'mean',
+            'positive': 'mean',
+            'negative': 'mean'
         }).reset_index()
-        seller_sentiments.columns = ['seller_id', 'n_reviews', 'avg_score']
+        seller_sentiments.columns = ['seller_id', 'n_reviews', 'avg_score', 'positive_share', 'negative_share']
         
         st.markdown("#### 📊 Top/Flop Vendeurs")
         
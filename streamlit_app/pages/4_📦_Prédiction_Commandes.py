@@ -13,7 +13,8 @@ from datetime import datetime, timedelta
 from components.auth import require_admin
 from components.translations import get_text
 from components.charts import create_line_chart, create_bar_chart, create_kpi_chart, create_area_chart
-from utils.data_loader import load_orders, load_products, load_order_items
+from utils.data_loader import load_orders, load_products, load_order_items, get_order_items_fact
+from utils.month_partitions import get_last_purchase_date, get_monthly_order_counts, load_order_items_range
 from utils.orders_forecast import get_orders_forecast_model
 
 # Vérification des droits admin
@@ -161,22 +162,18 @@ if mode == "🔮 Prédiction Produit":
         
         # Chargement des données pour analyse
         products = load_products()
-        order_items = load_order_items()
-        orders = load_orders()
+        order_items_fact = get_order_items_fact()
         
-        if products is not None and order_items is not None and orders is not None:
-            # Préparer les données réelles
-            orders['order_purchase_timestamp'] = pd.to_datetime(orders['order_purchase_timestamp'])
-            
-            # Joindre les données
-            order_with_items = order_items.merge(orders[['order_id', 'order_purchase_timestamp']], on='order_id')
+        if products is not None and order_items_fact is not None:
+            # Joindre les données (items déjà enrichis des dates de commande)
+            order_with_items = order_items_fact.dropna(subset=['order_purchase_timestamp'])
             order_with_items = order_with_items.merge(products, on='product_id', how='left')
             
             # Extraire le mois
             order_with_items['month'] = pd.to_datetime(order_with_items['order_purchase_timestamp']).dt.to_period('M')
             
             # Agréger par produit et mois
-            product_monthly = order_with_items.groupby(['product_id', 'month']).agg({
+            product_monthly = order_with_items.groupby(['product_id', 'month'], observed=True).agg({
                 'order_item_id': 'count',  # quantité vendue
                 'price': 'mean',
                 'freight_value': 'mean',
@@ -198,7 +195,7 @@ if mode == "🔮 Prédiction Produit":
             )
             
             # Sélection du produit
-            top_products = product_monthly.groupby('product_id')['quantity_sold'].sum().nlargest(100)
+            top_products = product_monthly.groupby('product_id', observed=True)['quantity_sold'].sum().nlargest(100)
             
             col_input1, col_input2 = st.columns(2)
             
@@ -428,12 +425,11 @@ if mode == "🔮 Prédiction Produit":
 elif mode == "📊 Prédiction Globale":
     st.markdown("### 📊 Prédictions Globales Multi-Produits")
     
-    orders = load_orders()
+    # Agrégats mensuels calculés par partition (mois d'achat) et mis en cache
+    monthly_orders = get_monthly_order_counts()
     
-    if orders is not None:
+    if not monthly_orders.empty:
         # Analyse historique globale
-        orders['order_purchase_timestamp'] = pd.to_datetime(orders['order_purchase_timestamp'])
-        monthly_orders = orders.set_index('order_purchase_timestamp').resample('ME').size()
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -489,30 +485,29 @@ elif mode == "📊 Prédiction Globale":
         # Top catégories à suivre (data-driven)
         st.markdown("#### 🎯 Top Catégories à Surveiller")
         
-        order_items = load_order_items()
+        last_date = get_last_purchase_date()
+        last_6m = last_date - pd.DateOffset(months=6)
+        prev_6m = last_date - pd.DateOffset(months=12)
+        
+        # Seules les partitions des 12 derniers mois sont lues
         products = load_products()
-        items_with_date = order_items.merge(
-            orders[['order_id', 'order_purchase_timestamp']],
-            on='order_id',
-            how='left'
+        items_with_date = load_order_items_range(
+            start=prev_6m,
+            columns=('order_id', 'product_id', 'order_purchase_timestamp')
         ).merge(
             products[['product_id', 'product_category_name_english']],
             on='product_id',
             how='left'
         )
         
-        last_date = orders['order_purchase_timestamp'].max()
-        last_6m = last_date - pd.DateOffset(months=6)
-        prev_6m = last_date - pd.DateOffset(months=12)
-        
         recent = items_with_date[items_with_date['order_purchase_timestamp'] >= last_6m]
         prev = items_with_date[
             (items_with_date['order_purchase_timestamp'] >= prev_6m) &
             (items_with_date['order_purchase_timestamp'] < last_6m)
         ]
         
-        recent_counts = recent.groupby('product_category_name_english').size()
-        prev_counts = prev.groupby('product_category_name_english').size()
+        recent_counts = recent.groupby('product_category_name_english', observed=True).size()
+        prev_counts = prev.groupby('product_category_name_english', observed=True).size()
         
         growth = ((recent_counts - prev_counts) / prev_counts.replace(0, np.nan) * 100).replace([np.inf, -np.inf], np.nan)
         growth = growth.dropna().sort_values(ascending=False)
@@ -544,13 +539,13 @@ elif mode == "📈 Analyse Tendances":
     order_items = load_order_items()
     
     if orders is not None and order_items is not None:
-        orders['order_purchase_timestamp'] = pd.to_datetime(orders['order_purchase_timestamp'])
+        # Table partagée en lecture seule: attributs dérivés calculés hors DataFrame
+        purchase = orders['order_purchase_timestamp']
         
         # Tendance par jour de la semaine
         st.markdown("#### 📅 Ventes par Jour de la Semaine")
         
-        orders['day_of_week'] = orders['order_purchase_timestamp'].dt.day_name()
-        weekday_sales = orders.groupby('day_of_week').size().reindex([
+        weekday_sales = orders.groupby(purchase.dt.day_name()).size().reindex([
             'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'
         ])
         
@@ -568,8 +563,7 @@ elif mode == "📈 Analyse Tendances":
         # Tendance par heure
         st.markdown("#### ⏰ Ventes par Heure de la Journée")
         
-        orders['hour'] = orders['order_purchase_timestamp'].dt.hour
-        hourly_sales = orders.groupby('hour').size()
+        hourly_sales = orders.groupby(purchase.dt.hour).size()
         
         chart2 = create_line_chart(
             pd.DataFrame({
@@ -585,8 +579,7 @@ elif mode == "📈 Analyse Tendances":
         # Saisonnalité mensuelle
         st.markdown("#### 🗓️ Saisonnalité Annuelle")
         
-        orders['month'] = orders['order_purchase_timestamp'].dt.month
-        monthly_pattern = orders.groupby('month').size()
+        monthly_pattern = orders.groupby(purchase.dt.month).size()
         
         month_names = ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin', 'Juil', 'Août', 'Sep', 'Oct', 'Nov', 'Déc']
         
@@ -638,18 +631,13 @@ elif mode == "🎯 Planification Stock":
     st.markdown("### 🎯 Planification et Optimisation du Stock")
     
     orders = load_orders()
-    order_items = load_order_items()
     products = load_products()
     
     last_date = orders['order_purchase_timestamp'].max()
     recent_90 = last_date - pd.Timedelta(days=90)
     prev_90 = last_date - pd.Timedelta(days=180)
     
-    items_with_date = order_items.merge(
-        orders[['order_id', 'order_purchase_timestamp']],
-        on='order_id',
-        how='left'
-    )
+    items_with_date = get_order_items_fact()
     
     recent_sales = items_with_date[items_with_date['order_purchase_timestamp'] >= recent_90]
     prev_sales = items_with_date[
@@ -657,8 +645,8 @@ elif mode == "🎯 Planification Stock":
         (items_with_date['order_purchase_timestamp'] < recent_90)
     ]
     
-    recent_counts = recent_sales.groupby('product_id').size().rename('sales_recent')
-    prev_counts = prev_sales.groupby('product_id').size().rename('sales_prev')
+    recent_counts = recent_sales.groupby('product_id', observed=True).size().rename('sales_recent')
+    prev_counts = prev_sales.groupby('product_id', observed=True).size().rename('sales_prev')
     
     velocity = pd.concat([recent_counts, prev_counts], axis=1).fillna(0)
     velocity['growth_pct'] = ((velocity['sales_recent'] - velocity['sales_prev']) / velocity['sales_prev'].replace(0, np.nan) * 100).replace([np.inf, -np.inf], np.nan).fillna(0)
@@ -7,6 +7,7 @@ from components.style import load_global_styles
 from components.topbar import render_topbar
 from components.sidebar import render_sidebar
 import pandas as pd
+import numpy as np
 from components.auth import require_auth
 from components.translations import get_text
 from components.product_card import (
@@ -15,7 +16,8 @@ from components.product_card import (
     get_cart_count
 )
 from utils.recommendation_engine import get_recommendation_engine
-from utils.data_loader import get_products_with_stats
+from utils.data_loader import get_products_with_stats, get_state_options
+from utils.delivery_eta import get_eta_matrix
 
 # Vérification authentification
 require_auth()
@@ -93,8 +95,12 @@ search_query = st.text_input(
     label_visibility='collapsed'
 )
 
+# Délais de livraison précalculés (produit x état), absents sans modèle de livraison
+eta_matrix = get_eta_matrix()
+
 # Filtres en colonnes
-col_filter1, col_filter2, col_filter3, col_filter4 = st.columns([2, 2, 2, 2])
+filter_cols = st.columns(5 if eta_matrix.is_loaded() else 4)
+col_filter1, col_filter2, col_filter3, col_filter4 = filter_cols[:4]
 
 with col_filter1:
     # Filtre catégorie
@@ -138,6 +144,8 @@ with col_filter4:
         'price_desc': get_text('price_desc'),
         'rating': get_text('rating_desc')
     }
+    if eta_matrix.is_loaded():
+        sort_options['eta'] = get_text('eta_asc')
     
     sort_by = st.selectbox(
         get_text('sort_by'),
@@ -146,6 +154,19 @@ with col_filter4:
         key='sort_filter'
     )
 
+if eta_matrix.is_loaded():
+    with filter_cols[4]:
+        # Copie hors widget: l'état reste connu des cartes produit sur la page détail
+        state_options = get_state_options() or ['SP', 'RJ', 'MG']
+        delivery_state = st.session_state.get('delivery_state', 'SP')
+        delivery_state = st.selectbox(
+            get_text('delivery_to'),
+            options=state_options,
+            index=state_options.index(delivery_state) if delivery_state in state_options else 0,
+            key='delivery_state_filter'
+        )
+        st.session_state.delivery_state = delivery_state
+
 # Filtres additionnels dans un expander
 with st.expander("🔧 Filtres Avancés"):
     col1, col2 = st.columns(2)
@@ -181,6 +202,16 @@ with st.expander("🔧 Filtres Avancés"):
             ),
             key='weight_filter'
         )
+        
+        if eta_matrix.is_loaded():
+            max_eta = st.slider(
+                get_text('max_delivery_days'),
+                min_value=0.0,
+                max_value=float(np.ceil(eta_matrix.max_days)),
+                value=float(np.ceil(eta_matrix.max_days)),
+                step=0.5,
+                key='eta_filter'
+            )
 
 st.markdown("---")
 
@@ -192,7 +223,7 @@ filtered_products = recommendation_engine.search_products(
     category=selected_category if selected_category != 'all' else None,
     price_range=price_range,
     min_rating=min_rating,
-    sort_by=sort_by
+    sort_by='relevance' if sort_by == 'eta' else sort_by
 )
 
 # Compléter les champs manquants depuis le catalogue complet
@@ -248,6 +279,16 @@ filtered_products = filtered_products[
     (filtered_products['product_weight_g'] <= weight_range[1])
 ]
 
+# Délai estimé vers l'état de livraison: lecture vectorisée de la matrice
+if eta_matrix.is_loaded():
+    filtered_products = filtered_products.assign(
+        eta_days=eta_matrix.lookup(filtered_products['product_id'], delivery_state)
+    )
+    if max_eta < np.ceil(eta_matrix.max_days):
+        filtered_products = filtered_products[filtered_products['eta_days'] <= max_eta]
+    if sort_by == 'eta':
+        filtered_products = filtered_products.sort_values('eta_days', kind='stable', na_position='last')
+
 # ========================================
 # PAGINATION
 # ========================================
@@ -298,7 +339,7 @@ for row in range(0, len(current_products), 3):
             product = current_products.iloc[idx]
             
             with col:
-                render_product_card(product, show_actions=True, key_prefix=f"grid_{start_idx + idx}_")
+                render_product_card(product, show_actions=True, key_prefix=f"grid_{start_idx + idx}_", eta_matrix=eta_matrix)
 
 st.markdown("---")
 
@@ -347,7 +388,7 @@ if not bestsellers.empty:
     cols = st.columns(4)
     for idx, (_, product) in enumerate(bestsellers.head(4).iterrows()):
         with cols[idx]:
-            render_product_card(product, show_actions=True, key_prefix=f"popular_{idx}_")
+            render_product_card(product, show_actions=True, key_prefix=f"popular_{idx}_", eta_matrix=eta_matrix)
 
 # Footer
 st.markdown("---")
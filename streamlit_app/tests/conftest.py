@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Les modules de l'application s'importent depuis streamlit_app (utils.*, components.*)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
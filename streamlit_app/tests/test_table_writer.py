@@ -0,0 +1,63 @@
+"""Écriture par blocs de TableWriter (schéma Parquet fixé au premier bloc)"""
+
+import pandas as pd
+import pytest
+
+from utils.columnar_cache import TableWriter
+
+pytest.importorskip('pyarrow')
+
+
+def _write(path, chunks, **kwargs):
+    writer = TableWriter(path, 'parquet', **kwargs)
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+    finally:
+        writer.close()
+    return writer
+
+
+def test_float_after_int_chunk(tmp_path):
+    path = tmp_path / "out.parquet"
+    writer = _write(path, [
+        pd.DataFrame({'order_id': ['a', 'b'], 'freight_value': [3, 4]}),
+        pd.DataFrame({'order_id': ['c', 'd'], 'freight_value': [2.5, None]}),
+    ], widen_numeric=True)
+
+    result = pd.read_parquet(path)
+    assert writer.rows == 4
+    assert result['freight_value'].tolist()[:3] == [3.0, 4.0, 2.5]
+    assert pd.isna(result['freight_value'].iloc[3])
+
+
+def test_values_after_empty_column(tmp_path):
+    path = tmp_path / "out.parquet"
+    _write(path, [
+        pd.DataFrame({'order_id': ['a'], 'seller_zip_code_prefix': [None]}),
+        pd.DataFrame({'order_id': ['b'], 'seller_zip_code_prefix': [13023]}),
+    ])
+
+    result = pd.read_parquet(path)
+    assert result['order_id'].tolist() == ['a', 'b']
+    assert pd.isna(result['seller_zip_code_prefix'].iloc[0])
+    assert result['seller_zip_code_prefix'].iloc[1] == '13023'
+
+
+def test_integers_kept_without_widening(tmp_path):
+    path = tmp_path / "out.parquet"
+    _write(path, [pd.DataFrame({'order_item_id': [1, 2]}), pd.DataFrame({'order_item_id': [3]})])
+
+    result = pd.read_parquet(path)
+    assert pd.api.types.is_integer_dtype(result['order_item_id'])
+    assert result['order_item_id'].tolist() == [1, 2, 3]
+
+
+def test_csv_single_header(tmp_path):
+    path = tmp_path / "out.csv"
+    writer = TableWriter(path, 'csv')
+    writer.write(pd.DataFrame({'x': [1]}))
+    writer.write(pd.DataFrame({'x': [2.5]}))
+    writer.close()
+
+    assert pd.read_csv(path)['x'].tolist() == [1.0, 2.5]
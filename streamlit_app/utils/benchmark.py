@@ -0,0 +1,326 @@
+"""
+Benchmarks des loaders et agrégats de data_loader
+
+Chaque fonction est exécutée hors serveur Streamlit sur des jeux de données
+synthétiques de taille croissante (utils.synthetic_data), avec les caches
+mémoire vidés avant chaque mesure: le temps mesuré est celui d'une première
+requête après démarrage, dépendances comprises (lecture du cache columnaire,
+table de faits, ...). Pour chaque fonction et chaque échelle sont relevés:
+    - la durée (médiane de --repeat exécutions)
+    - le pic mémoire Python (tracemalloc, exécution séparée)
+    - le débit, en lignes sources par seconde
+
+Les résultats sont comparés à une référence JSON propre à la machine
+(Data/.benchmark/baseline.json, non versionnée): une durée ou un pic mémoire
+au-delà de la tolérance est signalé comme régression (code de sortie 1).
+Depuis le dossier streamlit_app:
+
+    python -m utils.benchmark [--scales 0.1 0.3 1] [--only nom ...] [--save-baseline]
+
+Chaque échelle est mesurée dans un processus séparé (OLIST_DATA_DIR pointe
+vers son jeu de données, généré une fois dans Data/.benchmark/).
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from utils.data_loader import CACHE_DEPENDENCIES, DATA_ENV_VAR, DEFAULT_DATA_PATH, read_dataset
+
+# Fonctions mesurées: nom -> (module, fonction sans argument, nœud dont les sources sont comptées)
+BENCHMARKS = {
+    'load_products': ('utils.data_loader', 'load_products', 'products'),
+    'load_orders': ('utils.data_loader', 'load_orders', 'orders'),
+    'load_order_items': ('utils.data_loader', 'load_order_items', 'order_items'),
+    'load_reviews': ('utils.data_loader', 'load_reviews', 'reviews'),
+    'order_items_fact': ('utils.data_loader', 'get_order_items_fact', 'order_items_fact'),
+    'products_with_stats': ('utils.data_loader', 'get_products_with_stats', 'products_with_stats'),
+    'product_review_stats': ('utils.data_loader', 'get_product_review_stats', 'product_review_stats'),
+    'reviews_with_sentiment': ('utils.data_loader', 'get_reviews_with_sentiment', 'reviews'),
+    'dashboard_kpis': ('utils.data_loader', 'get_dashboard_kpis', 'dashboard_kpis'),
+    'sales_over_time': ('utils.data_loader', 'get_sales_over_time', 'sales_over_time'),
+    'category_performance': ('utils.data_loader', 'get_category_performance', 'category_performance'),
+    'geographic_distribution': ('utils.data_loader', 'get_geographic_distribution', 'geographic_distribution'),
+    'review_comment_index': ('utils.data_loader', 'get_review_comment_index', 'review_comment_index'),
+    'product_seller_state_map': ('utils.data_loader', 'get_product_seller_state_map', 'product_seller_state_map'),
+    'olap_cube': ('utils.olap_cube', 'get_olap_cube', 'olap_cube'),
+}
+
+DEFAULT_SCALES = (0.1, 0.3, 1.0)
+DEFAULT_TOLERANCE = 0.5
+# En dessous, les écarts de durée relèvent du bruit de mesure
+MIN_COMPARED_SECONDS = 0.05
+BENCHMARK_DATA_DIR = DEFAULT_DATA_PATH / ".benchmark"
+# Référence locale: les mesures dépendent de la machine
+BASELINE_FILE = BENCHMARK_DATA_DIR / "baseline.json"
+
+
+def get_dataset_dir(scale, seed=42, data_root=BENCHMARK_DATA_DIR):
+    """
+    Jeu de données synthétique d'une échelle (généré s'il n'existe pas)
+
+    Un fichier témoin est écrit en dernier: un jeu interrompu est regénéré.
+    """
+    from utils.synthetic_data import generate
+
+    dataset_dir = Path(data_root) / f"scale-{scale:g}-seed-{seed}"
+    done_file = dataset_dir / ".complete"
+    if not done_file.exists():
+        print(f"🔄 Génération des données synthétiques (échelle {scale:g})...")
+        generate(dataset_dir, scale=scale, seed=seed)
+        done_file.write_text(json.dumps({'scale': scale, 'seed': seed}))
+    return dataset_dir
+
+
+def _clear_caches():
+    """Vide les caches mémoire Streamlit (les caches sur disque sont conservés)"""
+    import streamlit as st
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    gc.collect()
+
+
+def _table_files(node):
+    """Tables sources d'un nœud (sans les dictionnaires d'identifiants, lus en plus)"""
+    files = set()
+    for dependency in CACHE_DEPENDENCIES[node]:
+        if dependency.endswith('_dictionary') or dependency == 'id_dictionaries':
+            continue
+        if dependency in CACHE_DEPENDENCIES:
+            files.update(_table_files(dependency))
+        else:
+            files.add(dependency)
+    return sorted(files)
+
+
+def _source_rows(node, row_counts):
+    """Nombre de lignes des tables sources d'un nœud"""
+    total = 0
+    for filename in _table_files(node):
+        if filename not in row_counts:
+            row_counts[filename] = len(read_dataset(filename))
+        total += row_counts[filename]
+    return total
+
+
+def measure(names, repeat=3):
+    """
+    Mesure des fonctions sur le jeu de données courant (DATA_PATH)
+
+    Args:
+        names: Noms des benchmarks (clés de BENCHMARKS)
+        repeat: Nombre d'exécutions chronométrées par fonction
+
+    Returns:
+        Liste de dicts {'name', 'rows', 'seconds', 'peak_mb', 'rows_per_second', 'ok', 'error'}
+    """
+    funcs = {}
+    for name in names:
+        module_name, func_name, _ = BENCHMARKS[name]
+        funcs[name] = getattr(importlib.import_module(module_name), func_name)
+
+    # Une passe préalable construit les caches sur disque (Parquet, partitions);
+    # une fonction qui y échoue est signalée et n'est pas chronométrée
+    warmup_errors = {}
+    for name, func in funcs.items():
+        try:
+            func()
+        except Exception as e:
+            print(f"❌ Échec de la passe préalable '{name}': {e}")
+            warmup_errors[name] = f"passe préalable: {e}"
+
+    row_counts = {}
+    results = []
+    for name, func in funcs.items():
+        rows = _source_rows(BENCHMARKS[name][2], row_counts)
+        if name in warmup_errors:
+            results.append({'name': name, 'rows': rows, 'ok': False, 'error': warmup_errors[name]})
+            continue
+        try:
+            timings = []
+            for _ in range(repeat):
+                _clear_caches()
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+
+            # Pic mémoire mesuré à part: tracemalloc ralentit les allocations
+            _clear_caches()
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        except Exception as e:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            results.append({'name': name, 'rows': rows, 'ok': False, 'error': str(e)})
+            continue
+
+        seconds = sorted(timings)[len(timings) // 2]
+        results.append({
+            'name': name,
+            'rows': rows,
+            'seconds': seconds,
+            'peak_mb': peak / 1024 ** 2,
+            'rows_per_second': rows / seconds if seconds > 0 else None,
+            'ok': True,
+            'error': None
+        })
+    return results
+
+
+def run_scale(scale, names, repeat=3, seed=42, data_root=BENCHMARK_DATA_DIR):
+    """Mesure une échelle dans un processus séparé (données et caches isolés)"""
+    dataset_dir = get_dataset_dir(scale, seed, data_root)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = Path(tmp_dir) / "results.json"
+        command = [
+            sys.executable, '-m', 'utils.benchmark', '--worker',
+            '--output', str(output_file), '--repeat', str(repeat), '--only', *names
+        ]
+        env = dict(os.environ, **{DATA_ENV_VAR: str(dataset_dir)})
+        subprocess.run(command, cwd=Path(__file__).parent.parent, env=env, check=True)
+        results = json.loads(output_file.read_text())
+
+    for result in results:
+        result['scale'] = scale
+    return results
+
+
+def load_baseline(path=BASELINE_FILE):
+    """Résultats de référence indexés par (échelle, nom), vide si absents"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    return {(r['scale'], r['name']): r for r in baseline['results'] if r.get('ok')}
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    """Enregistre des résultats comme nouvelle référence"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': sys.version.split()[0],
+            'results': [
+                {key: value for key, value in r.items() if key not in ('time_change', 'memory_change')}
+                for r in results
+            ]
+        }, f, indent=2)
+        f.write('\n')
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Ajoute à chaque résultat ses écarts à la référence
+
+    Returns:
+        Liste des résultats en régression (durée ou pic mémoire au-delà de la tolérance)
+    """
+    regressions = []
+    for result in results:
+        reference = baseline.get((result['scale'], result['name']))
+        if not result['ok'] or reference is None:
+            continue
+        result['time_change'] = None
+        if max(result['seconds'], reference['seconds']) >= MIN_COMPARED_SECONDS:
+            result['time_change'] = result['seconds'] / reference['seconds'] - 1
+        result['memory_change'] = result['peak_mb'] / reference['peak_mb'] - 1 if reference['peak_mb'] else None
+        if any(change is not None and change > tolerance
+               for change in (result['time_change'], result['memory_change'])):
+            regressions.append(result)
+    return regressions
+
+
+def _change(value):
+    return f"{value * 100:+6.0f}%" if value is not None else "      -"
+
+
+def print_report(results, regressions=()):
+    """Affiche les mesures par échelle, avec les écarts à la référence"""
+    width = max(len(r['name']) for r in results)
+    regressed = {(r['scale'], r['name']) for r in regressions}
+    print(f"  {'':<{width}}  {'lignes':>10}  {'durée':>9}  {'pic':>9}  {'lignes/s':>11}  {'Δ durée':>7}  {'Δ mém.':>7}")
+    for scale in sorted({r['scale'] for r in results}):
+        print(f"— Échelle {scale:g}")
+        for r in (r for r in results if r['scale'] == scale):
+            if not r['ok']:
+                print(f"❌ {r['name']:<{width}}  ({r['error']})")
+                continue
+            status = "⚠️" if (scale, r['name']) in regressed else "✅"
+            rate = f"{r['rows_per_second']:11,.0f}" if r['rows_per_second'] else f"{'-':>11}"
+            print(
+                f"{status} {r['name']:<{width}}  {r['rows']:10,}  {r['seconds']:7.3f} s  "
+                f"{r['peak_mb']:6.1f} Mo  {rate}  "
+                f"{_change(r.get('time_change'))}  {_change(r.get('memory_change'))}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des loaders et agrégats de données")
+    parser.add_argument('--scales', type=float, nargs='+', default=list(DEFAULT_SCALES),
+                        help="échelles des jeux synthétiques (1 = dataset public)")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="fonctions à mesurer")
+    parser.add_argument('--repeat', type=int, default=3, help="exécutions chronométrées par fonction")
+    parser.add_argument('--seed', type=int, default=42, help="graine des jeux synthétiques")
+    parser.add_argument('--data-root', default=str(BENCHMARK_DATA_DIR), help="dossier des jeux générés")
+    parser.add_argument('--baseline', default=str(BASELINE_FILE), help="fichier de référence")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="écart relatif toléré avant de signaler une régression")
+    parser.add_argument('--save-baseline', action='store_true', help="enregistre les résultats comme référence")
+    parser.add_argument('--output', help="écrit les résultats en JSON")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # Hors serveur, Streamlit signale l'absence de runtime à chaque appel mis en cache
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+
+    names = args.only or list(BENCHMARKS)
+
+    if args.worker:
+        # Processus de mesure d'une échelle: jeu de données fixé par OLIST_DATA_DIR
+        results = measure(names, repeat=args.repeat)
+        Path(args.output).write_text(json.dumps(results))
+        return 0
+
+    start = time.perf_counter()
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale(scale, names, repeat=args.repeat, seed=args.seed, data_root=args.data_root))
+
+    baseline = load_baseline(args.baseline)
+    if not baseline and not args.save_baseline:
+        print(f"⚠️ Pas de référence ({args.baseline}): lancer une fois avec --save-baseline")
+    regressions = compare(results, baseline, tolerance=args.tolerance)
+    print_report(results, regressions)
+    print(f"⏱️ Total: {time.perf_counter() - start:.2f} s")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"✅ Référence enregistrée: {args.baseline}")
+        return 0
+    failures = [r for r in results if not r['ok']]
+    if failures:
+        print(f"❌ {len(failures)} mesure(s) en échec")
+    if regressions:
+        print(f"⚠️ {len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+    return 1 if failures or regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""
+Cache columnaire (Parquet) des datasets CSV Olist
+
+Au premier chargement, chaque CSV est converti en fichier Parquet typé
+(dates déjà parsées), identifié par une empreinte du fichier source.
+Les chargements suivants lisent directement le fichier Parquet.
+
+TableWriter écrit une table par blocs en CSV ou Parquet (prédictions par
+lot, générateur de données synthétiques).
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIR_NAME = ".columnar_cache"
+
+
+def source_fingerprint(path):
+    """Empreinte d'un fichier source (chemin, taille, date de modification)"""
+    path = Path(path)
+    stat = path.stat()
+    raw = f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def get_cache_dir(path):
+    """Dossier du cache columnaire associé à un fichier source"""
+    return Path(path).parent / CACHE_DIR_NAME
+
+
+def get_cache_file(path):
+    """Chemin du fichier Parquet correspondant à l'état actuel du CSV"""
+    path = Path(path)
+    return get_cache_dir(path) / f"{path.stem}-{source_fingerprint(path)}.parquet"
+
+
+def read_csv_cached(path, parse_dates=None, columns=None, **read_kwargs):
+    """
+    Lit un CSV via le cache columnaire
+
+    Args:
+        path: Chemin du fichier CSV source
+        parse_dates: Colonnes à convertir en datetime avant la mise en cache
+        columns: Projection optionnelle (seules ces colonnes sont lues du Parquet)
+        **read_kwargs: Arguments supplémentaires pour pd.read_csv
+
+    Returns:
+        DataFrame typé
+    """
+    path = Path(path)
+    cache_file = get_cache_file(path)
+
+    if cache_file.exists():
+        try:
+            return pd.read_parquet(cache_file, columns=list(columns) if columns is not None else None)
+        except Exception as e:
+            print(f"⚠️ Cache columnaire illisible, relecture du CSV: {cache_file} ({e})")
+
+    df = pd.read_csv(path, **read_kwargs)
+    for col in parse_dates or []:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+
+    _write_cache(df, cache_file, path.stem)
+    return df[list(columns)] if columns is not None else df
+
+
+def ensure_parquet_cache(path, parse_dates=None, **read_kwargs):
+    """
+    Garantit l'existence du fichier Parquet d'un CSV sans le garder en mémoire
+
+    Returns:
+        Chemin du fichier Parquet, ou None si le cache n'a pas pu être écrit
+    """
+    cache_file = get_cache_file(path)
+    if not cache_file.exists():
+        read_csv_cached(path, parse_dates=parse_dates, **read_kwargs)
+    return cache_file if cache_file.exists() else None
+
+
+def _write_cache(df, cache_file, stem):
+    """Écrit le fichier Parquet de manière atomique et purge les versions obsolètes"""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        print(f"⚠️ Impossible d'écrire le cache columnaire {cache_file}: {e}")
+        return
+
+    for stale in cache_file.parent.glob(f"{stem}-*.parquet"):
+        if stale != cache_file:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+class TableWriter:
+    """
+    Écriture d'une table par blocs (CSV avec en-tête unique, ou Parquet)
+
+    En Parquet, le schéma est fixé au premier bloc. Avec widen_numeric, les
+    colonnes entières y sont déclarées float64: un bloc lu d'un CSV peut
+    ensuite contenir des décimales ou des valeurs manquantes. Une colonne vide
+    du premier bloc est déclarée texte, et les blocs suivants y sont convertis.
+    """
+
+    def __init__(self, path, fmt, widen_numeric=False):
+        self.path = Path(path)
+        self.fmt = fmt
+        self.widen_numeric = widen_numeric
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self.path.unlink(missing_ok=True)
+
+    def _field_type(self, field):
+        import pyarrow as pa
+
+        if pa.types.is_null(field.type):
+            return pa.string()
+        if self.widen_numeric and pa.types.is_integer(field.type):
+            return pa.float64()
+        return field.type
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            df.to_csv(self.path, mode='a', header=self.rows == 0, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._schema = pa.schema([
+                    field.with_type(self._field_type(field)) for field in table.schema
+                ]).remove_metadata()
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            text_columns = [
+                field.name for field in self._schema
+                if pa.types.is_string(field.type) and not pd.api.types.is_string_dtype(df[field.name])
+            ]
+            if text_columns:
+                df = df.astype({col: 'string' for col in text_columns})
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
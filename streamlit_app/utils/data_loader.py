@@ -1,98 +1,637 @@
 """
 Chargement et gestion des données
+
+Les tables (load_*) et la table de faits sont mises en cache comme ressources:
+un seul exemplaire par processus, partagé en lecture seule par toutes les
+sessions. Elles ne doivent jamais être modifiées en place; les colonnes
+dérivées sont calculées par des fonctions mises en cache de ce module.
 """
 
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import streamlit as st
 from pathlib import Path
-
-DATA_PATH = Path(__file__).parent.parent.parent / "Data"
-
-@st.cache_data(ttl=3600)
-def load_products():
-    """Charge le dataset des produits"""
-    products = pd.read_csv(DATA_PATH / "olist_products_dataset.csv")
-    translation = pd.read_csv(DATA_PATH / "product_category_name_translation.csv")
+from config.settings import get_app_settings
+from utils.columnar_cache import ensure_parquet_cache, read_csv_cached
+from utils.fingerprint_cache import file_fingerprint, fingerprint_cache
+
+DATA_ENV_VAR = "OLIST_DATA_DIR"
+DEFAULT_DATA_PATH = Path(__file__).parent.parent.parent / "Data"
+
+def get_data_path():
+    """
+    Dossier des datasets Olist
+
+    La variable d'environnement OLIST_DATA_DIR est prioritaire sur
+    app_settings.data_dir (relatif au dossier streamlit_app); par défaut Data/.
+    """
+    data_dir = os.environ.get(DATA_ENV_VAR)
+    if data_dir:
+        return Path(data_dir)
+    data_dir = get_app_settings().get('data_dir')
+    if data_dir:
+        return Path(__file__).parent.parent / data_dir
+    return DEFAULT_DATA_PATH
+
+DATA_PATH = get_data_path()
+DELTA_PATH = DATA_PATH / "deltas"
+
+# Colonnes date parsées une seule fois, avant l'écriture du cache columnaire
+DATE_COLUMNS = {
+    "olist_orders_dataset.csv": [
+        'order_purchase_timestamp',
+        'order_approved_at',
+        'order_delivered_carrier_date',
+        'order_delivered_customer_date',
+        'order_estimated_delivery_date'
+    ],
+    "olist_order_items_dataset.csv": ['shipping_limit_date'],
+    "olist_order_reviews_dataset.csv": ['review_creation_date', 'review_answer_timestamp'],
+}
+
+# Tables acceptant des partitions ajoutées dans Data/deltas/<table>/ (CSV ou Parquet),
+# avec les colonnes identifiant une ligne (les doublons déjà ingérés sont ignorés)
+DELTA_TABLES = {
+    "olist_orders_dataset.csv": ("orders", ['order_id']),
+    "olist_order_items_dataset.csv": ("order_items", ['order_id', 'order_item_id']),
+    "olist_order_reviews_dataset.csv": ("reviews", ['review_id', 'order_id']),
+    "olist_order_payments_dataset.csv": ("payments", ['order_id', 'payment_sequential']),
+}
+
+# Graphe de dépendances des caches: nœud -> fichiers sources ou autres nœuds.
+# L'empreinte d'un nœud couvre toutes ses sources transitives: un fichier modifié
+# (ou une nouvelle partition delta) invalide exactement les agrégats qui en dépendent.
+# Une table encodée dépend aussi des dictionnaires d'identifiants qu'elle utilise.
+CACHE_DEPENDENCIES = {
+    'order_id_dictionary': (
+        "olist_orders_dataset.csv",
+        "olist_order_items_dataset.csv",
+        "olist_order_reviews_dataset.csv",
+        "olist_order_payments_dataset.csv"
+    ),
+    'product_id_dictionary': ("olist_products_dataset.csv", "olist_order_items_dataset.csv"),
+    'customer_id_dictionary': ("olist_customers_dataset.csv", "olist_orders_dataset.csv"),
+    'seller_id_dictionary': ("olist_sellers_dataset.csv", "olist_order_items_dataset.csv"),
+    'review_id_dictionary': ("olist_order_reviews_dataset.csv",),
+    'id_dictionaries': (
+        'order_id_dictionary',
+        'product_id_dictionary',
+        'customer_id_dictionary',
+        'seller_id_dictionary',
+        'review_id_dictionary'
+    ),
+    'products': (
+        "olist_products_dataset.csv",
+        "product_category_name_translation.csv",
+        'product_id_dictionary'
+    ),
+    'orders': ("olist_orders_dataset.csv", 'order_id_dictionary', 'customer_id_dictionary'),
+    'order_items': (
+        "olist_order_items_dataset.csv",
+        'order_id_dictionary',
+        'product_id_dictionary',
+        'seller_id_dictionary'
+    ),
+    'customers': ("olist_customers_dataset.csv", 'customer_id_dictionary'),
+    'sellers': ("olist_sellers_dataset.csv", 'seller_id_dictionary'),
+    'reviews': ("olist_order_reviews_dataset.csv", 'order_id_dictionary', 'review_id_dictionary'),
+    'payments': ("olist_order_payments_dataset.csv", 'order_id_dictionary'),
+    'payments_by_month': ('orders', 'payments'),
+    'order_items_fact': ('order_items', 'orders', 'sellers'),
+    'order_item_reviews': ('order_items', 'reviews'),
+    'products_with_stats': ('products', 'order_items_fact', 'order_item_reviews'),
+    'dashboard_kpis': ('orders', 'order_items', 'customers', 'sellers', 'reviews', 'payments'),
+    'sales_over_time': ('orders', 'payments'),
+    'category_performance': ('products', 'order_items'),
+    'geographic_distribution': ('orders', 'customers'),
+    'product_review_stats': ('order_item_reviews',),
+    'review_comment_index': ('order_items', 'reviews'),
+    'state_options': ('customers', 'sellers'),
+    'product_seller_state_map': ('order_items_fact',),
+    'olap_cube': ('orders', 'order_items', 'customers', 'sellers', 'products', 'payments', 'reviews'),
+    'all_tables': ('products', 'orders', 'order_items', 'customers', 'sellers', 'reviews', 'payments'),
+}
+
+def cached_on(node, resource=False):
+    """Cache Streamlit invalidé par l'empreinte des sources d'un nœud du graphe"""
+    return fingerprint_cache(lambda: node_fingerprint(node), resource=resource)
+
+# Colonnes lues par chaque consommateur, par table. Les loaders acceptent une
+# projection (tuple) et mettent chaque projection en cache séparément: les colonnes
+# texte des avis (titre, commentaire) ne sont lues que là où elles sont affichées.
+COLUMN_REGISTRY = {
+    'order_items_fact': {
+        'orders': (
+            'order_id',
+            'customer_id',
+            'order_status',
+            'order_purchase_timestamp',
+            'order_delivered_customer_date',
+            'order_estimated_delivery_date'
+        ),
+        'sellers': ('seller_id', 'seller_state'),
+    },
+    'order_item_reviews': {
+        'order_items': ('order_id', 'product_id'),
+        'reviews': ('order_id', 'review_score'),
+    },
+    'dashboard_kpis': {
+        'orders': (
+            'order_id',
+            'order_status',
+            'order_purchase_timestamp',
+            'order_delivered_customer_date'
+        ),
+        'order_items': ('order_id', 'order_item_id', 'product_id'),
+        'customers': ('customer_id',),
+        'sellers': ('seller_id',),
+        'reviews': ('review_id', 'order_id', 'review_score'),
+        'payments': ('order_id', 'payment_sequential', 'payment_value'),
+    },
+    'sales_over_time': {
+        'orders': ('order_id', 'order_purchase_timestamp'),
+        'payments': ('order_id', 'payment_sequential', 'payment_value'),
+    },
+    'category_performance': {
+        'products': ('product_id', 'product_category_name'),
+        'order_items': ('order_id', 'order_item_id', 'product_id', 'price'),
+    },
+    'geographic_distribution': {
+        'orders': ('order_id', 'customer_id'),
+        'customers': ('customer_id', 'customer_state'),
+    },
+    'incremental_ingestion': {
+        'orders': (
+            'order_id',
+            'order_status',
+            'order_purchase_timestamp',
+            'order_delivered_customer_date'
+        ),
+        'order_items': ('order_id', 'order_item_id', 'product_id', 'price', 'freight_value'),
+        'reviews': ('review_id', 'order_id', 'review_score'),
+        'payments': ('order_id', 'payment_sequential', 'payment_value'),
+    },
+    'review_trend': {
+        'reviews': ('review_id', 'order_id', 'review_score', 'review_creation_date'),
+    },
+}
+
+def get_projection(consumer, table):
+    """Colonnes déclarées pour une table par un consommateur (None = toutes)"""
+    return COLUMN_REGISTRY.get(consumer, {}).get(table)
+
+# Identifiants hexadécimaux encodés en catégories partagées: un même dictionnaire
+# (trié) par type d'identifiant, construit à partir de toutes les tables qui le
+# contiennent, pour que les fusions et groupby portent sur des codes entiers
+ID_SOURCES = {
+    column: CACHE_DEPENDENCIES[f'{column}_dictionary']
+    for column in ('order_id', 'product_id', 'customer_id', 'seller_id', 'review_id')
+}
+
+# Colonnes à faible cardinalité stockées en catégories
+CATEGORY_COLUMNS = (
+    'order_status',
+    'customer_state',
+    'seller_state',
+    'payment_type',
+    'product_category_name',
+    'product_category_name_english',
+)
+
+def is_compact_dtypes_enabled():
+    """Indique si les identifiants et colonnes à faible cardinalité sont encodés en catégories"""
+    return bool(get_app_settings().get('compact_dtypes', True))
+
+@cached_on('id_dictionaries', resource=True)
+def get_id_dtype(column):
+    """Dictionnaire partagé d'un type d'identifiant (CategoricalDtype trié)"""
+    values = pd.concat(
+        [read_dataset(filename, columns=(column,))[column] for filename in ID_SOURCES[column]],
+        ignore_index=True
+    )
+    return pd.CategoricalDtype(pd.Index(values.dropna().unique()).sort_values())
+
+def encode_frame(df):
+    """
+    Encode les identifiants (dictionnaires partagés) et les colonnes à faible
+    cardinalité en catégories. Les valeurs restent lisibles: le décodage se fait
+    naturellement à l'affichage.
+    """
+    if not is_compact_dtypes_enabled():
+        return df
+
+    dtypes = {}
+    for col in df.columns:
+        if col in ID_SOURCES:
+            dtypes[col] = get_id_dtype(col)
+        elif col in CATEGORY_COLUMNS:
+            dtypes[col] = 'category'
+    return df.astype(dtypes) if dtypes else df
+
+def is_incremental_enabled():
+    """Indique si les agrégats sont maintenus par ingestion incrémentale"""
+    return bool(get_app_settings().get('incremental_ingestion', False))
+
+def get_data_backend():
+    """Moteur de calcul des agrégats: 'pandas' (défaut) ou 'duckdb'"""
+    return get_app_settings().get('data_backend', 'pandas')
+
+def read_base_dataset(filename, columns=None):
+    """Lit un CSV du dossier Data via le cache columnaire Parquet"""
+    return read_csv_cached(DATA_PATH / filename, parse_dates=DATE_COLUMNS.get(filename), columns=columns)
+
+def list_delta_partitions(filename):
+    """Liste les partitions delta d'une table, dans l'ordre de dépôt (nom de fichier)"""
+    if filename not in DELTA_TABLES:
+        return []
+    delta_dir = DELTA_PATH / DELTA_TABLES[filename][0]
+    if not delta_dir.is_dir():
+        return []
+    return sorted(p for p in delta_dir.iterdir() if p.suffix in ('.csv', '.parquet'))
+
+def read_delta_partition(filename, path, columns=None):
+    """Lit une partition delta (CSV via le cache columnaire, ou Parquet)"""
+    date_columns = DATE_COLUMNS.get(filename)
+    if path.suffix == '.csv':
+        return read_csv_cached(path, parse_dates=date_columns, columns=columns)
+
+    partition = pd.read_parquet(path, columns=list(columns) if columns is not None else None)
+    for col in date_columns or []:
+        if col in partition.columns:
+            partition[col] = pd.to_datetime(partition[col])
+    return partition
+
+def dataset_parquet_files(filename):
+    """
+    Fichiers Parquet constituant une table (base puis partitions delta)
+
+    Les CSV sont convertis via le cache columnaire si nécessaire.
+    Retourne None si un fichier ne peut pas être matérialisé en Parquet.
+    """
+    date_columns = DATE_COLUMNS.get(filename)
+    files = [ensure_parquet_cache(DATA_PATH / filename, parse_dates=date_columns)]
+    for path in list_delta_partitions(filename):
+        if path.suffix == '.csv':
+            files.append(ensure_parquet_cache(path, parse_dates=date_columns))
+        else:
+            files.append(path)
+
+    if any(f is None for f in files):
+        return None
+    return files
+
+def read_dataset(filename, columns=None):
+    """
+    Lit une table complète: fichier de base + partitions delta éventuelles
+
+    Args:
+        filename: Nom du fichier CSV de la table
+        columns: Projection optionnelle (les clés de déduplication sont lues en plus si besoin)
+    """
+    delta_paths = list_delta_partitions(filename)
+    if not delta_paths:
+        return read_base_dataset(filename, columns=columns)
+
+    keys = DELTA_TABLES[filename][1]
+    read_columns = columns
+    if columns is not None:
+        read_columns = list(columns) + [k for k in keys if k not in columns]
+
+    base = read_base_dataset(filename, columns=read_columns)
+    partitions = [read_delta_partition(filename, path, columns=read_columns) for path in delta_paths]
+    table = pd.concat([base] + partitions, ignore_index=True).drop_duplicates(subset=keys, keep='first')
+    return table[list(columns)] if columns is not None else table
+
+def dataset_fingerprint(*filenames, include_deltas=True):
+    """Empreinte d'un ensemble de tables (fichiers de base, partitions delta, encodage)"""
+    parts = [str(is_compact_dtypes_enabled())]
+    for filename in filenames:
+        parts.append(file_fingerprint(DATA_PATH / filename))
+        if include_deltas:
+            parts.extend(file_fingerprint(path) for path in list_delta_partitions(filename))
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+def node_source_files(node):
+    """Fichiers sources (transitifs) d'un nœud du graphe de dépendances, triés"""
+    files = set()
+    for dependency in CACHE_DEPENDENCIES[node]:
+        if dependency in CACHE_DEPENDENCIES:
+            files.update(node_source_files(dependency))
+        else:
+            files.add(dependency)
+    return sorted(files)
+
+def node_fingerprint(node):
+    """Empreinte courante des sources d'un nœud du graphe de dépendances"""
+    return dataset_fingerprint(*node_source_files(node))
+
+def is_shared_store_enabled():
+    """Indique si les tables sont servies par le store Arrow partagé entre processus"""
+    from utils.shared_store import get_store_dir
+    return get_store_dir() is not None
+
+def load_table(node, columns=None):
+    """
+    Table encodée, lue directement ou attachée depuis le store partagé
+
+    Args:
+        node: Nœud du graphe de dépendances (sa première source est le fichier de la table)
+        columns: Projection optionnelle
+
+    Avec le store partagé, la table complète est publiée une fois puis
+    chaque projection est une sélection de colonnes sur le fichier mappé.
+    """
+    filename = CACHE_DEPENDENCIES[node][0]
+    if is_shared_store_enabled():
+        from utils.shared_store import shared_frame
+        return shared_frame(
+            Path(filename).stem,
+            node_fingerprint(node),
+            lambda: encode_frame(read_dataset(filename)),
+            columns=columns
+        )
+    return encode_frame(read_dataset(filename, columns=columns))
+
+def build_products(columns=None):
+    """Produits fusionnés avec la traduction des catégories (projection optionnelle)"""
+    read_columns = None
+    if columns is not None:
+        # La catégorie d'origine est toujours lue pour la fusion avec la traduction
+        read_columns = [c for c in columns if c != 'product_category_name_english']
+        if 'product_category_name' not in read_columns:
+            read_columns.append('product_category_name')
+
+    products = read_dataset("olist_products_dataset.csv", columns=read_columns)
+    translation = read_dataset("product_category_name_translation.csv")
     
     # Fusion avec traduction
     products = products.merge(translation, on='product_category_name', how='left')
     
-    return products
-
-@st.cache_data(ttl=3600)
-def load_orders():
-    """Charge le dataset des commandes"""
-    orders = pd.read_csv(DATA_PATH / "olist_orders_dataset.csv")
-    orders['order_purchase_timestamp'] = pd.to_datetime(orders['order_purchase_timestamp'])
-    orders['order_delivered_customer_date'] = pd.to_datetime(orders['order_delivered_customer_date'])
-    
-    return orders
-
-@st.cache_data(ttl=3600)
-def load_order_items():
-    """Charge le dataset des items de commande"""
-    return pd.read_csv(DATA_PATH / "olist_order_items_dataset.csv")
-
-@st.cache_data(ttl=3600)
-def load_customers():
-    """Charge le dataset des clients"""
-    return pd.read_csv(DATA_PATH / "olist_customers_dataset.csv")
-
-@st.cache_data(ttl=3600)
-def load_sellers():
-    """Charge le dataset des vendeurs"""
-    return pd.read_csv(DATA_PATH / "olist_sellers_dataset.csv")
-
-@st.cache_data(ttl=3600)
-def load_reviews():
-    """Charge le dataset des avis"""
-    reviews = pd.read_csv(DATA_PATH / "olist_order_reviews_dataset.csv")
-    reviews['review_creation_date'] = pd.to_datetime(reviews['review_creation_date'])
-    
-    return reviews
+    if columns is not None:
+        products = products[list(columns)]
+    return encode_frame(products)
+
+@cached_on('products', resource=True)
+def load_products(columns=None):
+    """Charge le dataset des produits (projection optionnelle, traduction incluse)"""
+    if is_shared_store_enabled():
+        from utils.shared_store import shared_frame
+        return shared_frame(
+            "olist_products_dataset",
+            node_fingerprint('products'),
+            build_products,
+            columns=columns
+        )
+    return build_products(columns)
+
+@cached_on('orders', resource=True)
+def load_orders(columns=None):
+    """Charge le dataset des commandes (projection optionnelle de colonnes)"""
+    return load_table('orders', columns=columns)
+
+@cached_on('order_items', resource=True)
+def load_order_items(columns=None):
+    """Charge le dataset des items de commande (projection optionnelle de colonnes)"""
+    return load_table('order_items', columns=columns)
+
+@cached_on('customers', resource=True)
+def load_customers(columns=None):
+    """Charge le dataset des clients (projection optionnelle de colonnes)"""
+    return load_table('customers', columns=columns)
+
+@cached_on('sellers', resource=True)
+def load_sellers(columns=None):
+    """Charge le dataset des vendeurs (projection optionnelle de colonnes)"""
+    return load_table('sellers', columns=columns)
+
+@cached_on('reviews', resource=True)
+def load_reviews(columns=None):
+    """Charge le dataset des avis (projection optionnelle de colonnes)"""
+    return load_table('reviews', columns=columns)
+
+@cached_on('payments', resource=True)
+def load_payments(columns=None):
+    """Charge le dataset des paiements (projection optionnelle de colonnes)"""
+    return load_table('payments', columns=columns)
+
+# Loaders des tables de base, par nœud du graphe de dépendances
+TABLE_LOADERS = {
+    'products': load_products,
+    'orders': load_orders,
+    'order_items': load_order_items,
+    'customers': load_customers,
+    'sellers': load_sellers,
+    'reviews': load_reviews,
+    'payments': load_payments,
+}
+
+def get_loading_workers():
+    """
+    Nombre de threads pour charger plusieurs tables, borné par le nombre de
+    cœurs (0 ou 1 = chargement séquentiel)
+    """
+    workers = int(get_app_settings().get('parallel_loading_workers', 4) or 0)
+    return min(workers, os.cpu_count() or 1)
+
+def load_tables(*tables):
+    """
+    Charge plusieurs tables de base, en parallèle dans un pool de threads
+
+    La lecture Parquet et les conversions de types libèrent en grande partie
+    le GIL: au premier accès, le chargement dure à peu près le temps de la
+    table la plus lente au lieu de la somme. Les tables déjà en cache sont
+    servies immédiatement, et deux demandes simultanées d'une même table
+    attendent le même calcul.
+
+    Args:
+        tables: Noms de tables ('orders', ...), tuples (nom, colonnes), ou
+            fonctions sans argument (produits dérivés, ex. get_order_items_fact)
+
+    Returns:
+        Liste des DataFrames, dans l'ordre demandé
+    """
+    calls = []
+    for table in tables:
+        if callable(table):
+            calls.append(table)
+            continue
+        name, columns = (table, None) if isinstance(table, str) else table
+        loader = TABLE_LOADERS[name]
+        # Même clé de cache qu'un appel direct du loader
+        calls.append((lambda loader=loader: loader()) if columns is None
+                     else (lambda loader=loader, columns=columns: loader(columns=columns)))
+
+    workers = min(get_loading_workers(), len(calls))
+    if workers <= 1:
+        return [call() for call in calls]
+
+    # Les threads du pool partagent le contexte de la session appelante
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def run(call):
+        if ctx is not None:
+            add_script_run_ctx(ctx=ctx)
+        return call()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load-tables") as executor:
+        return list(executor.map(run, calls))
+
+@cached_on('order_items_fact', resource=True)
+def get_order_items_fact():
+    """
+    Table de faits partagée au grain item de commande
+
+    order_items enrichi du statut et des dates de la commande et de l'état
+    du vendeur. Construite une seule fois et réutilisée par toutes les
+    agrégations produit. Les avis, qui multiplieraient les items des
+    commandes à plusieurs avis, sont dans get_order_item_reviews.
+    """
+    order_items, orders, sellers = load_tables(
+        'order_items',
+        ('orders', get_projection('order_items_fact', 'orders')),
+        ('sellers', get_projection('order_items_fact', 'sellers'))
+    )
 
-@st.cache_data(ttl=3600)
-def load_payments():
-    """Charge le dataset des paiements"""
-    return pd.read_csv(DATA_PATH / "olist_order_payments_dataset.csv")
+    fact = order_items.merge(
+        orders[[
+            'order_id',
+            'customer_id',
+            'order_status',
+            'order_purchase_timestamp',
+            'order_delivered_customer_date',
+            'order_estimated_delivery_date'
+        ]],
+        on='order_id',
+        how='left'
+    )
+    fact = fact.merge(sellers[['seller_id', 'seller_state']], on='seller_id', how='left')
+
+    return fact
+
+@cached_on('order_item_reviews', resource=True)
+def get_order_item_reviews():
+    """
+    Notes d'avis au grain item x avis (product_id, review_score)
+
+    Chaque item reçoit tous les avis de sa commande (note manquante sans
+    avis), comme la jointure d'origine des notes moyennes et du sentiment
+    par produit.
+    """
+    order_items, reviews = load_tables(*(
+        (table, get_projection('order_item_reviews', table)) for table in ('order_items', 'reviews')
+    ))
+    items_reviews = order_items.merge(reviews, on='order_id', how='left')
+    return items_reviews[['product_id', 'review_score']]
+
+@cached_on('orders', resource=True)
+def get_orders_with_delivery_time():
+    """
+    Commandes avec le délai de livraison réel en jours (colonne delivery_time)
+
+    Partagé en lecture seule (ne pas modifier le DataFrame retourné).
+    """
+    orders = load_orders(columns=(
+        'order_id',
+        'order_status',
+        'order_purchase_timestamp',
+        'order_delivered_customer_date',
+        'order_estimated_delivery_date'
+    ))
+    return orders.assign(delivery_time=(
+        orders['order_delivered_customer_date'] -
+        orders['order_purchase_timestamp']
+    ).dt.days)
+
+# Sentiment dérivé de la note: <= 2 négatif, 3 neutre, >= 4 positif
+SENTIMENT_CLASSES = ('negative', 'neutral', 'positive')
+SENTIMENT_DISPLAY_LABELS = ('Négatif', 'Neutre', 'Positif')
+
+def sentiment_codes(scores):
+    """
+    Code de sentiment de chaque note (0 négatif, 1 neutre, 2 positif, -1 si manquante)
+
+    Calcul vectorisé: deux comparaisons sur le tableau des notes.
+    """
+    values = pd.to_numeric(pd.Series(scores), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    codes = (values > 2).astype(np.int8) + (values >= 4).astype(np.int8)
+    codes[np.isnan(values)] = -1
+    return codes
+
+def sentiment_buckets(scores, labels=SENTIMENT_CLASSES, missing=None):
+    """
+    Classe des notes en sentiments
+
+    Args:
+        scores: Series (ou tableau) de notes
+        labels: Libellés négatif, neutre, positif
+        missing: Libellé des notes manquantes (None = valeur manquante)
+
+    Returns:
+        Series catégorielle (catégories dans l'ordre de labels), alignée sur scores
+    """
+    codes = sentiment_codes(scores)
+    if missing is not None:
+        codes[codes == -1] = list(labels).index(missing)
+    index = scores.index if isinstance(scores, pd.Series) else None
+    return pd.Series(pd.Categorical.from_codes(codes, categories=list(labels)), index=index, name='sentiment')
+
+@cached_on('reviews', resource=True)
+def get_reviews_with_sentiment():
+    """
+    Avis avec leur sentiment dérivé de la note (Positif / Neutre / Négatif)
+
+    Partagé en lecture seule (ne pas modifier le DataFrame retourné).
+    """
+    reviews = load_reviews()
+    return reviews.assign(sentiment=sentiment_buckets(
+        reviews['review_score'], labels=SENTIMENT_DISPLAY_LABELS, missing='Neutre'
+    ))
 
-@st.cache_data(ttl=3600)
 def get_products_with_stats():
     """Charge les produits avec statistiques agrégées"""
-    products = load_products()
-    order_items = load_order_items()
-    reviews = load_reviews()
-    orders = load_orders()
-    
-    # Fusion items + orders pour avoir les dates
-    items_orders = order_items.merge(
-        orders[['order_id', 'order_status', 'order_purchase_timestamp']],
-        on='order_id',
-        how='left'
+    if is_incremental_enabled():
+        from utils.incremental import get_incremental_aggregates
+        return get_incremental_aggregates().products_with_stats()
+    if is_shared_store_enabled():
+        from utils.shared_store import shared_frame
+        return shared_frame(
+            "products_with_stats",
+            node_fingerprint('products_with_stats'),
+            compute_products_with_stats,
+            copy=True
+        )
+    return compute_products_with_stats()
+
+@cached_on('products_with_stats')
+def compute_products_with_stats():
+    """Recalcul complet des statistiques produit à partir de la table de faits"""
+    products, orders, fact, items_reviews = load_tables(
+        'products', 'orders', get_order_items_fact, get_order_item_reviews
     )
     
-    # Agrégation par produit
-    product_stats = items_orders.groupby('product_id').agg({
-        'order_id': 'count',
-        'price': 'mean',
-        'freight_value': 'mean'
-    }).rename(columns={'order_id': 'total_sales'}).reset_index()
-    
-    # Ajouter les notes moyennes
-    items_reviews = order_items.merge(
-        reviews[['order_id', 'review_score']], 
-        on='order_id', 
-        how='left'
+    # Agrégation par produit (ventes, prix, dernière vente) en une passe
+    product_stats = fact.groupby('product_id', observed=True).agg(
+        total_sales=('order_id', 'count'),
+        price=('price', 'mean'),
+        freight_value=('freight_value', 'mean'),
+        last_order_date=('order_purchase_timestamp', 'max')
     )
+    review_stats = items_reviews.groupby('product_id', observed=True)['review_score'].agg(
+        avg_rating='mean',
+        review_count='count'
+    )
+    product_stats = product_stats.join(review_stats, how='left').reset_index()
     
-    review_stats = items_reviews.groupby('product_id').agg({
-        'review_score': ['mean', 'count']
-    }).reset_index()
-    review_stats.columns = ['product_id', 'avg_rating', 'review_count']
-    
+    return build_products_with_stats(products, product_stats, orders['order_purchase_timestamp'].max())
+
+def build_products_with_stats(products, product_stats, max_date):
+    """Assemble le catalogue enrichi à partir des statistiques agrégées par produit"""
     # Fusion finale
     products_full = products.merge(product_stats, on='product_id', how='left')
-    products_full = products_full.merge(review_stats, on='product_id', how='left')
     
     # Remplissage des valeurs manquantes
     products_full['total_sales'] = products_full['total_sales'].fillna(0)
@@ -100,29 +639,31 @@ def get_products_with_stats():
     products_full['review_count'] = products_full['review_count'].fillna(0)
     
     # Statut de stock basé sur l'activité récente (data-driven)
-    last_sale = (
-        items_orders.groupby('product_id')['order_purchase_timestamp']
-        .max()
-        .rename('last_order_date')
-        .reset_index()
-    )
-    products_full = products_full.merge(last_sale, on='product_id', how='left')
-    max_date = orders['order_purchase_timestamp'].max()
     recent_threshold = max_date - pd.Timedelta(days=90)
     products_full['in_stock'] = products_full['last_order_date'] >= recent_threshold
     products_full['in_stock'] = products_full['in_stock'].fillna(False)
     
     return products_full
 
-@st.cache_data(ttl=3600)
 def get_dashboard_kpis():
     """Calcule les KPIs pour le dashboard admin"""
-    orders = load_orders()
-    order_items = load_order_items()
-    customers = load_customers()
-    sellers = load_sellers()
-    reviews = load_reviews()
-    payments = load_payments()
+    if is_incremental_enabled():
+        from utils.incremental import get_incremental_aggregates
+        return get_incremental_aggregates().dashboard_kpis()
+    if get_data_backend() == 'duckdb':
+        from utils.duckdb_backend import run_aggregate
+        result = run_aggregate('dashboard_kpis')
+        if result is not None:
+            return result
+    return compute_dashboard_kpis()
+
+@cached_on('dashboard_kpis')
+def compute_dashboard_kpis():
+    """Recalcul complet des KPIs"""
+    orders, order_items, customers, sellers, reviews, payments = load_tables(*(
+        (table, get_projection('dashboard_kpis', table))
+        for table in ('orders', 'order_items', 'customers', 'sellers', 'reviews', 'payments')
+    ))
     
     kpis = {
         'total_orders': len(orders),
@@ -140,11 +681,36 @@ def get_dashboard_kpis():
     
     return kpis
 
-@st.cache_data(ttl=3600)
 def get_sales_over_time():
     """Calcule les ventes dans le temps"""
-    orders = load_orders()
-    payments = load_payments()
+    if is_incremental_enabled():
+        from utils.incremental import get_incremental_aggregates
+        return get_incremental_aggregates().sales_over_time()
+    if get_data_backend() == 'duckdb':
+        from utils.duckdb_backend import run_aggregate
+        result = run_aggregate('sales_over_time')
+        if result is not None:
+            return result
+    return compute_sales_over_time()
+
+@cached_on('sales_over_time')
+def compute_sales_over_time():
+    """
+    Ventes mensuelles assemblées à partir des agrégats par partition mensuelle
+
+    Seuls les mois modifiés depuis le dernier calcul sont réagrégés; sans
+    partitions (dossier de cache non inscriptible), recalcul complet.
+    """
+    from utils.month_partitions import get_monthly_sales
+    try:
+        return get_monthly_sales()
+    except Exception as e:
+        print(f"⚠️ Partitions mensuelles indisponibles, recalcul complet des ventes: {e}")
+
+    orders, payments = load_tables(
+        ('orders', get_projection('sales_over_time', 'orders')),
+        ('payments', get_projection('sales_over_time', 'payments'))
+    )
     
     orders_payments = orders.merge(payments, on='order_id', how='left')
     orders_payments['month'] = orders_payments['order_purchase_timestamp'].dt.to_period('M')
@@ -158,82 +724,94 @@ def get_sales_over_time():
     
     return monthly_sales
 
-@st.cache_data(ttl=3600)
 def get_category_performance():
     """Performance par catégorie"""
-    products = load_products()
-    order_items = load_order_items()
-    translation = pd.read_csv(DATA_PATH / "product_category_name_translation.csv")
+    if is_incremental_enabled():
+        from utils.incremental import get_incremental_aggregates
+        return get_incremental_aggregates().category_performance()
+    if get_data_backend() == 'duckdb':
+        from utils.duckdb_backend import run_aggregate
+        result = run_aggregate('category_performance')
+        if result is not None:
+            return result
+    return compute_category_performance()
+
+@cached_on('category_performance')
+def compute_category_performance():
+    """Recalcul complet de la performance par catégorie"""
+    products, order_items = load_tables(
+        ('products', get_projection('category_performance', 'products')),
+        ('order_items', get_projection('category_performance', 'order_items'))
+    )
+    translation = read_dataset("product_category_name_translation.csv")
     
     items_products = order_items.merge(products[['product_id', 'product_category_name']], on='product_id')
     items_products = items_products.merge(translation, on='product_category_name', how='left')
     
-    category_stats = items_products.groupby('product_category_name_english').agg({
+    category_stats = items_products.groupby('product_category_name_english', observed=True).agg({
         'order_id': 'count',
         'price': 'sum'
     }).reset_index()
     
     category_stats.columns = ['category', 'orders', 'revenue']
-    category_stats = category_stats.sort_values('revenue', ascending=False)
+    # Index 0..n et ordre des ex aequo identiques au moteur DuckDB
+    category_stats = category_stats.sort_values(
+        ['revenue', 'category'], ascending=[False, True], kind='stable'
+    ).reset_index(drop=True)
     
     return category_stats
 
-@st.cache_data(ttl=3600)
 def get_geographic_distribution():
     """Distribution géographique des commandes"""
-    orders = load_orders()
-    customers = load_customers()
+    if get_data_backend() == 'duckdb':
+        from utils.duckdb_backend import run_aggregate
+        result = run_aggregate('geographic_distribution')
+        if result is not None:
+            return result
+    return compute_geographic_distribution()
+
+@cached_on('geographic_distribution')
+def compute_geographic_distribution():
+    """Recalcul complet de la distribution géographique"""
+    orders, customers = load_tables(
+        ('orders', get_projection('geographic_distribution', 'orders')),
+        ('customers', get_projection('geographic_distribution', 'customers'))
+    )
     
     orders_customers = orders.merge(customers, on='customer_id')
     
-    state_stats = orders_customers.groupby('customer_state').agg({
+    state_stats = orders_customers.groupby('customer_state', observed=True).agg({
         'order_id': 'count'
     }).reset_index()
     
     state_stats.columns = ['state', 'orders']
-    state_stats = state_stats.sort_values('orders', ascending=False)
+    # Index 0..n et ordre des ex aequo identiques au moteur DuckDB
+    state_stats = state_stats.sort_values(
+        ['orders', 'state'], ascending=[False, True], kind='stable'
+    ).reset_index(drop=True)
     
     return state_stats
 
-@st.cache_data(ttl=3600)
+@cached_on('product_review_stats')
 def get_product_review_stats():
     """Statistiques de sentiment basées sur review_score par produit"""
-    order_items = load_order_items()
-    reviews = load_reviews()
-
-    items_reviews = order_items.merge(
-        reviews[['order_id', 'review_score']],
-        on='order_id',
-        how='left'
-    )
-
-    def classify(score):
-        if pd.isna(score):
-            return None
-        if score >= 4:
-            return 'positive'
-        if score == 3:
-            return 'neutral'
-        return 'negative'
-
-    items_reviews['sentiment'] = items_reviews['review_score'].apply(classify)
-
-    counts = (
-        items_reviews.groupby(['product_id', 'sentiment'])
-        .size()
-        .unstack(fill_value=0)
-        .reset_index()
-    )
-
-    ratings = items_reviews.groupby('product_id').agg(
+    items_reviews = get_order_item_reviews()
+    codes = sentiment_codes(items_reviews['review_score'])
+
+    # Comptes par sentiment, note moyenne et nombre d'avis en une seule agrégation
+    items_reviews = pd.DataFrame({
+        'product_id': items_reviews['product_id'],
+        'review_score': items_reviews['review_score'],
+        **{sentiment: codes == code for code, sentiment in enumerate(SENTIMENT_CLASSES)}
+    })
+    stats = items_reviews.groupby('product_id', observed=True).agg(
+        negative=('negative', 'sum'),
+        neutral=('neutral', 'sum'),
+        positive=('positive', 'sum'),
         avg_rating=('review_score', 'mean'),
         review_count=('review_score', 'count')
-    ).reset_index()
-
-    stats = counts.merge(ratings, on='product_id', how='left')
-    for col in ['positive', 'neutral', 'negative']:
-        if col not in stats.columns:
-            stats[col] = 0
+    )
+    stats = stats[stats['review_count'] > 0].reset_index()
 
     total = stats[['positive', 'neutral', 'negative']].sum(axis=1).replace(0, 1)
     stats['positive_pct'] = stats['positive'] / total * 100
@@ -242,40 +820,46 @@ def get_product_review_stats():
 
     return stats
 
-@st.cache_data(ttl=3600)
-def get_product_review_comments(product_id, n=3):
-    """Retourne quelques commentaires réels d'avis pour un produit"""
-    order_items = load_order_items()
-    reviews = load_reviews()
-
-    items_reviews = order_items.merge(
-        reviews[['order_id', 'review_score', 'review_creation_date', 'review_comment_message']],
-        on='order_id',
-        how='left'
+@cached_on('review_comment_index', resource=True)
+def get_review_comment_index():
+    """
+    Index product_id -> commentaires d'avis non vides
+
+    Chaque liste est triée du plus récent au plus ancien et contient des
+    dicts prêts à afficher. Mis en cache comme ressource (objet partagé,
+    non recopié à chaque appel).
+    """
+    order_items, reviews = load_tables(
+        ('order_items', ['order_id', 'product_id']),
+        ('reviews', ['order_id', 'review_id', 'review_score', 'review_creation_date', 'review_comment_message'])
     )
 
-    product_reviews = items_reviews[
-        (items_reviews['product_id'] == product_id) &
-        (items_reviews['review_comment_message'].notna()) &
-        (items_reviews['review_comment_message'].str.strip() != '')
+    # Tous les avis de chaque commande (pas seulement le plus récent de la table de faits)
+    messages = reviews[
+        reviews['review_comment_message'].notna() &
+        (reviews['review_comment_message'].str.strip() != '')
     ]
 
-    if product_reviews.empty:
-        return []
+    comments = order_items.merge(messages, on='order_id', how='inner')
+    comments = comments.drop_duplicates(['product_id', 'review_id', 'review_comment_message'])
+    comments = comments.sort_values('review_creation_date', ascending=False, kind='stable')
 
-    product_reviews = product_reviews.sort_values('review_creation_date', ascending=False)
-    comments = product_reviews.head(n)
+    ratings = comments['review_score'].fillna(0).astype(int).tolist()
+    dates = comments['review_creation_date'].dt.strftime('%d %b %Y').fillna('').tolist()
 
-    return [
-        {
-            'rating': int(row['review_score']) if not pd.isna(row['review_score']) else 0,
-            'date': row['review_creation_date'].strftime('%d %b %Y') if not pd.isna(row['review_creation_date']) else '',
-            'text': row['review_comment_message']
-        }
-        for _, row in comments.iterrows()
-    ]
+    index = {}
+    for product_id, rating, date, text in zip(
+        comments['product_id'].tolist(), ratings, dates, comments['review_comment_message'].tolist()
+    ):
+        index.setdefault(product_id, []).append({'rating': rating, 'date': date, 'text': text})
+
+    return index
 
-@st.cache_data(ttl=3600)
+def get_product_review_comments(product_id, n=3):
+    """Retourne quelques commentaires réels d'avis pour un produit"""
+    return get_review_comment_index().get(product_id, [])[:n]
+
+@cached_on('state_options')
 def get_state_options():
     """Liste des états disponibles (clients + vendeurs)"""
     customers = load_customers()
@@ -287,23 +871,16 @@ def get_state_options():
         states.update(sellers['seller_state'].dropna().unique().tolist())
     return sorted(states)
 
-@st.cache_data(ttl=3600)
+@cached_on('product_seller_state_map')
 def get_product_seller_state_map():
     """Map product_id -> seller_state (vendeur principal par produit)"""
-    order_items = load_order_items()
-    sellers = load_sellers()
+    fact = get_order_items_fact()
 
-    if order_items is None or sellers is None:
+    if fact is None:
         return {}
 
-    items_sellers = order_items.merge(
-        sellers[['seller_id', 'seller_state']],
-        on='seller_id',
-        how='left'
-    )
-
     counts = (
-        items_sellers.groupby(['product_id', 'seller_state'])
+        fact.groupby(['product_id', 'seller_state'], observed=True)
         .size()
         .reset_index(name='count')
     )
@@ -311,7 +888,7 @@ def get_product_seller_state_map():
     if counts.empty:
         return {}
 
-    idx = counts.groupby('product_id')['count'].idxmax()
+    idx = counts.groupby('product_id', observed=True)['count'].idxmax()
     top = counts.loc[idx]
 
     return dict(zip(top['product_id'], top['seller_state']))
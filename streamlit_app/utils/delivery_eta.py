@@ -0,0 +1,343 @@
+"""
+Délais de livraison précalculés par produit et par état du client
+
+Chaque produit du catalogue est prédit une fois vers chacun des 27 états,
+depuis l'état de son vendeur principal, en lots vectorisés
+(ShippingForecastModel.predict_batch). Le résultat est une matrice float16
+(produits x états, ~1,8 Mo pour le catalogue Olist) persistée en .npz à côté
+du cache columnaire: la fiche produit et le catalogue y lisent un délai par
+simple accès par indice, et le catalogue peut trier ou filtrer par délai.
+
+La matrice est recalculée quand le catalogue, les vendeurs, la
+géolocalisation ou le modèle changent, et chaque jour (la date d'achat
+entre dans les caractéristiques du modèle). Le recalcul quotidien se fait en
+arrière-plan: la matrice de la veille reste servie jusqu'à ce que celle du
+jour soit écrite. Précalcul, depuis le dossier streamlit_app:
+    python -m utils.delivery_eta
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_cache import get_cache_dir, source_fingerprint
+from utils.data_loader import DATA_PATH, get_product_seller_state_map, get_products_with_stats, node_fingerprint
+from utils.fingerprint_cache import fingerprint_cache
+from utils.geolocation import BRAZIL_STATES, get_geolocation_path, get_zip_centroids
+from utils.shipping_forecast import MODEL_DIR, get_shipping_forecast_model
+
+ETA_FILE_STEM = "delivery-eta"
+PRODUCTS_FILE = "olist_products_dataset.csv"
+
+# Produits prédits par appel du modèle (x 27 états)
+CHUNK_PRODUCTS = 2_000
+
+
+# Recalculs quotidiens lancés en arrière-plan, par empreinte (un seul essai chacun)
+_rebuilds = {}
+_rebuilds_lock = threading.Lock()
+
+
+def eta_sources_fingerprint():
+    """Empreinte des sources de la matrice, hors date (None sans modèle de livraison)"""
+    if not (MODEL_DIR / "xgboost_pipeline.pkl").exists():
+        return None
+
+    geolocation_path = get_geolocation_path()
+    parts = [
+        node_fingerprint('products_with_stats'),
+        node_fingerprint('product_seller_state_map'),
+        source_fingerprint(geolocation_path) if geolocation_path.exists() else '',
+        *(source_fingerprint(path) for path in sorted(MODEL_DIR.iterdir()) if path.is_file())
+    ]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+
+def eta_fingerprint():
+    """Empreinte de la matrice du jour (None sans modèle de livraison)"""
+    sources = eta_sources_fingerprint()
+    return f"{sources}-{date.today().isoformat()}" if sources is not None else None
+
+
+def get_eta_file(fingerprint):
+    """Chemin du fichier .npz correspondant à une empreinte"""
+    return get_cache_dir(DATA_PATH / PRODUCTS_FILE) / f"{ETA_FILE_STEM}-{fingerprint}.npz"
+
+
+def _rebuild_in_background(fingerprint):
+    """Calcule la matrice d'une empreinte dans un thread (sans effet si déjà lancé)"""
+    def run():
+        try:
+            load_eta_arrays(fingerprint)
+        except Exception as e:
+            print(f"⚠️ Recalcul de la matrice des délais impossible, matrice précédente conservée: {e}")
+
+    with _rebuilds_lock:
+        if fingerprint in _rebuilds:
+            return
+        print(f"🔄 Recalcul quotidien de la matrice des délais en arrière-plan ({fingerprint})")
+        _rebuilds[fingerprint] = threading.Thread(target=run, name=f"eta-{fingerprint}", daemon=True)
+        _rebuilds[fingerprint].start()
+
+
+def served_eta_fingerprint():
+    """
+    Empreinte de la matrice à servir
+
+    Celle du jour si son fichier existe. Sinon, à sources inchangées, celle du
+    dernier jour calculé, pendant que la matrice du jour est recalculée en
+    arrière-plan: l'empreinte change quand le fichier du jour est écrit. Sans
+    fichier pour ces sources, la matrice du jour est calculée à la requête.
+    """
+    fingerprint = eta_fingerprint()
+    if fingerprint is None or get_eta_file(fingerprint).exists():
+        return fingerprint
+
+    sources = fingerprint.split('-', 1)[0]
+    eta_dir = get_cache_dir(DATA_PATH / PRODUCTS_FILE)
+    previous = sorted(eta_dir.glob(f"{ETA_FILE_STEM}-{sources}-*.npz"))
+    if not previous:
+        return fingerprint
+
+    _rebuild_in_background(fingerprint)
+    return previous[-1].name[len(ETA_FILE_STEM) + 1:-len('.npz')]
+
+
+def build_eta_matrix(model, products, seller_states, zip_centroids, purchase_date=None,
+                     chunk_products=CHUNK_PRODUCTS):
+    """
+    Prédit le délai de chaque produit vers chaque état du client
+
+    Les caractéristiques sont celles de l'estimation de la fiche produit:
+    vendeur inconnu, centroïdes des états, prix et frais moyens du produit,
+    vendeur dans l'état du vendeur principal (sinon dans l'état du client).
+
+    Args:
+        model: ShippingForecastModel chargé
+        products: Catalogue (get_products_with_stats)
+        seller_states: Dict product_id -> état du vendeur principal
+        zip_centroids: ZipCentroids pour les coordonnées des états
+        purchase_date: Date d'achat des commandes prédites (défaut: maintenant)
+        chunk_products: Produits prédits par appel du modèle
+
+    Returns:
+        Dict de tableaux numpy: product_id, eta (float16, produits x BRAZIL_STATES, NaN si non prédit)
+    """
+    purchase_date = pd.Timestamp(purchase_date or datetime.now())
+    states = np.array(BRAZIL_STATES, dtype=object)
+    n_states = len(states)
+    state_lat, state_lng = zip_centroids.lookup(np.full(n_states, np.nan), states)
+
+    product_ids = products['product_id'].astype(str).to_numpy(str)
+    main_seller_state = pd.Series(product_ids).map(seller_states).to_numpy(object)
+
+    def column(name, default):
+        if name in products.columns:
+            return products[name].to_numpy(object if name == 'product_category_name' else float)
+        return np.full(len(products), default)
+
+    price = column('price', 0)
+    freight = column('freight_value', 0)
+    features = {
+        'product_weight_g': column('product_weight_g', 0),
+        'price': price,
+        'product_length_cm': column('product_length_cm', 0),
+        'product_width_cm': column('product_width_cm', 0),
+        'product_height_cm': column('product_height_cm', 0),
+        'freight_value': freight,
+        'total_freight_value': freight,
+        'total_payment_value': price,
+        'product_category_name': column('product_category_name', 'None'),
+        'product_name_lenght': column('product_name_lenght', 50),
+        'product_description_lenght': column('product_description_lenght', 500),
+    }
+
+    eta = np.full((len(products), n_states), np.nan, dtype=np.float16)
+    for start in range(0, len(products), chunk_products):
+        stop = min(start + chunk_products, len(products))
+        n = stop - start
+
+        # Une ligne par couple (produit, état du client), l'état variant le plus vite
+        customer_idx = np.tile(np.arange(n_states), n)
+        customer_state = states[customer_idx]
+        seller_state = np.repeat(main_seller_state[start:stop], n_states)
+        seller_state = np.where(pd.isna(seller_state), customer_state, seller_state)
+        seller_lat, seller_lng = zip_centroids.lookup(np.full(len(seller_state), np.nan), seller_state)
+
+        orders = pd.DataFrame({
+            'seller_id': None,
+            'customer_state': customer_state,
+            'seller_state': seller_state,
+            'customer_zip_code_prefix': 10000,
+            'seller_zip_code_prefix': 10000,
+            **{name: np.repeat(values[start:stop], n_states) for name, values in features.items()},
+            'num_items': 1,
+            'num_unique_sellers': 1,
+            'num_payments': 1,
+            'purchase_date': purchase_date,
+            'customer_state_geo': customer_state,
+            'seller_state_geo': seller_state,
+        })
+        geolocation = pd.DataFrame({
+            'customer_lat': state_lat[customer_idx],
+            'customer_lng': state_lng[customer_idx],
+            'seller_lat': seller_lat,
+            'seller_lng': seller_lng
+        })
+
+        predictions = model.predict_batch(orders, geolocation)
+        if predictions is not None:
+            eta[start:stop] = predictions.reshape(n, n_states)
+
+    return {'product_id': product_ids, 'eta': eta}
+
+
+def load_eta_arrays(fingerprint):
+    """
+    Tableaux de la matrice, lus depuis le fichier .npz ou recalculés
+
+    Returns:
+        Dict de tableaux numpy (voir build_eta_matrix), None sans modèle chargé
+    """
+    eta_file = get_eta_file(fingerprint)
+    if eta_file.exists():
+        try:
+            with np.load(eta_file) as data:
+                return {key: data[key] for key in data.files}
+        except Exception as e:
+            print(f"⚠️ Matrice des délais illisible, recalcul: {eta_file} ({e})")
+
+    model = get_shipping_forecast_model()
+    if not model.is_model_loaded():
+        return None
+
+    arrays = build_eta_matrix(
+        model,
+        get_products_with_stats(),
+        get_product_seller_state_map(),
+        get_zip_centroids()
+    )
+    _write_eta(arrays, eta_file)
+    return arrays
+
+
+def _write_eta(arrays, eta_file):
+    """Écrit le fichier .npz de manière atomique et purge les versions obsolètes"""
+    try:
+        eta_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = eta_file.with_name(f"{eta_file.name}.{os.getpid()}.tmp")
+        # Les identifiants hexadécimaux se compressent bien (~6 Mo -> ~1 Mo)
+        with open(tmp_file, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_file, eta_file)
+    except Exception as e:
+        print(f"⚠️ Impossible d'écrire la matrice des délais {eta_file}: {e}")
+        return
+
+    for stale in eta_file.parent.glob(f"{ETA_FILE_STEM}-*.npz"):
+        if stale != eta_file:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+class EtaMatrix:
+    """Recherche du délai estimé par produit et état du client"""
+
+    def __init__(self, arrays=None):
+        if arrays is None:
+            arrays = {
+                'product_id': np.array([], dtype=str),
+                'eta': np.empty((0, len(BRAZIL_STATES)), dtype=np.float16)
+            }
+
+        self.products = pd.Index(arrays['product_id'])
+        self.eta = arrays['eta']
+        self.state_index = {state: code for code, state in enumerate(BRAZIL_STATES)}
+
+        # Borne des filtres par délai du catalogue
+        finite = self.eta[np.isfinite(self.eta)]
+        self.max_days = float(finite.max()) if len(finite) else 0.0
+
+    def is_loaded(self):
+        """Indique si des délais précalculés sont disponibles"""
+        return len(self.products) > 0
+
+    def lookup(self, product_ids, state):
+        """
+        Délais (jours) d'un lot de produits vers un état
+
+        Returns:
+            Tableau numpy float64 aligné sur product_ids (NaN si inconnu)
+        """
+        rows = self.products.get_indexer(pd.Index(product_ids).astype(str))
+        col = self.state_index.get(state)
+        if col is None or not len(self.products):
+            return np.full(len(rows), np.nan)
+
+        days = self.eta[np.where(rows >= 0, rows, 0), col].astype(float)
+        days[rows < 0] = np.nan
+        return days
+
+    def eta_days(self, product_id, state):
+        """Délai (jours) d'un produit vers un état, None si inconnu"""
+        days = self.lookup([product_id], state)[0]
+        return None if np.isnan(days) else float(days)
+
+
+@fingerprint_cache(served_eta_fingerprint, resource=True)
+def get_eta_matrix():
+    """
+    Retourne la matrice des délais (cached); vide sans modèle de livraison
+
+    L'empreinte est recalculée à chaque appel: une page l'appelle une fois et
+    passe la matrice à ses composants.
+    """
+    fingerprint = served_eta_fingerprint()
+    if fingerprint is None:
+        return EtaMatrix()
+    if not get_eta_file(fingerprint).exists():
+        # Fichier de la veille purgé entre-temps: celui du jour vient d'être écrit
+        fingerprint = eta_fingerprint()
+
+    try:
+        arrays = load_eta_arrays(fingerprint)
+        return EtaMatrix(arrays) if arrays is not None else EtaMatrix()
+    except Exception as e:
+        print(f"❌ Erreur lors du calcul de la matrice des délais: {e}")
+        return EtaMatrix()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Précalcule les délais de livraison produit x état")
+    parser.parse_args(argv)
+
+    # Hors serveur, Streamlit signale l'absence de runtime pour chaque fonction mise en cache importée
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+
+    fingerprint = eta_fingerprint()
+    if fingerprint is None:
+        print(f"❌ Modèle de livraison introuvable: {MODEL_DIR}")
+        return 1
+
+    start = time.perf_counter()
+    arrays = load_eta_arrays(fingerprint)
+    if arrays is None:
+        return 1
+
+    eta = arrays['eta']
+    print(f"✅ {eta.shape[0]:,} produits x {eta.shape[1]} états ({eta.nbytes / 1e6:.1f} Mo) → {get_eta_file(fingerprint)}")
+    print(f"⏱️ Total: {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+"""
+Moteur DuckDB embarqué pour les agrégats du tableau de bord
+
+Les requêtes lisent directement les fichiers Parquet du cache columnaire
+(fichier de base + partitions delta), sans matérialiser les tables en pandas.
+Les résultats ont exactement la même forme que les calculs pandas de data_loader.
+"""
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from utils.data_loader import DATE_COLUMNS, DELTA_TABLES, cached_on, dataset_parquet_files
+
+# Vues SQL exposées aux requêtes -> fichier source
+TABLES = {
+    "orders": "olist_orders_dataset.csv",
+    "order_items": "olist_order_items_dataset.csv",
+    "customers": "olist_customers_dataset.csv",
+    "sellers": "olist_sellers_dataset.csv",
+    "reviews": "olist_order_reviews_dataset.csv",
+    "payments": "olist_order_payments_dataset.csv",
+    "products": "olist_products_dataset.csv",
+    "translation": "product_category_name_translation.csv",
+}
+
+SALES_OVER_TIME_SQL = """
+    SELECT
+        date_trunc('month', o.order_purchase_timestamp) AS month,
+        count(o.order_id) AS order_id,
+        coalesce(sum(p.payment_value), 0) AS payment_value
+    FROM orders o
+    LEFT JOIN payments p USING (order_id)
+    WHERE o.order_purchase_timestamp IS NOT NULL
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+CATEGORY_PERFORMANCE_SQL = """
+    SELECT
+        t.product_category_name_english AS category,
+        count(i.order_id) AS orders,
+        coalesce(sum(i.price), 0) AS revenue
+    FROM order_items i
+    JOIN products p USING (product_id)
+    LEFT JOIN translation t USING (product_category_name)
+    WHERE t.product_category_name_english IS NOT NULL
+    GROUP BY 1
+    ORDER BY revenue DESC, category
+"""
+
+GEOGRAPHIC_DISTRIBUTION_SQL = """
+    SELECT c.customer_state AS state, count(o.order_id) AS orders
+    FROM orders o
+    JOIN customers c USING (customer_id)
+    WHERE c.customer_state IS NOT NULL
+    GROUP BY 1
+    ORDER BY orders DESC, state
+"""
+
+DASHBOARD_KPIS_SQL = """
+    SELECT
+        (SELECT count(*) FROM orders) AS total_orders,
+        (SELECT coalesce(sum(payment_value), 0) FROM payments) AS total_revenue,
+        (SELECT count(DISTINCT product_id) FROM order_items) AS total_products,
+        (SELECT count(*) FROM customers) AS total_customers,
+        (SELECT count(*) FROM sellers) AS total_sellers,
+        (SELECT avg(review_score) FROM reviews) AS avg_rating,
+        (SELECT count(*) FROM orders WHERE order_status = 'delivered') AS delivered_orders,
+        (
+            SELECT avg(floor(
+                (epoch_us(order_delivered_customer_date) - epoch_us(order_purchase_timestamp))
+                / 86400000000
+            ))
+            FROM orders
+        ) AS avg_delivery_time
+"""
+
+
+# Absence de duckdb signalée une seule fois, pas à chaque agrégat
+_missing_reported = False
+
+
+def is_available():
+    """Indique si le module duckdb est installé"""
+    return duckdb is not None
+
+
+def _quote(path):
+    """Littéral SQL pour un chemin de fichier"""
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _table_sql(filename, files):
+    """
+    SELECT reconstituant une table à partir de ses fichiers Parquet
+
+    Avec des partitions delta, les doublons sont retirés sur les clés de la
+    table en conservant la première occurrence (base, puis partitions dans l'ordre),
+    comme data_loader.read_dataset.
+    """
+    date_columns = DATE_COLUMNS.get(filename, [])
+
+    if len(files) == 1:
+        return f"SELECT * FROM read_parquet({_quote(files[0])})"
+
+    parts = [
+        f"SELECT *, {rank} AS _part FROM read_parquet({_quote(path)}, file_row_number = true)"
+        for rank, path in enumerate(files)
+    ]
+    union = "\nUNION ALL BY NAME\n".join(parts)
+    keys = ", ".join(DELTA_TABLES[filename][1])
+
+    # Les partitions Parquet déposées telles quelles peuvent contenir des dates en texte
+    replace = ""
+    if date_columns:
+        casts = ", ".join(f"CAST({col} AS TIMESTAMP) AS {col}" for col in date_columns)
+        replace = f" REPLACE ({casts})"
+
+    return f"""
+        SELECT * EXCLUDE (_part, file_row_number){replace}
+        FROM ({union})
+        QUALIFY row_number() OVER (PARTITION BY {keys} ORDER BY _part, file_row_number) = 1
+    """
+
+
+def _connect(tables):
+    """Connexion DuckDB en mémoire avec une vue par table demandée"""
+    con = duckdb.connect()
+    for name in tables:
+        filename = TABLES[name]
+        files = dataset_parquet_files(filename)
+        if files is None:
+            con.close()
+            raise RuntimeError(f"cache Parquet indisponible pour {filename}")
+        con.execute(f"CREATE VIEW {name} AS {_table_sql(filename, files)}")
+    return con
+
+
+def _query(sql, tables):
+    """Exécute une requête et retourne un DataFrame pandas"""
+    con = _connect(tables)
+    try:
+        return con.execute(sql).df()
+    finally:
+        con.close()
+
+
+@cached_on('sales_over_time')
+def sales_over_time():
+    """Ventes mensuelles (même forme que data_loader.compute_sales_over_time)"""
+    monthly_sales = _query(SALES_OVER_TIME_SQL, ["orders", "payments"])
+    monthly_sales['month'] = monthly_sales['month'].astype('datetime64[ns]')
+    monthly_sales['order_id'] = monthly_sales['order_id'].astype('int64')
+    monthly_sales['payment_value'] = monthly_sales['payment_value'].astype('float64')
+    return monthly_sales
+
+
+@cached_on('category_performance')
+def category_performance():
+    """Performance par catégorie (même forme que data_loader.compute_category_performance)"""
+    category_stats = _query(CATEGORY_PERFORMANCE_SQL, ["order_items", "products", "translation"])
+    category_stats['orders'] = category_stats['orders'].astype('int64')
+    category_stats['revenue'] = category_stats['revenue'].astype('float64')
+    return category_stats
+
+
+@cached_on('geographic_distribution')
+def geographic_distribution():
+    """Commandes par état (même forme que data_loader.compute_geographic_distribution)"""
+    state_stats = _query(GEOGRAPHIC_DISTRIBUTION_SQL, ["orders", "customers"])
+    state_stats['orders'] = state_stats['orders'].astype('int64')
+    return state_stats
+
+
+@cached_on('dashboard_kpis')
+def dashboard_kpis():
+    """KPIs globaux (mêmes clés que data_loader.compute_dashboard_kpis)"""
+    row = _query(
+        DASHBOARD_KPIS_SQL,
+        ["orders", "payments", "order_items", "customers", "sellers", "reviews"]
+    ).iloc[0]
+
+    kpis = {}
+    for key, value in row.items():
+        if pd.isna(value):
+            kpis[key] = float('nan')
+        elif key in ('total_revenue', 'avg_rating', 'avg_delivery_time'):
+            kpis[key] = float(value)
+        else:
+            kpis[key] = int(value)
+    return kpis
+
+
+AGGREGATES = {
+    'sales_over_time': sales_over_time,
+    'category_performance': category_performance,
+    'geographic_distribution': geographic_distribution,
+    'dashboard_kpis': dashboard_kpis,
+}
+
+
+def run_aggregate(name):
+    """
+    Calcule un agrégat avec DuckDB
+
+    Returns:
+        Le résultat, ou None si DuckDB est indisponible ou a échoué
+        (l'appelant se replie alors sur le calcul pandas)
+    """
+    global _missing_reported
+    if not is_available():
+        if not _missing_reported:
+            _missing_reported = True
+            print("⚠️ data_backend = duckdb mais le paquet duckdb n'est pas installé (pip install duckdb): calcul pandas utilisé")
+        return None
+
+    try:
+        return AGGREGATES[name]()
+    except Exception as e:
+        print(f"⚠️ Échec du calcul DuckDB '{name}', calcul pandas utilisé: {e}")
+        return None
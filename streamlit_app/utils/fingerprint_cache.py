@@ -0,0 +1,93 @@
+"""
+Mise en cache Streamlit invalidée par empreinte des sources
+
+Remplace les TTL fixes: l'empreinte des fichiers sources (taille, date de
+modification, et optionnellement hash du contenu) est recalculée à chaque
+appel. Tant qu'elle ne change pas, le résultat en cache est servi sans
+limite de durée; dès qu'elle change, les entrées de la fonction sont
+purgées et le résultat est recalculé à la requête suivante.
+"""
+
+import functools
+import hashlib
+import threading
+
+import streamlit as st
+
+from config.settings import get_app_settings
+from utils.columnar_cache import source_fingerprint
+
+_content_hashes = {}
+_content_hashes_lock = threading.Lock()
+
+
+def is_content_hash_enabled():
+    """Indique si l'empreinte inclut un hash du contenu des fichiers"""
+    return bool(get_app_settings().get('fingerprint_content_hash', False))
+
+
+def file_fingerprint(path):
+    """
+    Empreinte d'un fichier source
+
+    Par défaut: chemin, taille et date de modification. Avec
+    fingerprint_content_hash, hash SHA-1 du contenu (calculé une fois par
+    version du fichier), pour qu'un fichier recopié à l'identique ne
+    déclenche aucun recalcul.
+    """
+    stat_fingerprint = source_fingerprint(path)
+    if not is_content_hash_enabled():
+        return stat_fingerprint
+
+    with _content_hashes_lock:
+        cached = _content_hashes.get(stat_fingerprint)
+    if cached is not None:
+        return cached
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    content_fingerprint = digest.hexdigest()[:16]
+
+    with _content_hashes_lock:
+        _content_hashes[stat_fingerprint] = content_fingerprint
+    return content_fingerprint
+
+
+def fingerprint_cache(fingerprint_func, resource=False):
+    """
+    Décorateur de cache Streamlit invalidé par empreinte
+
+    Args:
+        fingerprint_func: Fonction sans argument retournant l'empreinte courante des sources
+        resource: st.cache_resource (objet partagé) au lieu de st.cache_data (copie)
+    """
+    def decorator(func):
+        def _cached(fingerprint, *args, **kwargs):
+            return func(*args, **kwargs)
+
+        # Streamlit identifie une fonction en cache par son nom qualifié et son
+        # code: sans cela, toutes les fonctions décorées partageraient leurs entrées
+        _cached.__module__ = func.__module__
+        _cached.__name__ = func.__name__
+        _cached.__qualname__ = func.__qualname__
+
+        cache = st.cache_resource if resource else st.cache_data
+        cached = cache(_cached)
+        state = {'fingerprint': None}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            fingerprint = fingerprint_func()
+            if state['fingerprint'] != fingerprint:
+                # Sources modifiées: les entrées existantes sont toutes obsolètes
+                if state['fingerprint'] is not None:
+                    cached.clear()
+                state['fingerprint'] = fingerprint
+            return cached(fingerprint, *args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,263 @@
+"""
+Centroïdes géographiques par préfixe de code postal
+
+Le dataset de géolocalisation Olist (~1M lignes, de nombreux doublons par
+préfixe) est lu par blocs, à mémoire bornée, et réduit à une table compacte:
+latitude/longitude moyennes et état majoritaire de chaque préfixe. Cette
+table est persistée en tableaux numpy indexés directement par le préfixe
+(0-99999), à côté du cache columnaire: une recherche de coordonnées est un
+simple accès par indice, vectorisable sur tout un lot de commandes.
+
+Ordre de repli: centroïde du préfixe -> centroïde de l'état -> coordonnées
+par état codées en dur -> coordonnées par défaut (São Paulo).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.columnar_cache import get_cache_dir, source_fingerprint
+from utils.data_loader import DATA_PATH
+from utils.fingerprint_cache import fingerprint_cache
+
+GEOLOCATION_FILE = "olist_geolocation_dataset.csv"
+CHUNK_SIZE = 200_000
+
+# Les préfixes Olist sont les 5 premiers chiffres du CEP
+ZIP_PREFIX_COUNT = 100_000
+
+BRAZIL_STATES = (
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+    'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO'
+)
+STATE_INDEX = {state: code for code, state in enumerate(BRAZIL_STATES)}
+
+# Coordonnées moyennes utilisées sans dataset de géolocalisation
+STATE_COORDS = {
+    'SP': (-23.55, -46.63),
+    'RJ': (-22.91, -43.17),
+    'MG': (-19.92, -43.94),
+    'PR': (-25.42, -49.27),
+    'RS': (-30.03, -51.23),
+    'BA': (-12.97, -38.51),
+    'SC': (-27.59, -48.55)
+}
+DEFAULT_COORDS = STATE_COORDS['SP']
+
+# Le dataset contient quelques points aberrants hors du Brésil
+LAT_BOUNDS = (-34.0, 5.5)
+LNG_BOUNDS = (-74.0, -34.0)
+
+USECOLS = [
+    'geolocation_zip_code_prefix',
+    'geolocation_lat',
+    'geolocation_lng',
+    'geolocation_state'
+]
+
+
+def get_geolocation_path():
+    """Chemin du dataset de géolocalisation"""
+    return DATA_PATH / GEOLOCATION_FILE
+
+
+def get_centroids_file(path):
+    """Chemin du fichier .npz correspondant à l'état actuel du CSV"""
+    return get_cache_dir(path) / f"{path.stem}-centroids-{source_fingerprint(path)}.npz"
+
+
+def build_zip_centroids(path, chunksize=CHUNK_SIZE):
+    """
+    Réduit le CSV de géolocalisation à une table de centroïdes par préfixe
+
+    Le fichier est lu par blocs de `chunksize` lignes; seuls des accumulateurs
+    de taille fixe (sommes, compteurs, votes par état) sont gardés en mémoire.
+
+    Returns:
+        Dict de tableaux numpy: lat, lng, state (indexés par préfixe, NaN / -1
+        si absent), state_lat, state_lng (indexés par code d'état)
+    """
+    n_states = len(BRAZIL_STATES)
+    lat_sum = np.zeros(ZIP_PREFIX_COUNT)
+    lng_sum = np.zeros(ZIP_PREFIX_COUNT)
+    counts = np.zeros(ZIP_PREFIX_COUNT, dtype=np.int64)
+    state_votes = np.zeros(ZIP_PREFIX_COUNT * n_states, dtype=np.int64)
+
+    reader = pd.read_csv(
+        path,
+        usecols=USECOLS,
+        dtype={'geolocation_state': 'category'},
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        prefix = pd.to_numeric(chunk['geolocation_zip_code_prefix'], errors='coerce').to_numpy(float)
+        lat = chunk['geolocation_lat'].to_numpy(float)
+        lng = chunk['geolocation_lng'].to_numpy(float)
+        state = chunk['geolocation_state'].map(STATE_INDEX).to_numpy(float)
+
+        valid = (
+            (prefix >= 0) & (prefix < ZIP_PREFIX_COUNT)
+            & (lat >= LAT_BOUNDS[0]) & (lat <= LAT_BOUNDS[1])
+            & (lng >= LNG_BOUNDS[0]) & (lng <= LNG_BOUNDS[1])
+        )
+        prefix = prefix[valid].astype(np.int64)
+        lat_sum += np.bincount(prefix, weights=lat[valid], minlength=ZIP_PREFIX_COUNT)
+        lng_sum += np.bincount(prefix, weights=lng[valid], minlength=ZIP_PREFIX_COUNT)
+        counts += np.bincount(prefix, minlength=ZIP_PREFIX_COUNT)
+
+        state = state[valid]
+        known = ~np.isnan(state)
+        state_votes += np.bincount(
+            prefix[known] * n_states + state[known].astype(np.int64),
+            minlength=ZIP_PREFIX_COUNT * n_states
+        )
+
+    state_votes = state_votes.reshape(ZIP_PREFIX_COUNT, n_states)
+    found = counts > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lat = np.where(found, lat_sum / counts, np.nan)
+        lng = np.where(found, lng_sum / counts, np.nan)
+    state = np.where(state_votes.any(axis=1), state_votes.argmax(axis=1), -1).astype(np.int8)
+
+    # Centroïde d'un état: moyenne de tous ses points, pondérée comme le CSV
+    state_weights = state_votes.sum(axis=0)
+    has_state = state >= 0
+    state_lat_sum = np.bincount(state[has_state], weights=lat_sum[has_state], minlength=n_states)
+    state_lng_sum = np.bincount(state[has_state], weights=lng_sum[has_state], minlength=n_states)
+    state_count = np.bincount(state[has_state], weights=counts[has_state], minlength=n_states)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        state_lat = np.where(state_count > 0, state_lat_sum / state_count, np.nan)
+        state_lng = np.where(state_count > 0, state_lng_sum / state_count, np.nan)
+
+    print(f"✅ Géolocalisation: {int(found.sum())} préfixes, {int(state_weights.sum())} points")
+    return {
+        'lat': lat.astype(np.float32),
+        'lng': lng.astype(np.float32),
+        'state': state,
+        'state_lat': state_lat,
+        'state_lng': state_lng
+    }
+
+
+def load_zip_centroids_arrays(path):
+    """
+    Tableaux de centroïdes, lus depuis le fichier .npz ou reconstruits
+
+    Returns:
+        Dict de tableaux numpy (voir build_zip_centroids)
+    """
+    centroids_file = get_centroids_file(path)
+    if centroids_file.exists():
+        try:
+            with np.load(centroids_file) as data:
+                return {key: data[key] for key in data.files}
+        except Exception as e:
+            print(f"⚠️ Centroïdes illisibles, relecture du CSV: {centroids_file} ({e})")
+
+    arrays = build_zip_centroids(path)
+    _write_centroids(arrays, centroids_file, path.stem)
+    return arrays
+
+
+def _write_centroids(arrays, centroids_file, stem):
+    """Écrit le fichier .npz de manière atomique et purge les versions obsolètes"""
+    try:
+        centroids_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = centroids_file.with_name(f"{centroids_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_file, centroids_file)
+    except Exception as e:
+        print(f"⚠️ Impossible d'écrire les centroïdes {centroids_file}: {e}")
+        return
+
+    for stale in centroids_file.parent.glob(f"{stem}-centroids-*.npz"):
+        if stale != centroids_file:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+class ZipCentroids:
+    """Recherche de coordonnées par préfixe de code postal et par état"""
+
+    def __init__(self, arrays=None):
+        n_states = len(BRAZIL_STATES)
+        if arrays is None:
+            arrays = {
+                'lat': np.full(ZIP_PREFIX_COUNT, np.nan, dtype=np.float32),
+                'lng': np.full(ZIP_PREFIX_COUNT, np.nan, dtype=np.float32),
+                'state': np.full(ZIP_PREFIX_COUNT, -1, dtype=np.int8),
+                'state_lat': np.full(n_states, np.nan),
+                'state_lng': np.full(n_states, np.nan)
+            }
+
+        self.lat = arrays['lat']
+        self.lng = arrays['lng']
+        self.state = arrays['state']
+
+        # Centroïdes par état complétés par les coordonnées codées en dur, puis
+        # une dernière entrée (code -1 -> indice n_states) pour les états inconnus
+        fallback = [STATE_COORDS.get(state, DEFAULT_COORDS) for state in BRAZIL_STATES]
+        state_lat = np.where(np.isnan(arrays['state_lat']), [c[0] for c in fallback], arrays['state_lat'])
+        state_lng = np.where(np.isnan(arrays['state_lng']), [c[1] for c in fallback], arrays['state_lng'])
+        self.state_lat = np.append(state_lat, DEFAULT_COORDS[0])
+        self.state_lng = np.append(state_lng, DEFAULT_COORDS[1])
+
+    def is_loaded(self):
+        """Indique si des centroïdes par préfixe sont disponibles"""
+        return bool(np.isfinite(self.lat).any())
+
+    def lookup(self, zip_prefixes, states):
+        """
+        Coordonnées d'un lot de commandes
+
+        Args:
+            zip_prefixes: Préfixes de code postal (séquence, Series ou tableau; NaN accepté)
+            states: États correspondants (utilisés si le préfixe est inconnu)
+
+        Returns:
+            Tuple (lat, lng) de tableaux numpy float64
+        """
+        prefix = pd.to_numeric(pd.Series(zip_prefixes), errors='coerce').to_numpy(float)
+        in_range = (prefix >= 0) & (prefix < ZIP_PREFIX_COUNT)
+        idx = np.where(in_range, prefix, 0).astype(np.int64)
+
+        lat = np.where(in_range, self.lat[idx], np.nan).astype(float)
+        lng = np.where(in_range, self.lng[idx], np.nan).astype(float)
+
+        missing = np.isnan(lat) | np.isnan(lng)
+        if missing.any():
+            codes = pd.Series(states).map(STATE_INDEX).fillna(len(BRAZIL_STATES)).to_numpy(np.int64)
+            lat = np.where(missing, self.state_lat[codes], lat)
+            lng = np.where(missing, self.state_lng[codes], lng)
+        return lat, lng
+
+    def coordinates(self, zip_prefix, state):
+        """Coordonnées (lat, lng) d'une seule commande"""
+        lat, lng = self.lookup([zip_prefix], [state])
+        return float(lat[0]), float(lng[0])
+
+
+def _geolocation_fingerprint():
+    """Empreinte du dataset de géolocalisation (None s'il est absent)"""
+    path = get_geolocation_path()
+    return source_fingerprint(path) if path.exists() else None
+
+
+@fingerprint_cache(_geolocation_fingerprint, resource=True)
+def get_zip_centroids():
+    """Retourne la table de centroïdes (cached); repli par état sans dataset"""
+    path = get_geolocation_path()
+    if not path.exists():
+        print(f"⚠️ {GEOLOCATION_FILE} introuvable, coordonnées moyennes par état utilisées")
+        return ZipCentroids()
+
+    try:
+        return ZipCentroids(load_zip_centroids_arrays(path))
+    except Exception as e:
+        print(f"❌ Erreur lors du chargement de la géolocalisation: {e}")
+        return ZipCentroids()
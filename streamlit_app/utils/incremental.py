@@ -0,0 +1,368 @@
+"""
+Ingestion incrémentale des partitions delta (commandes, items, avis, paiements)
+
+Au lieu de tout recalculer à l'expiration du TTL, les agrégats dérivés sont
+maintenus sous forme de sommes et de compteurs additifs. Chaque partition
+déposée dans Data/deltas/<table>/ n'est fusionnée qu'une seule fois, en ne
+traitant que ses propres lignes.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.columnar_cache import source_fingerprint
+from utils.data_loader import (
+    DELTA_TABLES,
+    build_products_with_stats,
+    dataset_fingerprint,
+    get_projection,
+    list_delta_partitions,
+    load_customers,
+    load_products,
+    load_sellers,
+    read_base_dataset,
+    read_delta_partition
+)
+from utils.fingerprint_cache import fingerprint_cache
+
+# Ordre d'application: les commandes d'abord pour limiter les lignes en attente
+INGEST_ORDER = [
+    "olist_orders_dataset.csv",
+    "olist_order_payments_dataset.csv",
+    "olist_order_items_dataset.csv",
+    "olist_order_reviews_dataset.csv",
+]
+
+
+def _projection(filename):
+    """Colonnes lues pour l'ingestion d'une table delta"""
+    return get_projection('incremental_ingestion', DELTA_TABLES[filename][0])
+
+
+def _add(current, delta):
+    """Additionne deux agrégats indexés (les clés absentes valent 0)"""
+    if current is None:
+        return delta
+    return current.add(delta, fill_value=0)
+
+
+class IncrementalAggregates:
+    """Agrégats du dashboard et du catalogue, mis à jour par deltas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outputs = {}
+        self.applied_partitions = set()
+
+        products = load_products().drop_duplicates('product_id')
+        self.product_categories = products.set_index('product_id')['product_category_name_english']
+
+        # Clés déjà ingérées, par table
+        self.seen_keys = {}
+
+        # État minimal conservé pour rattacher les lignes futures
+        self.order_dates = None          # order_id -> date d'achat, mois
+        self.items = None                # order_id, product_id (items connus)
+        self.order_review_sum = pd.Series(dtype='float64')   # order_id -> somme des notes de ses avis
+        self.order_review_n = pd.Series(dtype='float64')     # order_id -> nombre de notes
+        self.payments_per_order = pd.Series(dtype='float64')
+        self.payment_sum_per_order = pd.Series(dtype='float64')
+
+        # Agrégats additifs
+        self.product_stats = None
+        self.last_order_date = None
+        self.monthly = None
+        self.categories = None
+        self.product_ids = set()
+        self.max_purchase_date = pd.NaT
+        self.kpis = {
+            'total_orders': 0,
+            'total_revenue': 0.0,
+            'delivered_orders': 0,
+            'delivery_days_sum': 0.0,
+            'delivery_days_count': 0,
+            'review_sum': 0.0,
+            'review_count': 0,
+        }
+
+        for filename in INGEST_ORDER:
+            self.ingest(filename, read_base_dataset(filename, columns=_projection(filename)))
+        self.refresh()
+
+    # ========================================
+    # INGESTION
+    # ========================================
+
+    def refresh(self):
+        """Fusionne les partitions delta pas encore appliquées"""
+        with self._lock:
+            for filename in INGEST_ORDER:
+                for path in list_delta_partitions(filename):
+                    partition_key = (filename, source_fingerprint(path))
+                    if partition_key in self.applied_partitions:
+                        continue
+                    print(f"🔄 Ingestion incrémentale: {path.name}")
+                    self._ingest(filename, read_delta_partition(filename, path, columns=_projection(filename)))
+                    self.applied_partitions.add(partition_key)
+
+    def ingest(self, filename, rows):
+        """Fusionne un lot de nouvelles lignes d'une table delta"""
+        with self._lock:
+            self._ingest(filename, rows)
+
+    def _ingest(self, filename, rows):
+        rows = self._new_rows(filename, rows)
+        if rows.empty:
+            return
+
+        if filename == "olist_orders_dataset.csv":
+            self._ingest_orders(rows)
+        elif filename == "olist_order_payments_dataset.csv":
+            self._ingest_payments(rows)
+        elif filename == "olist_order_items_dataset.csv":
+            self._ingest_items(rows)
+        elif filename == "olist_order_reviews_dataset.csv":
+            self._ingest_reviews(rows)
+
+        self._outputs.clear()
+
+    def _new_rows(self, filename, rows):
+        """Ne garde que les lignes dont la clé n'a jamais été ingérée"""
+        keys = DELTA_TABLES[filename][1]
+        rows = rows.drop_duplicates(subset=keys, keep='first')
+        index = pd.MultiIndex.from_frame(rows[keys])
+
+        seen = self.seen_keys.get(filename)
+        if seen is not None:
+            is_new = ~index.isin(seen)
+            rows = rows[is_new]
+            index = index[is_new]
+            self.seen_keys[filename] = seen.append(index)
+        else:
+            self.seen_keys[filename] = index
+
+        return rows
+
+    def _ingest_orders(self, orders):
+        purchase = orders['order_purchase_timestamp']
+        new_orders = pd.DataFrame(
+            {
+                'order_purchase_timestamp': purchase.values,
+                'month': purchase.dt.to_period('M').values,
+            },
+            index=pd.Index(orders['order_id'].values, name='order_id')
+        )
+        self.order_dates = new_orders if self.order_dates is None else pd.concat([self.order_dates, new_orders])
+
+        # Ventes mensuelles: une ligne par paiement, au moins une par commande
+        n_payments = self.payments_per_order.reindex(new_orders.index, fill_value=0).values
+        amounts = self.payment_sum_per_order.reindex(new_orders.index, fill_value=0).values
+        self._add_monthly(new_orders['month'], np.maximum(n_payments, 1), amounts)
+
+        delivery_days = (orders['order_delivered_customer_date'] - purchase).dt.days
+        self.kpis['total_orders'] += len(orders)
+        self.kpis['delivered_orders'] += int((orders['order_status'] == 'delivered').sum())
+        self.kpis['delivery_days_sum'] += delivery_days.sum()
+        self.kpis['delivery_days_count'] += int(delivery_days.count())
+
+        batch_max = purchase.max()
+        if pd.notna(batch_max) and (pd.isna(self.max_purchase_date) or batch_max > self.max_purchase_date):
+            self.max_purchase_date = batch_max
+
+        # Items arrivés avant leur commande: mettre à jour la dernière vente
+        if self.items is not None:
+            matched = self.items[self.items['order_id'].isin(new_orders.index)]
+            if not matched.empty:
+                dates = matched['order_id'].map(new_orders['order_purchase_timestamp'])
+                self._update_last_order(matched['product_id'], dates)
+
+    def _ingest_payments(self, payments):
+        self.kpis['total_revenue'] += payments['payment_value'].sum()
+
+        per_order = payments.groupby('order_id').agg(
+            n=('payment_value', 'size'),
+            amount=('payment_value', 'sum')
+        )
+        previous_n = self.payments_per_order.reindex(per_order.index, fill_value=0)
+        self.payments_per_order = self.payments_per_order.add(per_order['n'], fill_value=0)
+        self.payment_sum_per_order = self.payment_sum_per_order.add(per_order['amount'], fill_value=0)
+
+        # Commandes déjà connues: ajuster leur contribution mensuelle
+        if self.order_dates is not None:
+            known = per_order.index.intersection(self.order_dates.index)
+            if len(known):
+                before = np.maximum(previous_n[known].values, 1)
+                after = np.maximum(previous_n[known].values + per_order.loc[known, 'n'].values, 1)
+                self._add_monthly(
+                    self.order_dates.loc[known, 'month'],
+                    after - before,
+                    per_order.loc[known, 'amount'].values
+                )
+
+    def _ingest_items(self, items):
+        items = items[['order_id', 'product_id', 'price', 'freight_value']].dropna(subset=['product_id'])
+        self.items = items if self.items is None else pd.concat([self.items, items], ignore_index=True)
+        self.product_ids.update(items['product_id'].unique().tolist())
+
+        if self.order_dates is not None:
+            dates = items['order_id'].map(self.order_dates['order_purchase_timestamp'])
+        else:
+            dates = pd.Series(pd.NaT, index=items.index)
+
+        # Chaque item reçoit tous les avis de sa commande (même grain que get_order_item_reviews)
+        review_sum = items['order_id'].map(self.order_review_sum).fillna(0)
+        review_n = items['order_id'].map(self.order_review_n).fillna(0)
+
+        has_order = items['order_id'].notna().astype(int)
+        delta = pd.DataFrame({
+            'total_sales': has_order,
+            'price_sum': items['price'].fillna(0),
+            'price_n': items['price'].notna().astype(int),
+            'freight_sum': items['freight_value'].fillna(0),
+            'freight_n': items['freight_value'].notna().astype(int),
+            'review_sum': review_sum,
+            'review_n': review_n,
+        }).groupby(items['product_id'].values).sum()
+        self.product_stats = _add(self.product_stats, delta)
+        self._update_last_order(items['product_id'], dates)
+
+        categories = items['product_id'].map(self.product_categories)
+        category_delta = pd.DataFrame({
+            'orders': has_order,
+            'revenue': items['price'].fillna(0),
+        }).groupby(categories.values).sum()
+        self.categories = _add(self.categories, category_delta)
+
+    def _ingest_reviews(self, reviews):
+        self.kpis['review_sum'] += reviews['review_score'].sum()
+        self.kpis['review_count'] += int(reviews['review_score'].count())
+
+        scores = reviews[['order_id', 'review_score']].dropna(subset=['order_id'])
+        per_order = scores.groupby('order_id', observed=True)['review_score'].agg(['sum', 'count'])
+        self.order_review_sum = self.order_review_sum.add(per_order['sum'], fill_value=0)
+        self.order_review_n = self.order_review_n.add(per_order['count'], fill_value=0)
+
+        # Items déjà connus: leurs commandes reçoivent de nouveaux avis
+        if self.items is None:
+            return
+
+        matched = self.items[self.items['order_id'].isin(per_order.index)]
+        if matched.empty:
+            return
+
+        delta = pd.DataFrame({
+            'review_sum': matched['order_id'].map(per_order['sum']).to_numpy(),
+            'review_n': matched['order_id'].map(per_order['count']).to_numpy(),
+        }).groupby(matched['product_id'].values).sum()
+        self.product_stats = _add(self.product_stats, delta)
+
+    def _add_monthly(self, months, n_rows, amounts):
+        delta = pd.DataFrame(
+            {'order_id': n_rows, 'payment_value': amounts},
+            index=pd.PeriodIndex(months, freq='M')
+        )
+        delta = delta[delta.index.notna()].groupby(level=0).sum()
+        self.monthly = _add(self.monthly, delta)
+
+    def _update_last_order(self, product_ids, dates):
+        last = dates.groupby(product_ids.values).max().dropna()
+        if last.empty:
+            return
+        if self.last_order_date is None:
+            self.last_order_date = last
+        else:
+            self.last_order_date = pd.concat([self.last_order_date, last]).groupby(level=0).max()
+
+    # ========================================
+    # AGRÉGATS (mêmes formats que data_loader)
+    # ========================================
+
+    def _cached_output(self, name, build):
+        self.refresh()
+        with self._lock:
+            if name not in self._outputs:
+                self._outputs[name] = build()
+            return self._outputs[name].copy()
+
+    def products_with_stats(self):
+        """Équivalent incrémental de get_products_with_stats"""
+        return self._cached_output('products_with_stats', self._build_products_with_stats)
+
+    def sales_over_time(self):
+        """Équivalent incrémental de get_sales_over_time"""
+        return self._cached_output('sales_over_time', self._build_sales_over_time)
+
+    def category_performance(self):
+        """Équivalent incrémental de get_category_performance"""
+        return self._cached_output('category_performance', self._build_category_performance)
+
+    def dashboard_kpis(self):
+        """Équivalent incrémental de get_dashboard_kpis"""
+        return self._cached_output('dashboard_kpis', self._build_dashboard_kpis)
+
+    def _build_products_with_stats(self):
+        stats = self.product_stats
+        product_stats = pd.DataFrame({
+            'product_id': stats.index,
+            'total_sales': stats['total_sales'].astype(int).values,
+            'price': (stats['price_sum'] / stats['price_n'].replace(0, np.nan)).values,
+            'freight_value': (stats['freight_sum'] / stats['freight_n'].replace(0, np.nan)).values,
+            'avg_rating': (stats['review_sum'] / stats['review_n'].replace(0, np.nan)).values,
+            'review_count': stats['review_n'].astype(int).values,
+            'last_order_date': self.last_order_date.reindex(stats.index).values,
+        })
+        return build_products_with_stats(load_products(), product_stats, self.max_purchase_date)
+
+    def _build_sales_over_time(self):
+        monthly = self.monthly.sort_index()
+        return pd.DataFrame({
+            'month': monthly.index.to_timestamp(),
+            'order_id': monthly['order_id'].astype(int).values,
+            'payment_value': monthly['payment_value'].values,
+        })
+
+    def _build_category_performance(self):
+        category_stats = self.categories.reset_index()
+        category_stats.columns = ['category', 'orders', 'revenue']
+        category_stats['orders'] = category_stats['orders'].astype(int)
+        return category_stats.sort_values(
+            ['revenue', 'category'], ascending=[False, True], kind='stable'
+        ).reset_index(drop=True)
+
+    def _build_dashboard_kpis(self):
+        k = self.kpis
+        return {
+            'total_orders': k['total_orders'],
+            'total_revenue': k['total_revenue'],
+            'total_products': len(self.product_ids),
+            'total_customers': len(load_customers(columns=get_projection('dashboard_kpis', 'customers'))),
+            'total_sellers': len(load_sellers(columns=get_projection('dashboard_kpis', 'sellers'))),
+            'avg_rating': k['review_sum'] / k['review_count'] if k['review_count'] else np.nan,
+            'delivered_orders': k['delivered_orders'],
+            'avg_delivery_time': (
+                k['delivery_days_sum'] / k['delivery_days_count'] if k['delivery_days_count'] else np.nan
+            ),
+        }
+
+
+# ========================================
+# FONCTION POUR STREAMLIT
+# ========================================
+
+def _base_fingerprint():
+    """Empreinte des fichiers de base (les partitions delta sont appliquées par refresh)"""
+    return dataset_fingerprint(
+        *INGEST_ORDER,
+        "olist_products_dataset.csv",
+        "product_category_name_translation.csv",
+        include_deltas=False
+    )
+
+
+@fingerprint_cache(_base_fingerprint, resource=True)
+def get_incremental_aggregates():
+    """Retourne l'instance unique des agrégats incrémentaux (reconstruite si un fichier de base change)"""
+    return IncrementalAggregates()
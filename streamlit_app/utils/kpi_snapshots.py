@@ -0,0 +1,197 @@
+"""
+Rafraîchissement et lecture des snapshots de KPIs
+
+Les KPIs globaux et leur série mensuelle sont matérialisés dans
+database/kpi_snapshots.db. Un snapshot est associé à l'empreinte des données
+sources: tant qu'elle ne change pas, les pages le lisent directement (quelques
+millisecondes); sinon le prochain rafraîchissement en écrit un nouveau.
+
+Rafraîchissement:
+    - au fil de l'eau, par un thread lancé au démarrage du serveur
+      (app_settings.kpi_refresh_interval_seconds, 0 pour le désactiver)
+    - depuis une tâche planifiée (cron), dans le dossier streamlit_app:
+          python -m utils.kpi_snapshots [--force] [--history N]
+"""
+
+import argparse
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from config.settings import get_app_settings
+from database import kpi_store
+from utils.data_loader import (
+    get_dashboard_kpis,
+    get_projection,
+    get_sales_over_time,
+    load_reviews,
+    node_fingerprint
+)
+
+_refresh_lock = threading.Lock()
+
+
+def current_fingerprint():
+    """Empreinte des sources des KPIs (toutes les tables du tableau de bord)"""
+    return node_fingerprint('dashboard_kpis')
+
+
+def compute_snapshot():
+    """
+    Calcule les KPIs et leur série mensuelle
+
+    Returns:
+        Tuple (kpis, monthly) au format attendu par kpi_store.save_snapshot
+    """
+    kpis = get_dashboard_kpis()
+
+    sales = get_sales_over_time()
+    monthly = pd.DataFrame({
+        'orders': sales['order_id'].to_numpy(),
+        'revenue': sales['payment_value'].to_numpy()
+    }, index=pd.DatetimeIndex(sales['month']).strftime('%Y-%m'))
+
+    # Note moyenne par mois de création de l'avis
+    reviews = load_reviews(columns=get_projection('review_trend', 'reviews'))
+    rating = reviews.groupby(reviews['review_creation_date'].dt.strftime('%Y-%m'))['review_score'].mean()
+    monthly = monthly.join(rating.rename('avg_rating'), how='outer').sort_index()
+
+    records = [
+        {'month': month, **{col: row[col] for col in kpi_store.MONTHLY_COLUMNS}}
+        for month, row in monthly.iterrows()
+    ]
+    return kpis, records
+
+
+def refresh_snapshot(force=False):
+    """
+    Écrit un snapshot si les données ont changé depuis le dernier
+
+    Args:
+        force: Écrit un snapshot même si l'empreinte est inchangée
+
+    Returns:
+        Identifiant du snapshot courant
+    """
+    with _refresh_lock:
+        fingerprint = current_fingerprint()
+        if not force:
+            latest = kpi_store.get_latest_snapshot(fingerprint)
+            if latest is not None:
+                return latest['id']
+
+        kpis, monthly = compute_snapshot()
+        snapshot_id = kpi_store.save_snapshot(fingerprint, kpis, monthly)
+        print(f"✅ Snapshot KPI #{snapshot_id} enregistré")
+        return snapshot_id
+
+
+def get_kpi_snapshot():
+    """
+    KPIs des données courantes, lus depuis le store
+
+    Le snapshot est calculé et enregistré s'il n'existe pas encore pour
+    l'empreinte courante.
+
+    Returns:
+        dict avec 'kpis' (mêmes clés que get_dashboard_kpis), 'monthly'
+        (DataFrame indexé par mois 'AAAA-MM'), 'id' et 'created_at'
+    """
+    fingerprint = current_fingerprint()
+    snapshot = kpi_store.get_latest_snapshot(fingerprint)
+    if snapshot is None:
+        refresh_snapshot()
+        snapshot = kpi_store.get_latest_snapshot(fingerprint)
+
+    monthly = pd.DataFrame(
+        kpi_store.get_monthly_kpis(snapshot['id']),
+        columns=('month',) + kpi_store.MONTHLY_COLUMNS
+    ).set_index('month')
+
+    return {
+        'id': snapshot['id'],
+        'created_at': snapshot['created_at'],
+        'kpis': {
+            col: float('nan') if snapshot[col] is None else snapshot[col]
+            for col in kpi_store.KPI_COLUMNS
+        },
+        'monthly': monthly
+    }
+
+
+def month_over_month(monthly, column, relative=True):
+    """
+    Variation du dernier mois par rapport au précédent
+
+    Args:
+        monthly: Série mensuelle d'un snapshot
+        column: 'orders', 'revenue' ou 'avg_rating'
+        relative: Variation en % (sinon différence absolue)
+
+    Returns:
+        Variation, ou None si moins de deux mois renseignés (ou base nulle)
+    """
+    values = monthly[column].dropna()
+    if len(values) < 2:
+        return None
+    current, previous = values.iloc[-1], values.iloc[-2]
+    if not relative:
+        return current - previous
+    if previous == 0:
+        return None
+    return (current - previous) / previous * 100
+
+
+def _refresh_loop(interval):
+    """Boucle du thread de rafraîchissement"""
+    while True:
+        try:
+            refresh_snapshot()
+        except Exception as e:
+            print(f"❌ Erreur lors du rafraîchissement des KPIs: {e}")
+        time.sleep(interval)
+
+
+@st.cache_resource
+def start_scheduled_refresh():
+    """
+    Lance le rafraîchissement périodique des snapshots (une fois par processus)
+
+    Returns:
+        Thread de rafraîchissement, ou None s'il est désactivé
+    """
+    interval = get_app_settings().get('kpi_refresh_interval_seconds', 900)
+    if not interval:
+        return None
+
+    thread = threading.Thread(target=_refresh_loop, args=(interval,), name="kpi-refresh", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rafraîchit le snapshot des KPIs")
+    parser.add_argument('--force', action='store_true', help="écrit un snapshot même sans changement des données")
+    parser.add_argument('--history', type=int, default=0, help="affiche les N derniers snapshots")
+    args = parser.parse_args(argv)
+
+    # Hors serveur, Streamlit signale l'absence de runtime à chaque appel mis en cache
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+
+    start = time.perf_counter()
+    snapshot_id = refresh_snapshot(force=args.force)
+    print(f"⏱️ Snapshot #{snapshot_id} à jour en {time.perf_counter() - start:.2f} s")
+
+    for snapshot in kpi_store.get_snapshot_history(args.history) if args.history else []:
+        print(
+            f"#{snapshot['id']}  {snapshot['created_at']}  "
+            f"commandes={snapshot['total_orders']}  CA={snapshot['total_revenue']:.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,333 @@
+"""
+Stockage partitionné par mois d'achat (commandes, paiements, items)
+
+Les commandes, leurs paiements et la table de faits des items sont écrits en
+un fichier Parquet par mois d'achat dans Data/.columnar_cache/months/<table>/.
+Chaque fichier est nommé d'après un hash de son contenu: quand les sources
+changent, seuls les mois réellement modifiés sont réécrits, et les agrégats
+mensuels (mis en cache par mois et par hash) ne sont recalculés que pour eux.
+
+Les loaders par plage de dates ne lisent que les partitions concernées: une
+requête sur les derniers mois coûte un temps proportionnel à la fenêtre, et
+non à tout l'historique. Les commandes sans date d'achat ne sont dans aucune
+partition.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.columnar_cache import get_cache_dir
+from utils.data_loader import (
+    DATA_PATH,
+    encode_frame,
+    get_order_items_fact,
+    load_orders,
+    load_payments,
+    node_fingerprint
+)
+
+DATE_COLUMN = 'order_purchase_timestamp'
+
+
+def _build_orders():
+    orders = load_orders()
+    return orders, orders[DATE_COLUMN]
+
+
+def _build_payments():
+    # Co-partitionnés avec les commandes: un paiement suit le mois de sa commande
+    orders = load_orders(columns=('order_id', DATE_COLUMN))
+    payments = load_payments()
+    dates = payments['order_id'].map(orders.set_index('order_id')[DATE_COLUMN])
+    return payments, dates
+
+
+def _build_order_items():
+    fact = get_order_items_fact()
+    return fact, fact[DATE_COLUMN]
+
+
+# Table partitionnée -> (nœud du graphe de dépendances, construction (table source, date d'achat par ligne))
+# La table source est celle des chargeurs en cache, partagée: elle n'est jamais copiée en entier.
+PARTITIONED_TABLES = {
+    'orders': ('orders', _build_orders),
+    'payments': ('payments_by_month', _build_payments),
+    'order_items': ('order_items_fact', _build_order_items),
+}
+
+def get_partitions_dir(table):
+    """Dossier des partitions mensuelles d'une table"""
+    return get_cache_dir(DATA_PATH / "olist_orders_dataset.csv") / "months" / table
+
+
+def get_partition_file(table, month, content_hash):
+    """Fichier Parquet d'une partition (mois 'AAAA-MM')"""
+    return get_partitions_dir(table) / f"{month}-{content_hash}.parquet"
+
+
+def _content_hash(df):
+    """Hash du contenu d'une partition (colonnes et valeurs)"""
+    digest = hashlib.sha1('|'.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _decode_ids(df):
+    """
+    Remplace les catégories par leurs valeurs avant l'écriture
+
+    Sinon chaque fichier mensuel embarquerait le dictionnaire complet des
+    identifiants; encode_frame le restaure à la lecture.
+    """
+    categorical = df.select_dtypes('category').columns
+    return df.astype({col: df[col].cat.categories.dtype for col in categorical})
+
+
+def _month_slices(dates):
+    """Positions des lignes de chaque mois 'AAAA-MM', dans l'ordre d'origine"""
+    months = dates.dt.strftime('%Y-%m').to_numpy(dtype=object)
+    valid = np.flatnonzero(pd.notna(months))
+    order = valid[np.argsort(months[valid].astype(str), kind='stable')]
+    keys = months[order]
+    bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    for positions in np.split(order, bounds) if len(order) else []:
+        yield months[positions[0]], positions
+
+
+def _write_partitions(table, fingerprint):
+    """
+    Écrit les partitions d'une table et son manifeste {mois: hash}
+
+    Chaque mois est extrait, décodé et écrit séparément: la table n'est
+    jamais recopiée en entier. Les fichiers d'un mois inchangé sont conservés
+    tels quels, et la génération précédente reste lisible par les sessions
+    qui la référencent encore.
+    """
+    partitions_dir = get_partitions_dir(table)
+    partitions_dir.mkdir(parents=True, exist_ok=True)
+
+    source, dates = PARTITIONED_TABLES[table][1]()
+
+    manifest = {}
+    for month, positions in _month_slices(dates):
+        part = source.iloc[positions]
+        if DATE_COLUMN not in part.columns:
+            part = part.assign(**{DATE_COLUMN: dates.iloc[positions].to_numpy()})
+        part = _decode_ids(part).reset_index(drop=True)
+        content_hash = _content_hash(part)
+        manifest[month] = content_hash
+
+        part_file = get_partition_file(table, month, content_hash)
+        if part_file.exists():
+            continue
+        tmp_file = part_file.with_name(f"{part_file.name}.{os.getpid()}.tmp")
+        part.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, part_file)
+
+    manifest_file = partitions_dir / f"manifest-{fingerprint}.json"
+    tmp_file = manifest_file.with_name(f"{manifest_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(json.dumps(manifest))
+    os.replace(tmp_file, manifest_file)
+
+    _purge_generations(table, manifest_file)
+
+    print(f"✅ Partitions mensuelles '{table}': {len(manifest)} mois")
+    return manifest
+
+
+def _purge_generations(table, manifest_file):
+    """
+    Supprime les manifestes et partitions antérieurs à la génération précédente
+
+    Une session encore sur l'ancien manifeste (empreinte mise en cache avant
+    la reconstruction) peut ainsi finir de lire ses partitions; elles ne sont
+    supprimées qu'à la reconstruction suivante.
+    """
+    partitions_dir = get_partitions_dir(table)
+    others = sorted(
+        (m for m in partitions_dir.glob("manifest-*.json") if m != manifest_file),
+        key=lambda m: m.stat().st_mtime_ns if m.exists() else 0,
+        reverse=True
+    )
+    kept, stale_manifests = [manifest_file] + others[:1], others[1:]
+
+    referenced = set()
+    for kept_file in kept:
+        try:
+            months = json.loads(kept_file.read_text())
+        except (OSError, ValueError):
+            continue
+        referenced.update(get_partition_file(table, m, h).name for m, h in months.items())
+
+    for stale in stale_manifests + [p for p in partitions_dir.glob("*.parquet") if p.name not in referenced]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+
+@st.cache_resource(max_entries=16)
+def _partition_manifest(table, fingerprint):
+    """Manifeste {mois: hash} d'une table pour une empreinte de ses sources"""
+    manifest_file = get_partitions_dir(table) / f"manifest-{fingerprint}.json"
+    if manifest_file.exists():
+        try:
+            return json.loads(manifest_file.read_text())
+        except Exception as e:
+            print(f"⚠️ Manifeste illisible, partitions reconstruites: {manifest_file} ({e})")
+    return _write_partitions(table, fingerprint)
+
+
+def get_partition_manifest(table):
+    """
+    Manifeste courant {mois 'AAAA-MM': hash} d'une table partitionnée
+
+    Les partitions sont (re)construites si les sources ont changé.
+    """
+    return _partition_manifest(table, node_fingerprint(PARTITIONED_TABLES[table][0]))
+
+
+def list_months(table):
+    """Mois disponibles pour une table, triés"""
+    return sorted(get_partition_manifest(table))
+
+
+def select_months(months, start=None, end=None):
+    """Mois qui recoupent la plage [start, end)"""
+    first = pd.Timestamp(start).strftime('%Y-%m') if start is not None else None
+    last = pd.Timestamp(end).strftime('%Y-%m') if end is not None else None
+    return [
+        month for month in sorted(months)
+        if (first is None or month >= first) and (last is None or month <= last)
+    ]
+
+
+@st.cache_resource(max_entries=256)
+def read_partition(table, month, content_hash, columns=None):
+    """
+    Lit une partition mensuelle (identifiants encodés)
+
+    Partagé en lecture seule (ne pas modifier le DataFrame retourné).
+    """
+    part_file = get_partition_file(table, month, content_hash)
+    return encode_frame(pd.read_parquet(part_file, columns=list(columns) if columns is not None else None))
+
+
+def load_range(table, start=None, end=None, columns=None):
+    """
+    Lignes d'une table partitionnée dont la date d'achat est dans [start, end)
+
+    Args:
+        table: 'orders', 'payments' ou 'order_items' (table de faits)
+        start: Début de la plage (inclus), None = depuis le premier mois
+        end: Fin de la plage (exclue), None = jusqu'au dernier mois
+        columns: Projection optionnelle
+    """
+    manifest = get_partition_manifest(table)
+    read_columns = columns
+    if columns is not None and DATE_COLUMN not in columns:
+        read_columns = tuple(columns) + (DATE_COLUMN,)
+
+    if not manifest:
+        return pd.DataFrame(columns=list(columns) if columns is not None else None)
+
+    # Plage sans partition: le premier mois fournit le schéma, le filtre le vide
+    months = select_months(manifest, start, end) or sorted(manifest)[:1]
+    # Les catégories à faible cardinalité diffèrent d'un mois à l'autre: réencodage après concaténation
+    df = encode_frame(pd.concat(
+        [read_partition(table, month, manifest[month], read_columns) for month in months],
+        ignore_index=True
+    ))
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df[DATE_COLUMN] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df[DATE_COLUMN] < pd.Timestamp(end)
+    df = df[mask].reset_index(drop=True)
+    return df[list(columns)] if columns is not None else df
+
+
+def load_orders_range(start=None, end=None, columns=None):
+    """Commandes passées dans [start, end)"""
+    return load_range('orders', start, end, columns)
+
+
+def load_order_items_range(start=None, end=None, columns=None):
+    """Items (table de faits) des commandes passées dans [start, end)"""
+    return load_range('order_items', start, end, columns)
+
+
+@st.cache_data(max_entries=4096)
+def _orders_month_summary(month, orders_hash, payments_hash):
+    """Agrégats additifs d'un mois de commandes (mis en cache par contenu)"""
+    orders = read_partition('orders', month, orders_hash, ('order_id', DATE_COLUMN))
+    if payments_hash is None:
+        payments = pd.DataFrame({'order_id': orders['order_id'].iloc[0:0], 'payment_value': pd.Series(dtype=float)})
+    else:
+        payments = read_partition('payments', month, payments_hash, ('order_id', 'payment_value'))
+
+    # Même grain que le calcul complet: commandes jointes (à gauche) aux paiements
+    orders_payments = orders[['order_id']].merge(payments, on='order_id', how='left')
+    return {
+        'orders': len(orders),
+        'order_id': int(orders_payments['order_id'].count()),
+        'payment_value': float(orders_payments['payment_value'].sum()),
+        'last_purchase': orders[DATE_COLUMN].max()
+    }
+
+
+def get_orders_month_summaries(start=None, end=None):
+    """Agrégats mensuels des commandes et paiements, indexés par mois (Period)"""
+    orders_manifest = get_partition_manifest('orders')
+    payments_manifest = get_partition_manifest('payments')
+    months = select_months(orders_manifest, start, end)
+
+    summaries = pd.DataFrame(
+        [_orders_month_summary(m, orders_manifest[m], payments_manifest.get(m)) for m in months],
+        index=pd.PeriodIndex(months, freq='M'),
+        columns=['orders', 'order_id', 'payment_value', 'last_purchase']
+    )
+    return summaries
+
+
+def get_monthly_sales(start=None, end=None):
+    """
+    Ventes mensuelles (même forme que data_loader.compute_sales_over_time)
+
+    La plage sélectionne des mois entiers.
+    """
+    summaries = get_orders_month_summaries(start, end)
+    return pd.DataFrame({
+        'month': summaries.index.to_timestamp(),
+        'order_id': summaries['order_id'].astype('int64').to_numpy(),
+        'payment_value': summaries['payment_value'].astype('float64').to_numpy()
+    })
+
+
+def get_monthly_order_counts(start=None, end=None):
+    """
+    Nombre de commandes par mois, indexé par fin de mois
+
+    Même résultat que resample('ME').size() sur les commandes (mois sans
+    commande à 0); la plage sélectionne des mois entiers.
+    """
+    counts = get_orders_month_summaries(start, end)['orders'].astype('int64')
+    if counts.empty:
+        return counts
+    periods = pd.period_range(counts.index.min(), counts.index.max(), freq='M')
+    counts = counts.reindex(periods, fill_value=0)
+    counts.index = periods.to_timestamp(how='end').normalize()
+    return counts
+
+
+def get_last_purchase_date():
+    """Date de la commande la plus récente (lue dans la dernière partition)"""
+    months = list_months('orders')
+    if not months:
+        return pd.NaT
+    return get_orders_month_summaries(start=months[-1])['last_purchase'].iloc[-1]
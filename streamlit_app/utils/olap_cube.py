@@ -0,0 +1,344 @@
+"""
+Cube OLAP pré-agrégé du tableau de bord administrateur
+
+Les mesures additives (comptes, sommes) sont pré-agrégées une fois au grain
+mois × état du client × catégorie × statut de commande. Tous les widgets du
+tableau de bord, ainsi que les filtres de période, d'état et de catégorie,
+sont des roll-ups (groupby + sum) sur ce cube de quelques milliers de
+cellules: le rendu ne dépend plus de la taille des données brutes.
+
+Conventions de grain:
+    - mesures « commande » (commandes, paiements, avis, livraison): chaque
+      commande est rattachée à la catégorie de son premier item
+    - mesures « item » (items, chiffre d'affaires produits, nouveaux vendeurs,
+      nouveaux produits): chaque item est rattaché à sa propre catégorie
+    - les avis sont rattachés au mois de leur création (comme la tendance
+      mensuelle de satisfaction), l'état, la catégorie et le statut restant
+      ceux de leur commande
+    - paiements, avis et items sans commande connue sont conservés dans une
+      cellule sans dimensions: le cube complet donne les mêmes totaux que
+      data_loader.get_dashboard_kpis, et toute tranche les exclut
+
+Clients, vendeurs et produits distincts ne sont pas additifs: le cube porte
+leurs totaux sur l'ensemble des données, et les cellules ne comptent que leur
+première apparition (les « nouveaux » d'une tranche).
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import (
+    cached_on,
+    load_customers,
+    load_order_items,
+    load_payments,
+    load_products,
+    load_reviews,
+    load_sellers,
+    load_tables
+)
+
+DIMENSIONS = ['month', 'customer_state', 'category', 'order_status']
+
+SCORE_MEASURES = [f'score_{score}' for score in range(1, 6)]
+
+MEASURES = [
+    'orders',
+    'revenue',
+    'new_customers',
+    'delivered_orders',
+    'on_time_orders',
+    'delivery_days_sum',
+    'delivery_days_count',
+    'review_count',
+    'review_score_sum',
+    *SCORE_MEASURES,
+    'items',
+    'item_revenue',
+    'new_sellers',
+    'new_products',
+]
+
+# Les autres mesures sont des comptes entiers
+FLOAT_MEASURES = ('revenue', 'delivery_days_sum', 'review_score_sum', 'item_revenue')
+
+
+def _order_dimensions():
+    """Commandes avec leurs dimensions (une ligne par commande)"""
+    orders, customers, items, products = load_tables(
+        ('orders', (
+            'order_id',
+            'customer_id',
+            'order_status',
+            'order_purchase_timestamp',
+            'order_delivered_customer_date',
+            'order_estimated_delivery_date'
+        )),
+        ('customers', ('customer_id', 'customer_state')),
+        ('order_items', ('order_id', 'order_item_id', 'product_id')),
+        ('products', ('product_id', 'product_category_name_english'))
+    )
+
+    # Catégorie d'une commande: celle de son premier item
+    first_items = (
+        items.sort_values(['order_id', 'order_item_id'])
+        .drop_duplicates('order_id')
+        .merge(products, on='product_id', how='left')
+        [['order_id', 'product_category_name_english']]
+    )
+
+    orders = orders.merge(customers, on='customer_id', how='left')
+    orders = orders.merge(first_items, on='order_id', how='left')
+    orders['month'] = orders['order_purchase_timestamp'].dt.to_period('M').dt.to_timestamp()
+    return orders.rename(columns={'product_category_name_english': 'category'})
+
+
+def _aggregate(df, measures):
+    """Agrège des lignes au grain du cube (les valeurs manquantes forment une cellule)"""
+    return df.groupby(DIMENSIONS, observed=True, dropna=False)[measures].sum().reset_index()
+
+
+def build_cube():
+    """
+    Construit le cube à partir des tables brutes
+
+    Returns:
+        Tuple (cells, delivery_days, totals): cellules du cube avec toutes les
+        mesures, histogramme des délais de livraison (jours) des commandes
+        livrées par cellule, et totaux distincts (clients, vendeurs, produits)
+    """
+    orders = _order_dimensions()
+    dims = orders[['order_id'] + DIMENSIONS]
+
+    # Mesures au grain commande
+    first_orders = orders.sort_values('order_purchase_timestamp', kind='stable').drop_duplicates('customer_id')
+    delivered = (orders['order_status'] == 'delivered').to_numpy()
+    delivery_days = (orders['order_delivered_customer_date'] - orders['order_purchase_timestamp']).dt.days
+
+    order_measures = dims.assign(
+        orders=1,
+        new_customers=orders.index.isin(first_orders.index).astype(int),
+        delivered_orders=delivered.astype(int),
+        on_time_orders=(
+            delivered
+            & (orders['order_delivered_customer_date'] <= orders['order_estimated_delivery_date']).to_numpy()
+        ).astype(int),
+        # Délai moyen des KPIs: toutes les commandes ayant une date de livraison
+        delivery_days_sum=delivery_days.fillna(0).to_numpy(),
+        delivery_days_count=delivery_days.notna().astype(int).to_numpy()
+    )
+    order_cells = _aggregate(order_measures, [
+        'orders',
+        'new_customers',
+        'delivered_orders',
+        'on_time_orders',
+        'delivery_days_sum',
+        'delivery_days_count'
+    ])
+
+    # Paiements, rattachés aux dimensions de leur commande
+    payments = load_payments(columns=('order_id', 'payment_sequential', 'payment_value'))
+    payments = payments.merge(dims, on='order_id', how='left')
+    payment_cells = _aggregate(
+        payments[DIMENSIONS].assign(revenue=payments['payment_value'].fillna(0)),
+        ['revenue']
+    )
+
+    # Avis, rattachés au mois de leur création et aux autres dimensions de leur commande
+    reviews = load_reviews(columns=('review_id', 'order_id', 'review_score', 'review_creation_date'))
+    reviews = reviews.merge(dims.drop(columns='month'), on='order_id', how='left')
+    reviews['month'] = (
+        pd.to_datetime(reviews['review_creation_date'], errors='coerce').dt.to_period('M').dt.to_timestamp()
+    )
+    scores = reviews['review_score']
+    review_measures = reviews[DIMENSIONS].assign(
+        review_count=scores.notna().astype(int),
+        review_score_sum=scores.fillna(0),
+        **{f'score_{score}': (scores == score).astype(int) for score in range(1, 6)}
+    )
+    review_cells = _aggregate(review_measures, ['review_count', 'review_score_sum', *SCORE_MEASURES])
+
+    # Mesures au grain item (catégorie propre à chaque item)
+    items = load_order_items(columns=('order_id', 'order_item_id', 'product_id', 'seller_id', 'price'))
+    products = load_products(columns=('product_id', 'product_category_name_english'))
+    items = items.merge(dims.drop(columns='category'), on='order_id', how='left')
+    items = items.merge(products, on='product_id', how='left').rename(
+        columns={'product_category_name_english': 'category'}
+    )
+    # Produits distincts non additifs: chaque produit compte une fois, dans la cellule de sa première vente
+    items = items.sort_values('month', kind='stable')
+    first_sales = items.drop_duplicates('seller_id')
+    first_product_sales = items.drop_duplicates('product_id')
+    item_measures = items[DIMENSIONS].assign(
+        items=1,
+        item_revenue=items['price'].fillna(0),
+        new_sellers=items.index.isin(first_sales.index).astype(int),
+        new_products=items.index.isin(first_product_sales.index).astype(int)
+    )
+    item_cells = _aggregate(item_measures, ['items', 'item_revenue', 'new_sellers', 'new_products'])
+
+    cells = pd.concat([order_cells, payment_cells, review_cells, item_cells], ignore_index=True)
+    cells = cells.groupby(DIMENSIONS, observed=True, dropna=False)[MEASURES].sum().reset_index()
+    cells = cells.astype({measure: 'int64' for measure in MEASURES if measure not in FLOAT_MEASURES})
+
+    # Histogramme des délais (médiane et distribution ne sont pas additives)
+    delivered_days = order_measures.loc[delivered & delivery_days.notna().to_numpy(), DIMENSIONS]
+    delivered_days = delivered_days.assign(
+        delivery_days=delivery_days[delivered & delivery_days.notna().to_numpy()].astype(int).to_numpy()
+    )
+    delivery_hist = (
+        delivered_days.groupby(DIMENSIONS + ['delivery_days'], observed=True, dropna=False)
+        .size()
+        .reset_index(name='count')
+    )
+
+    # Totaux distincts, mêmes définitions que data_loader.compute_dashboard_kpis
+    totals = {
+        'total_customers': len(load_customers(columns=('customer_id',))),
+        'total_sellers': len(load_sellers(columns=('seller_id',))),
+        'total_products': int(items['product_id'].nunique())
+    }
+
+    return cells, delivery_hist, totals
+
+
+class OlapCube:
+    """Cube pré-agrégé; les tranches et roll-ups ne touchent jamais les données brutes"""
+
+    def __init__(self, cells, delivery_days, totals):
+        self.cells = cells
+        self.delivery_days = delivery_days
+        # Totaux distincts de l'ensemble des données, conservés par les tranches
+        self.totals = totals
+
+    def slice(self, start=None, end=None, states=None, categories=None, statuses=None):
+        """
+        Sous-cube filtré
+
+        Args:
+            start, end: Premier et dernier mois inclus (None = sans borne)
+            states: États du client retenus (None = tous)
+            categories: Catégories retenues (None = toutes)
+            statuses: Statuts de commande retenus (None = tous)
+        """
+        def mask(df):
+            keep = np.ones(len(df), dtype=bool)
+            if start is not None:
+                keep &= (df['month'] >= pd.Timestamp(start)).to_numpy()
+            if end is not None:
+                keep &= (df['month'] <= pd.Timestamp(end)).to_numpy()
+            for column, values in (('customer_state', states), ('category', categories), ('order_status', statuses)):
+                if values is not None:
+                    keep &= df[column].isin(values).to_numpy()
+            return keep
+
+        return OlapCube(self.cells[mask(self.cells)], self.delivery_days[mask(self.delivery_days)], self.totals)
+
+    def rollup(self, by=None, measures=None):
+        """
+        Roll-up des mesures
+
+        Args:
+            by: Dimensions conservées (None = total général)
+            measures: Mesures à sommer (défaut: toutes)
+
+        Returns:
+            DataFrame (ou Series pour le total général)
+        """
+        measures = list(measures or MEASURES)
+        if not by:
+            return self.cells[measures].sum()
+        return self.cells.groupby(list(by), observed=True)[measures].sum().reset_index()
+
+    def dimension_values(self, dimension):
+        """Valeurs présentes d'une dimension, triées"""
+        return sorted(self.cells[dimension].dropna().unique().tolist())
+
+    def kpis(self):
+        """
+        KPIs du tableau de bord (mêmes clés que data_loader.get_dashboard_kpis)
+
+        Les totaux de clients, vendeurs et produits sont toujours ceux de
+        l'ensemble des données, même sur une tranche; les clés new_* donnent
+        ceux apparus pour la première fois dans la tranche.
+        """
+        totals = self.rollup()
+        return {
+            'total_orders': int(totals['orders']),
+            'total_revenue': float(totals['revenue']),
+            **self.totals,
+            'new_products': int(totals['new_products']),
+            'new_customers': int(totals['new_customers']),
+            'new_sellers': int(totals['new_sellers']),
+            'avg_rating': _ratio(totals['review_score_sum'], totals['review_count']),
+            'delivered_orders': int(totals['delivered_orders']),
+            'avg_delivery_time': _ratio(totals['delivery_days_sum'], totals['delivery_days_count'])
+        }
+
+    def sales_over_time(self):
+        """Commandes et chiffre d'affaires par mois"""
+        monthly = self.rollup(['month'], ['orders', 'revenue'])
+        return monthly.rename(columns={'orders': 'order_id', 'revenue': 'payment_value'}).sort_values('month')
+
+    def monthly(self, measure):
+        """Série mensuelle d'une mesure, indexée par mois"""
+        return self.rollup(['month'], [measure]).set_index('month')[measure].sort_index()
+
+    def monthly_rating(self):
+        """Note moyenne par mois de création des avis"""
+        monthly = self.rollup(['month'], ['review_score_sum', 'review_count']).set_index('month').sort_index()
+        monthly = monthly[monthly['review_count'] > 0]
+        return monthly['review_score_sum'] / monthly['review_count']
+
+    def category_performance(self):
+        """Items et chiffre d'affaires produits par catégorie"""
+        categories = self.rollup(['category'], ['items', 'item_revenue'])
+        categories.columns = ['category', 'orders', 'revenue']
+        categories['category'] = categories['category'].astype(str)
+        return categories.sort_values('revenue', ascending=False).reset_index(drop=True)
+
+    def geographic_distribution(self):
+        """Commandes par état du client"""
+        states = self.rollup(['customer_state'], ['orders'])
+        states.columns = ['state', 'orders']
+        states['state'] = states['state'].astype(str)
+        states = states[states['orders'] > 0]
+        return states.sort_values('orders', ascending=False).reset_index(drop=True)
+
+    def review_distribution(self):
+        """Nombre d'avis par note (1 à 5)"""
+        totals = self.rollup(measures=SCORE_MEASURES)
+        return pd.Series(totals.to_numpy(), index=range(1, 6), name='count')
+
+    def delivery_distribution(self):
+        """Nombre de commandes livrées par délai (jours)"""
+        return self.delivery_days.groupby('delivery_days')['count'].sum().sort_index()
+
+    def delivery_mean(self):
+        """Délai moyen de livraison des commandes livrées, calculé sur l'histogramme"""
+        distribution = self.delivery_distribution()
+        return _ratio((distribution.index.to_numpy() * distribution.to_numpy()).sum(), distribution.sum())
+
+    def delivery_median(self):
+        """Délai médian de livraison, calculé sur l'histogramme"""
+        distribution = self.delivery_distribution()
+        total = distribution.sum()
+        if total == 0:
+            return float('nan')
+        cumulative = distribution.cumsum().to_numpy()
+        days = distribution.index.to_numpy()
+        # Médiane au sens de pandas: moyenne des deux valeurs centrales si le total est pair
+        low = days[np.searchsorted(cumulative, (total + 1) // 2)]
+        high = days[np.searchsorted(cumulative, total // 2 + 1)]
+        return (low + high) / 2
+
+
+def _ratio(numerator, denominator):
+    """Division protégée (NaN si le dénominateur est nul)"""
+    return float(numerator / denominator) if denominator else float('nan')
+
+
+@cached_on('olap_cube', resource=True)
+def get_olap_cube():
+    """Retourne le cube du tableau de bord (cached)"""
+    return OlapCube(*build_cube())
@@ -279,7 +279,7 @@ class RecommendationEngine:
         if self.products_df is None:
             return pd.DataFrame()
         
-        stats = self.products_df.groupby('product_category_name').agg({
+        stats = self.products_df.groupby('product_category_name', observed=True).agg({
             'product_id': 'count',
             'avg_price': 'mean',
             'review_score': 'mean',
@@ -0,0 +1,402 @@
+"""
+Délai moyen de remise au transporteur par vendeur, mis à jour en continu
+
+La caractéristique seller_avg_dispatch du modèle de livraison est la moyenne,
+par vendeur, des heures entre l'achat et la remise au transporteur
+(order_delivered_carrier_date), figée à l'entraînement dans
+seller_avg_dispatch.pkl. Elle est tenue ici dans un index de hachage
+(pd.Index) et deux tableaux numpy alignés (moyenne, nombre d'observations):
+une recherche par lot est un seul get_indexer suivi d'un accès par indice.
+
+Les items de commande remis au transporteur qui n'ont pas encore été
+comptés (nouvelles commandes, partitions delta) sont intégrés en moyenne
+glissante (vendeurs connus) ou ajoutés (nouveaux vendeurs), sans réentraîner
+le pipeline. Seules les remises postérieures à un plancher sont relues: la
+dernière remise comptée moins une fenêtre de retard
+(seller_dispatch_late_days). Une remise arrivée en retard dans la fenêtre
+est intégrée, une remise plus ancienne est ignorée; seules les clés des
+items de la fenêtre sont conservées. L'état est persisté en .npz à côté du
+cache columnaire; il repart de l'artefact quand celui-ci change.
+
+Le nombre d'observations de l'artefact n'est pas sauvegardé par le notebook:
+au premier démarrage, il est estimé par les remises déjà présentes dans les
+données, et les vendeurs absents de l'artefact y sont ajoutés. Ce premier
+rapprochement ne modifie aucun délai de l'artefact (moyennes par vendeur et
+moyenne globale).
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.settings import get_app_settings
+from utils.columnar_cache import get_cache_dir, source_fingerprint
+from utils.data_loader import DATA_PATH, load_tables, node_fingerprint
+
+STATE_FILE_STEM = "seller-dispatch"
+ORDERS_FILE = "olist_orders_dataset.csv"
+
+# Intervalle minimal entre deux vérifications des commandes (secondes)
+DEFAULT_REFRESH_SECONDS = 300
+
+# Retard maximal (jours) d'une remise au transporteur sur la dernière remise comptée
+DEFAULT_LATE_DAYS = 30
+
+
+def is_dispatch_update_enabled():
+    """Indique si les délais d'expédition sont mis à jour depuis les commandes"""
+    return bool(get_app_settings().get('seller_dispatch_updates', True))
+
+
+def get_refresh_interval():
+    """Intervalle minimal entre deux vérifications des commandes (secondes)"""
+    return float(get_app_settings().get('seller_dispatch_refresh_seconds', DEFAULT_REFRESH_SECONDS) or 0)
+
+
+def get_late_window():
+    """Fenêtre de retard des remises encore intégrées, derrière la dernière remise comptée"""
+    return pd.Timedelta(days=float(get_app_settings().get('seller_dispatch_late_days', DEFAULT_LATE_DAYS)))
+
+
+def artifact_fingerprint(*paths):
+    """Empreinte des artefacts figés (une nouvelle version réinitialise l'état)"""
+    parts = [source_fingerprint(path) for path in paths]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+
+def orders_fingerprint():
+    """Empreinte des commandes et des items (fichiers de base et partitions delta)"""
+    return f"{node_fingerprint('orders')}|{node_fingerprint('order_items')}"
+
+
+def get_state_file(artifact):
+    """Chemin du fichier .npz de l'état correspondant à une version de l'artefact"""
+    return get_cache_dir(DATA_PATH / ORDERS_FILE) / f"{STATE_FILE_STEM}-{artifact}.npz"
+
+
+def load_dispatch_observations(since=None, counted=None):
+    """
+    Délais de remise au transporteur (heures), au grain item de commande
+
+    Comme dans le notebook: order_delivered_carrier_date - order_purchase_timestamp,
+    une observation par item (un vendeur par item).
+
+    Args:
+        since: Seules les remises strictement postérieures sont lues (None: toutes)
+        counted: Clés des items déjà comptés, ignorés (None: aucun)
+
+    Returns:
+        DataFrame key (order_id:order_item_id), seller_id (str), hours, carrier_date
+    """
+    orders, items = load_tables(
+        ('orders', ['order_id', 'order_purchase_timestamp', 'order_delivered_carrier_date']),
+        ('order_items', ['order_id', 'order_item_id', 'seller_id'])
+    )
+
+    keep = orders['order_delivered_carrier_date'].notna() & orders['order_purchase_timestamp'].notna()
+    if since is not None:
+        keep &= orders['order_delivered_carrier_date'] > since
+    rows = items.merge(orders[keep], on='order_id', how='inner')
+
+    keys = (rows['order_id'].astype(str) + ':' + rows['order_item_id'].astype(str)).to_numpy(object)
+    if counted is not None and len(counted):
+        new = ~pd.Index(keys).isin(counted)
+        rows, keys = rows[new], keys[new]
+
+    hours = (rows['order_delivered_carrier_date'] - rows['order_purchase_timestamp']).dt.total_seconds() / 3600
+    return pd.DataFrame({
+        'key': keys,
+        'seller_id': rows['seller_id'].astype(str).to_numpy(object),
+        'hours': hours.to_numpy(float),
+        'carrier_date': rows['order_delivered_carrier_date'].to_numpy('datetime64[ns]')
+    })
+
+
+class SellerDispatchStats:
+    """Moyennes et nombres d'observations par vendeur, indexés par hachage"""
+
+    def __init__(self, seller_ids, mean, count, global_mean, global_count,
+                 recent=None, floor=None, source=None, artifact=None):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._next_refresh = None
+        self._last_error = None
+        # État remplacé d'un bloc: une lecture concurrente voit l'ancien ou le nouveau, jamais un mélange
+        self._state = (
+            pd.Index(seller_ids, dtype=object),
+            np.asarray(mean, dtype=np.float64),
+            np.asarray(count, dtype=np.int64),
+            float(global_mean),
+            int(global_count)
+        )
+        # Remises comptées au-dessus du plancher: date de remise par clé order_id:order_item_id
+        # (None: jamais rapproché des données)
+        self.recent = recent
+        # Les remises antérieures ou égales au plancher ne sont plus relues
+        self.floor = floor
+        self.source = source
+        self.artifact = artifact
+
+    @classmethod
+    def from_artifact(cls, seller_avg_dispatch, global_avg_dispatch, artifact=None):
+        """État initial depuis les fichiers du notebook (une observation par vendeur)"""
+        return cls(
+            seller_avg_dispatch.index.astype(str).to_numpy(object),
+            seller_avg_dispatch.to_numpy(np.float64),
+            np.ones(len(seller_avg_dispatch), dtype=np.int64),
+            global_avg_dispatch,
+            len(seller_avg_dispatch),
+            artifact=artifact
+        )
+
+    def __len__(self):
+        return len(self._state[0])
+
+    @property
+    def global_mean(self):
+        return self._state[3]
+
+    # ========================================
+    # RECHERCHE
+    # ========================================
+
+    def get(self, seller_id):
+        """Délai moyen (heures) d'un vendeur, moyenne globale s'il est inconnu"""
+        index, mean, _, global_mean, _ = self._state
+        if seller_id:
+            try:
+                return float(mean[index.get_loc(seller_id)])
+            except (KeyError, TypeError):
+                pass
+        return global_mean
+
+    def lookup(self, seller_ids):
+        """
+        Délais moyens (heures) d'un lot de vendeurs
+
+        Returns:
+            Tableau numpy float64 aligné sur seller_ids (moyenne globale si inconnu)
+        """
+        index, mean, _, global_mean, _ = self._state
+        positions = index.get_indexer(seller_ids)
+        known = positions >= 0
+        dispatch = np.full(len(positions), global_mean, dtype=np.float64)
+        dispatch[known] = mean[positions[known]]
+        return dispatch
+
+    # ========================================
+    # MISE À JOUR
+    # ========================================
+
+    def update(self, seller_ids, hours):
+        """
+        Intègre de nouvelles observations en moyenne glissante
+
+        Args:
+            seller_ids: Vendeur de chaque observation
+            hours: Délai de remise au transporteur (heures)
+
+        Returns:
+            Nombre d'observations intégrées
+        """
+        hours = np.asarray(hours, dtype=np.float64)
+        valid = np.isfinite(hours)
+        codes, uniques = pd.factorize(np.asarray(seller_ids, dtype=object)[valid])
+        hours = hours[valid]
+
+        if not len(hours):
+            return 0
+
+        with self._lock:
+
+            index, mean, count, global_mean, global_count = self._state
+            sums = np.bincount(codes, weights=hours, minlength=len(uniques))
+            counts = np.bincount(codes, minlength=len(uniques)).astype(np.int64)
+
+            # Nouveaux vendeurs ajoutés en fin de tableaux
+            positions = index.get_indexer(uniques)
+            new = positions < 0
+            if new.any():
+                positions[new] = np.arange(len(index), len(index) + new.sum())
+                index = index.append(pd.Index(uniques[new], dtype=object))
+                mean = np.concatenate([mean, np.zeros(new.sum())])
+                count = np.concatenate([count, np.zeros(new.sum(), dtype=np.int64)])
+            else:
+                mean, count = mean.copy(), count.copy()
+
+            total = count[positions] + counts
+            mean[positions] = (mean[positions] * count[positions] + sums) / total
+            count[positions] = total
+
+            added = int(counts.sum())
+            global_mean = (global_mean * global_count + float(sums.sum())) / (global_count + added)
+            self._state = (index, mean, count, global_mean, global_count + added)
+            return added
+
+    def refresh_if_due(self, interval=DEFAULT_REFRESH_SECONDS):
+        """
+        refresh() au plus une fois par intervalle
+
+        Entre deux vérifications, aucun accès aux fichiers. Une erreur (ex.
+        commandes introuvables) n'est signalée qu'une fois tant qu'elle se répète.
+        """
+        now = time.monotonic()
+        if self._next_refresh is not None and now < self._next_refresh:
+            return False
+        self._next_refresh = now + interval
+
+        try:
+            refreshed = self.refresh()
+        except Exception as e:
+            if str(e) != self._last_error:
+                print(f"⚠️ Mise à jour des délais d'expédition impossible: {e}")
+            self._last_error = str(e)
+            return False
+        self._last_error = None
+        return refreshed
+
+    def refresh(self):
+        """
+        Intègre les items remis au transporteur pas encore comptés
+
+        Sans effet tant que les commandes et les items ne changent pas. Au
+        premier appel, le nombre d'observations de chaque vendeur de
+        l'artefact est estimé par les remises déjà présentes, sans modifier
+        sa moyenne; les autres vendeurs sont ajoutés.
+        """
+        fingerprint = orders_fingerprint()
+        if fingerprint == self.source:
+            return False
+
+        # Deux sessions simultanées n'intègrent pas deux fois les mêmes remises
+        with self._refresh_lock:
+            if fingerprint == self.source:
+                return False
+
+            if self.recent is None:
+                self._bootstrap()
+            else:
+                observations = load_dispatch_observations(since=self.floor, counted=self.recent.index)
+                if len(observations):
+                    added = self.update(observations['seller_id'], observations['hours'])
+                    self._advance(observations)
+                    print(f"🔄 Délais d'expédition: {added:,} nouvelles remises au transporteur intégrées")
+
+            self.source = fingerprint
+            self.save()
+            return True
+
+    def _bootstrap(self):
+        """
+        Premier rapprochement avec les données, sans toucher aux délais de l'artefact
+
+        Les vendeurs de l'artefact gardent leur moyenne; seul leur nombre
+        d'observations (poids face aux remises suivantes) est estimé par leurs
+        remises déjà présentes. Les vendeurs absents de l'artefact sont
+        ajoutés avec la moyenne de leurs remises. La moyenne globale de
+        l'artefact est conservée.
+        """
+        observations = load_dispatch_observations()
+
+        with self._lock:
+            index, mean, count, global_mean, _ = self._state
+            positions = index.get_indexer(observations['seller_id'])
+            in_artifact = positions >= 0
+
+            seen = np.bincount(positions[in_artifact], minlength=len(index))
+            count = np.where(seen > 0, seen, count).astype(np.int64)
+
+            unknown = observations[~in_artifact].groupby('seller_id', sort=False)['hours'].agg(['mean', 'size'])
+            index = index.append(pd.Index(unknown.index, dtype=object))
+            mean = np.concatenate([mean, unknown['mean'].to_numpy(np.float64)])
+            count = np.concatenate([count, unknown['size'].to_numpy(np.int64)])
+            self._state = (index, mean, count, global_mean, int(count.sum()))
+
+        self.recent = pd.Series([], index=pd.Index([], dtype=object), dtype='datetime64[ns]')
+        self._advance(observations)
+        print(f"✅ Délais d'expédition: {len(observations):,} remises déjà présentes, "
+              f"{len(unknown):,} vendeurs ajoutés ({int(unknown['size'].sum()):,} remises)")
+
+    def _advance(self, observations):
+        """Ajoute des remises comptées et remonte le plancher (jamais abaissé)"""
+        recent = pd.concat([
+            self.recent,
+            pd.Series(observations['carrier_date'].to_numpy(), index=pd.Index(observations['key'], dtype=object))
+        ])
+        if not len(recent):
+            return
+        floor = recent.max() - get_late_window()
+        if self.floor is not None:
+            floor = max(floor, self.floor)
+        self.floor = floor
+        self.recent = recent[recent > floor]
+
+    # ========================================
+    # PERSISTANCE
+    # ========================================
+
+    def save(self):
+        """Écrit l'état de manière atomique et purge les versions obsolètes"""
+        if self.artifact is None:
+            return
+        state_file = get_state_file(self.artifact)
+        index, mean, count, global_mean, global_count = self._state
+        try:
+            state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = state_file.with_name(f"{state_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    seller_id=index.to_numpy(str),
+                    mean=mean,
+                    count=count,
+                    global_mean=np.float64(global_mean),
+                    global_count=np.int64(global_count),
+                    recent_key=np.array([] if self.recent is None else self.recent.index.to_numpy(str), dtype=str),
+                    recent_date=np.array([] if self.recent is None else self.recent.to_numpy(), dtype='datetime64[ns]'),
+                    floor=np.datetime64('NaT', 'ns') if self.floor is None else self.floor.to_datetime64(),
+                    bootstrapped=np.bool_(self.recent is not None),
+                    source=np.str_(self.source or '')
+                )
+            os.replace(tmp_file, state_file)
+        except Exception as e:
+            print(f"⚠️ Impossible d'écrire l'état des délais d'expédition {state_file}: {e}")
+            return
+
+        for stale in state_file.parent.glob(f"{STATE_FILE_STEM}-*.npz"):
+            if stale != state_file:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, artifact):
+        """État persisté pour une version de l'artefact, None s'il n'existe pas"""
+        state_file = get_state_file(artifact)
+        if not state_file.exists():
+            return None
+        try:
+            with np.load(state_file) as data:
+                recent = None
+                if data['bootstrapped']:
+                    recent = pd.Series(data['recent_date'], index=pd.Index(data['recent_key'].astype(object)))
+                floor = pd.Timestamp(data['floor'][()])
+                return cls(
+                    data['seller_id'].astype(object),
+                    data['mean'],
+                    data['count'],
+                    data['global_mean'],
+                    data['global_count'],
+                    recent=recent,
+                    floor=None if pd.isna(floor) else floor,
+                    source=str(data['source']) or None,
+                    artifact=artifact
+                )
+        except Exception as e:
+            print(f"⚠️ État des délais d'expédition illisible, repart de l'artefact: {state_file} ({e})")
+            return None
@@ -0,0 +1,136 @@
+"""
+Store Arrow partagé entre processus Streamlit
+
+Les tables sont publiées une fois sous forme de fichiers Arrow IPC (non
+compressés) dans un dossier commun, puis attachées en lecture seule par
+memory-mapping: toutes les répliques d'un même hôte partagent alors une seule
+copie des données dans le cache de pages du système.
+
+Chaque fichier est identifié par une empreinte des sources: une table dont
+les fichiers sources changent est republiée sous un nouveau nom.
+"""
+
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import streamlit as st
+
+from config.settings import get_app_settings
+
+STORE_ENV_VAR = "OLIST_SHARED_STORE_DIR"
+
+
+def get_store_dir():
+    """
+    Dossier du store partagé, ou None si le store est désactivé
+
+    La variable d'environnement OLIST_SHARED_STORE_DIR est prioritaire sur
+    app_settings.shared_store_dir.
+    """
+    store_dir = os.environ.get(STORE_ENV_VAR) or get_app_settings().get('shared_store_dir')
+    return Path(store_dir) if store_dir else None
+
+
+def get_store_file(name, fingerprint):
+    """Chemin du fichier Arrow d'une table pour une empreinte donnée"""
+    return get_store_dir() / f"{name}-{fingerprint}.arrow"
+
+
+def publish_table(name, fingerprint, df):
+    """
+    Publie un DataFrame dans le store (écriture atomique)
+
+    Returns:
+        True si le fichier a été écrit
+    """
+    store_file = get_store_file(name, fingerprint)
+    try:
+        store_file.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_file = store_file.with_name(f"{store_file.name}.{os.getpid()}.tmp")
+        with pa.OSFile(str(tmp_file), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_file, store_file)
+    except Exception as e:
+        print(f"⚠️ Impossible de publier '{name}' dans le store partagé: {e}")
+        return False
+
+    # Les processus encore attachés aux anciennes versions gardent leur mapping
+    for stale in store_file.parent.glob(f"{name}-*.arrow"):
+        if stale != store_file:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+    return True
+
+
+@st.cache_resource(max_entries=64)
+def attach_table(name, fingerprint):
+    """
+    Attache une table publiée en lecture seule (memory-mapping)
+
+    Returns:
+        pyarrow.Table adossée au fichier, ou None si le fichier est illisible
+    """
+    store_file = get_store_file(name, fingerprint)
+    try:
+        source = pa.memory_map(str(store_file), 'r')
+        return pa.ipc.open_file(source).read_all()
+    except Exception as e:
+        print(f"⚠️ Table '{name}' illisible dans le store partagé: {e}")
+        return None
+
+
+@st.cache_resource(max_entries=64)
+def attach_frame(name, fingerprint, columns=None):
+    """
+    DataFrame converti une seule fois par (table, empreinte, projection)
+
+    La conversion Arrow -> pandas rematérialise les colonnes texte et
+    catégorielles: elle n'est pas refaite à chaque rerun Streamlit.
+
+    Returns:
+        DataFrame partagé (lecture seule), ou None si la table est illisible
+    """
+    table = attach_table(name, fingerprint)
+    if table is None:
+        return None
+    if columns is not None:
+        table = table.select(list(columns))
+    # split_blocks évite la consolidation: les colonnes numériques restent des vues du fichier
+    return table.to_pandas(split_blocks=True)
+
+
+def shared_frame(name, fingerprint, build, columns=None, copy=False):
+    """
+    DataFrame servi depuis le store partagé
+
+    La table est construite et publiée par le premier processus qui en a
+    besoin; les autres l'attachent directement.
+
+    Args:
+        name: Nom de la table dans le store
+        fingerprint: Empreinte des sources de la table
+        build: Fonction sans argument construisant le DataFrame complet
+        columns: Projection optionnelle (sélection de colonnes sans copie côté Arrow)
+        copy: Retourner une copie modifiable (comme st.cache_data) plutôt que
+            le DataFrame partagé
+    """
+    columns = tuple(columns) if columns is not None else None
+
+    df = None
+    if not get_store_file(name, fingerprint).exists():
+        df = build()
+        if not publish_table(name, fingerprint, df):
+            return df[list(columns)] if columns is not None else df
+
+    frame = attach_frame(name, fingerprint, columns)
+    if frame is None:
+        if df is None:
+            df = build()
+        return df[list(columns)] if columns is not None else df
+
+    return frame.copy() if copy else frame
@@ -8,24 +8,234 @@ import numpy as np
 import pickle
 import json
 import os
+import argparse
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 import streamlit as st
 from math import radians, sin, cos, sqrt, atan2
 
+from config.settings import get_app_settings
+from utils.columnar_cache import TableWriter, get_cache_dir
+from utils.data_loader import DATA_PATH
+from utils.seller_dispatch import (
+    SellerDispatchStats,
+    artifact_fingerprint,
+    get_refresh_interval,
+    is_dispatch_update_enabled
+)
+
+# Dossier du pipeline XGBoost et des fichiers associés
+MODEL_DIR = Path(__file__).parent.parent / "models" / "shipping_forecast"
+
+EARTH_RADIUS_KM = 6371
+
+# Saison de chaque mois (indice = mois - 1)
+MONTH_SEASONS = np.array([
+    'winter', 'winter', 'spring', 'spring', 'spring', 'summer',
+    'summer', 'summer', 'fall', 'fall', 'fall', 'winter'
+], dtype=object)
+
+# Valeurs par défaut des caractéristiques de commande absentes
+ORDER_DEFAULTS = {
+    'time_to_approve_order': 2.0,
+    'num_items': 1,
+    'num_unique_sellers': 1,
+    'total_freight_value': 20.0,
+    'total_payment_value': 100.0,
+    'num_payments': 1,
+    'price': 50.0,
+    'freight_value': 15.0,
+    'product_weight_g': 500,
+    'product_length_cm': 20,
+    'product_height_cm': 10,
+    'product_width_cm': 15,
+    'product_name_lenght': 40,
+    'product_description_lenght': 500,
+}
+CATEGORICAL_DEFAULTS = {
+    'product_category_name': 'None',
+    'customer_state': 'SP',
+    'seller_state': 'SP',
+    'customer_state_geo': 'SP',
+    'seller_state_geo': 'SP',
+}
+DEFAULT_DISTANCE_KM = 500
+CIRCUITY_FACTOR = 1.3
+
+
+def haversine_distances(lat1, lon1, lat2, lon2):
+    """Distances haversine (km) entre deux tableaux de points, calcul vectorisé"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class SingleRowPredictor:
+    """
+    Prédiction d'une seule commande sans DataFrame ni pipeline sklearn
+
+    Les paramètres du préprocesseur (valeurs d'imputation, centrage,
+    catégories du one-hot) sont résolus une fois au chargement: une
+    prédiction remplit un buffer préalloué (un par thread) et appelle
+    directement le booster XGBoost. Comme le ColumnTransformer, une sortie
+    creuse laisse les zéros absents (valeurs manquantes pour XGBoost).
+
+    Supporte la structure du notebook: ColumnTransformer de SimpleImputer,
+    StandardScaler et OneHotEncoder(handle_unknown='ignore'), puis XGBoost.
+    Toute autre structure lève ValueError à la construction.
+    """
+
+    def __init__(self, pipeline):
+        from sklearn.compose import ColumnTransformer
+        from sklearn.impute import SimpleImputer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+        from xgboost import XGBModel
+
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            raise ValueError("pipeline préprocesseur + modèle attendu")
+        preprocess, model = pipeline.steps[0][1], pipeline.steps[1][1]
+        if not isinstance(preprocess, ColumnTransformer) or not isinstance(model, XGBModel):
+            raise ValueError("ColumnTransformer + XGBoost attendus")
+
+        # Blocs numériques: (noms, valeurs d'imputation, moyennes, échelles, indices de sortie)
+        self.numeric_blocks = []
+        # Colonnes catégorielles: (nom, valeur d'imputation, {catégorie: indice de sortie})
+        self.categorical_columns = []
+        offset = 0
+
+        for _, transformer, columns in preprocess.transformers_:
+            if isinstance(transformer, str) and transformer == 'drop':
+                continue
+            columns = list(columns)
+            if not columns:
+                continue
+            if not all(isinstance(column, str) for column in columns):
+                raise ValueError("colonnes désignées par leur nom attendues")
+
+            steps = transformer.steps if isinstance(transformer, Pipeline) else [(None, transformer)]
+            fills, means, scales, encoder = None, None, None, None
+            for _, step in steps:
+                if step is None or (isinstance(step, str) and step == 'passthrough'):
+                    continue
+                if encoder is not None:
+                    raise ValueError("le one-hot doit être la dernière étape")
+                if isinstance(step, SimpleImputer):
+                    if fills is not None or means is not None or step.add_indicator or not pd.isna(step.missing_values):
+                        raise ValueError("imputation non supportée")
+                    fills = step.statistics_
+                    # Une colonne vide à l'entraînement est retirée de la sortie
+                    if pd.isna(fills).any():
+                        raise ValueError("colonne sans valeur d'imputation")
+                elif isinstance(step, StandardScaler):
+                    if means is not None:
+                        raise ValueError("normalisation non supportée")
+                    means = step.mean_ if step.with_mean else np.zeros(len(columns))
+                    scales = step.scale_ if step.with_std else np.ones(len(columns))
+                elif isinstance(step, OneHotEncoder):
+                    if step.drop is not None or step.handle_unknown != 'ignore' or getattr(step, '_infrequent_enabled', False):
+                        raise ValueError("one-hot non supporté")
+                    encoder = step
+                else:
+                    raise ValueError(f"étape non supportée: {type(step).__name__}")
+
+            if encoder is not None:
+                if means is not None:
+                    raise ValueError("normalisation avant one-hot non supportée")
+                for i, (column, categories) in enumerate(zip(columns, encoder.categories_)):
+                    index = {category: offset + j for j, category in enumerate(categories)}
+                    self.categorical_columns.append((column, None if fills is None else fills[i], index))
+                    offset += len(categories)
+            else:
+                n = len(columns)
+                self.numeric_blocks.append((
+                    columns,
+                    None if fills is None else np.asarray(fills, dtype=float),
+                    means,
+                    scales,
+                    np.arange(offset, offset + n)
+                ))
+                offset += n
+
+        if offset != model.n_features_in_:
+            raise ValueError(f"{offset} colonnes préparées pour {model.n_features_in_} attendues")
+
+        self.n_outputs = offset
+        self.sparse = bool(getattr(preprocess, 'sparse_output_', False))
+        self.booster = model.get_booster()
+        self.missing = model.missing
+        try:
+            self.iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+        self._local = threading.local()
+
+    def _buffer(self):
+        """Buffer de features du thread courant, alloué à la première prédiction"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty((1, self.n_outputs), dtype=np.float32)
+        return buffer
+
+    def predict(self, features):
+        """
+        Prédit le délai d'une commande
+
+        Args:
+            features: Dict nom -> valeur (voir prepare_features); une feature absente vaut 0
+
+        Returns:
+            Délai prédit (float32 brut du modèle, avant plancher à 0)
+        """
+        buffer = self._buffer()
+        buffer.fill(np.nan if self.sparse else 0.0)
+        row = buffer[0]
+
+        for columns, fills, means, scales, positions in self.numeric_blocks:
+            values = np.array([
+                np.nan if (value := features.get(column, 0)) is None else float(value)
+                for column in columns
+            ])
+            if fills is not None:
+                values = np.where(np.isnan(values), fills, values)
+            if means is not None:
+                values = (values - means) / scales
+            if self.sparse:
+                values[values == 0] = np.nan
+            row[positions] = values
+
+        for column, fill, index in self.categorical_columns:
+            value = features.get(column, 0)
+            # Comme SimpleImputer: seul NaN est manquant (None reste une catégorie inconnue)
+            if fill is not None and value != value:
+                value = fill
+            position = index.get(value)
+            if position is not None:
+                row[position] = 1.0
+
+        return self.booster.inplace_predict(
+            buffer,
+            iteration_range=self.iteration_range,
+            missing=self.missing,
+            validate_features=False
+        )[0]
+
+
 class ShippingForecastModel:
     """Modèle de prédiction des délais de livraison"""
     
     def __init__(self):
-        # Chemin absolu vers le dossier models
-        current_dir = Path(__file__).parent.parent  # streamlit_app/
-        self.model_dir = current_dir / "models" / "shipping_forecast"
+        self.model_dir = MODEL_DIR
         
         self.pipeline = None
         self.feature_names = None
         self.seller_avg_dispatch = None
         self.global_avg_dispatch = None
+        self.seller_dispatch = None
         self.config = None
+        self.row_predictor = None
         
         # Charger le modèle
         self._load_model()
@@ -76,6 +286,12 @@ class ShippingForecastModel:
                 self.pipeline = None
                 return
             
+            # Délais par vendeur en tableaux indexés, avec les mises à jour déjà intégrées
+            artifact = artifact_fingerprint(seller_path, global_path)
+            self.seller_dispatch = SellerDispatchStats.load(artifact) or SellerDispatchStats.from_artifact(
+                self.seller_avg_dispatch, self.global_avg_dispatch, artifact=artifact
+            )
+            
             # 5. Charger la config
             config_path = self.model_dir / "config.json"
             if config_path.exists():
@@ -85,6 +301,9 @@ class ShippingForecastModel:
             else:
                 print(f"⚠️ Fichier config introuvable (optionnel): {config_path}")
             
+            # 6. Chemin rapide pour une seule commande (optionnel)
+            self.row_predictor = self._build_row_predictor()
+            
             # Résumé final
             print("\n" + "="*60)
             print("✅ MODÈLE DE PRÉDICTION DES LIVRAISONS CHARGÉ")
@@ -101,6 +320,44 @@ class ShippingForecastModel:
             traceback.print_exc()
             self.pipeline = None
     
+    def _build_row_predictor(self):
+        """
+        Prédicteur d'une seule commande, retenu s'il reproduit exactement le pipeline
+
+        Contrôlé sur la commande par défaut et les données de test du notebook;
+        None (pipeline utilisé) si la structure n'est pas supportée ou en cas d'écart.
+        """
+        try:
+            predictor = SingleRowPredictor(self.pipeline)
+        except Exception as e:
+            print(f"⚠️ Chemin rapide indisponible, pipeline utilisé: {e}")
+            return None
+        
+        samples = [self._feature_values({})]
+        test_path = self.model_dir / "test_data.pkl"
+        if test_path.exists():
+            try:
+                with open(test_path, 'rb') as f:
+                    X_test = pickle.load(f)['X_test']
+                samples += X_test.to_dict('records')
+            except Exception as e:
+                print(f"⚠️ Données de test illisibles: {e}")
+        
+        try:
+            # Les lignes sont transformées indépendamment: un seul appel du pipeline
+            expected = self.pipeline.predict(pd.concat([self._features_frame(sample) for sample in samples]))
+            actual = np.array([predictor.predict(sample) for sample in samples])
+        except Exception as e:
+            print(f"⚠️ Chemin rapide écarté: {e}")
+            return None
+        
+        if not np.array_equal(expected, actual):
+            print(f"⚠️ Chemin rapide écarté: écart maximal {np.max(np.abs(expected - actual)):.6f} avec le pipeline")
+            return None
+        
+        print(f"✅ Chemin rapide validé sur {len(samples)} commandes")
+        return predictor
+    
     def is_model_loaded(self):
         """Vérifie si le modèle est chargé"""
         return self.pipeline is not None
@@ -143,7 +400,10 @@ class ShippingForecastModel:
         if not self.is_model_loaded():
             return None
         
-        # Créer le dictionnaire de features
+        return self._features_frame(self._feature_values(order_data, geolocation_data))
+    
+    def _feature_values(self, order_data, geolocation_data=None):
+        """Dictionnaire des features d'une commande (voir prepare_features)"""
         features = {}
         
         # Features temporelles
@@ -215,13 +475,12 @@ class ShippingForecastModel:
         features['seller_state_geo'] = order_data.get('seller_state_geo', 'SP')
         
         # Feature clé: seller_avg_dispatch
-        seller_id = order_data.get('seller_id')
-        if seller_id and seller_id in self.seller_avg_dispatch.index:
-            features['seller_avg_dispatch'] = self.seller_avg_dispatch[seller_id]
-        else:
-            features['seller_avg_dispatch'] = self.global_avg_dispatch
+        features['seller_avg_dispatch'] = self.seller_dispatch.get(order_data.get('seller_id'))
         
-        # Créer le DataFrame
+        return features
+    
+    def _features_frame(self, features):
+        """DataFrame d'une ligne dans l'ordre de feature_names, features absentes à 0"""
         df = pd.DataFrame([features])
         
         # S'assurer que toutes les features requises sont présentes
@@ -232,6 +491,88 @@ class ShippingForecastModel:
         # Retourner seulement les features utilisées par le modèle, dans le bon ordre
         return df[self.feature_names]
     
+    def prepare_features_batch(self, orders_df, geolocation_df=None):
+        """
+        Prépare les features de plusieurs commandes par opérations sur colonnes
+
+        Mêmes règles que prepare_features, appliquées à toutes les lignes:
+        une colonne absente prend la valeur par défaut, une colonne présente
+        est utilisée telle quelle.
+
+        Args:
+            orders_df: DataFrame des commandes (mêmes clés que order_data)
+            geolocation_df: DataFrame optionnel aligné sur orders_df avec
+                customer_lat, customer_lng, seller_lat, seller_lng
+
+        Returns:
+            DataFrame avec les features préparées (une ligne par commande)
+        """
+        if not self.is_model_loaded():
+            return None
+
+        n = len(orders_df)
+
+        def column(name, default):
+            if name in orders_df.columns:
+                return orders_df[name].to_numpy()
+            return np.full(n, default, dtype=object if isinstance(default, str) else None)
+
+        features = {}
+
+        # Features temporelles
+        if 'purchase_date' in orders_df.columns:
+            purchase_date = pd.to_datetime(orders_df['purchase_date'])
+        else:
+            purchase_date = pd.Series(pd.Timestamp(datetime.now()), index=orders_df.index)
+        features['purchase_dayofweek'] = purchase_date.dt.dayofweek.to_numpy()
+        features['purchase_month'] = purchase_date.dt.month.to_numpy()
+        month = purchase_date.dt.month.fillna(9).astype(int).to_numpy()
+        features['purchase_season'] = MONTH_SEASONS[month - 1]
+
+        features['time_to_approve_order'] = column('time_to_approve_order', ORDER_DEFAULTS['time_to_approve_order'])
+
+        # Features géographiques (distance par défaut si une coordonnée manque)
+        distance = np.full(n, float(DEFAULT_DISTANCE_KM))
+        if geolocation_df is not None:
+            coords = [
+                pd.to_numeric(geolocation_df[col], errors='coerce').to_numpy(dtype=float)
+                for col in ('customer_lat', 'customer_lng', 'seller_lat', 'seller_lng')
+            ]
+            valid = np.logical_and.reduce([~np.isnan(c) & (c != 0) for c in coords])
+            distance[valid] = haversine_distances(*(c[valid] for c in coords))
+        features['distance_customer_seller'] = distance
+        features['circuity_distance'] = distance * CIRCUITY_FACTOR
+
+        # Features de commande et produit
+        for name, default in ORDER_DEFAULTS.items():
+            if name != 'time_to_approve_order':
+                features[name] = column(name, default)
+
+        features['product_volume_cm3'] = (
+            features['product_length_cm'] *
+            features['product_height_cm'] *
+            features['product_width_cm']
+        )
+
+        # Features catégorielles
+        for name, default in CATEGORICAL_DEFAULTS.items():
+            features[name] = column(name, default)
+
+        # Feature clé: seller_avg_dispatch (moyenne globale pour un vendeur inconnu)
+        if 'seller_id' in orders_df.columns:
+            features['seller_avg_dispatch'] = self.seller_dispatch.lookup(orders_df['seller_id'])
+        else:
+            features['seller_avg_dispatch'] = np.full(n, self.seller_dispatch.global_mean)
+
+        df = pd.DataFrame(features, index=orders_df.index)
+
+        # Features non calculées: 0, comme dans prepare_features
+        missing = {name: 0 for name in self.feature_names if name not in df.columns}
+        if missing:
+            df = df.assign(**missing)
+
+        return df[self.feature_names]
+
     def predict(self, order_data, geolocation_data=None):
         """
         Prédit le délai de livraison pour une commande
@@ -248,13 +589,20 @@ class ShippingForecastModel:
         
         try:
             # Préparer les features
-            X = self.prepare_features(order_data, geolocation_data)
+            features = self._feature_values(order_data, geolocation_data)
             
-            if X is None:
-                return None
+            # Chemin rapide (buffer + booster); à la première erreur il est
+            # désactivé pour la durée du processus et le pipeline prend le relais
+            prediction = None
+            if self.row_predictor is not None:
+                try:
+                    prediction = self.row_predictor.predict(features)
+                except Exception as e:
+                    print(f"⚠️ Chemin rapide de prédiction désactivé, pipeline utilisé: {e}")
+                    self.row_predictor = None
             
-            # Prédire
-            prediction = self.pipeline.predict(X)[0]
+            if prediction is None:
+                prediction = self.pipeline.predict(self._features_frame(features))[0]
             
             # S'assurer que c'est >= 0
             prediction = max(0, prediction)
@@ -267,12 +615,13 @@ class ShippingForecastModel:
             traceback.print_exc()
             return None
     
-    def predict_batch(self, orders_df):
+    def predict_batch(self, orders_df, geolocation_df=None):
         """
         Prédit les délais de livraison pour plusieurs commandes
         
         Args:
             orders_df: DataFrame avec les commandes
+            geolocation_df: DataFrame optionnel des coordonnées (voir prepare_features_batch)
         
         Returns:
             Array: Délais de livraison prédits
@@ -281,25 +630,271 @@ class ShippingForecastModel:
             return None
         
         try:
-            predictions = []
-            
-            for idx, row in orders_df.iterrows():
-                order_data = row.to_dict()
-                prediction = self.predict(order_data)
-                predictions.append(prediction)
-            
-            return np.array(predictions)
+            X = self.prepare_features_batch(orders_df, geolocation_df)
+            if X is None:
+                return None
+
+            # Un seul appel du pipeline pour tout le lot
+            return np.maximum(self.pipeline.predict(X), 0)
         
         except Exception as e:
             print(f"❌ Erreur lors de la prédiction batch: {e}")
             return None
 
 
+# ========================================
+# PRÉDICTION PAR LOT (FICHIERS CSV)
+# ========================================
+
+# Lignes préparées et prédites à la fois (mémoire bornée, progression affichable)
+BATCH_CHUNK_ROWS = 10_000
+
+# Colonnes d'un fichier de prédiction par lot et valeur si la colonne est absente
+BATCH_DEFAULTS = {
+    'customer_zip_code_prefix': 10000,
+    'seller_zip_code_prefix': 10000,
+    'product_weight_g': 500,
+    'price': 100.0,
+    'product_length_cm': 20,
+    'product_width_cm': 15,
+    'product_height_cm': 10,
+    'num_items': 1,
+    'num_unique_sellers': 1,
+    'num_payments': 1,
+    'product_category_name': 'None',
+    'product_name_lenght': 50,
+    'product_description_lenght': 500,
+}
+
+
+def batch_orders_frame(df_batch, purchase_date=None):
+    """
+    Commandes d'un fichier de prédiction par lot, colonnes absentes complétées
+
+    Une colonne présente est utilisée telle quelle; les valeurs par défaut des
+    colonnes dérivées suivent les colonnes fournies (frais = 15% du prix,
+    états géographiques = états de la commande, ...).
+    """
+    def column(name, default):
+        if name in df_batch.columns:
+            return df_batch[name]
+        return pd.Series(default, index=df_batch.index)
+
+    customer_state = column('customer_state', 'SP')
+    seller_state = column('seller_state', 'SP')
+    price = column('price', BATCH_DEFAULTS['price'])
+
+    orders = pd.DataFrame({
+        'seller_id': column('seller_id', None),
+        'customer_state': customer_state,
+        'seller_state': seller_state,
+        **{name: column(name, default) for name, default in BATCH_DEFAULTS.items()},
+        'freight_value': column('freight_value', price * 0.15),
+        'total_freight_value': column('total_freight_value', column('freight_value', 15.0)),
+        'total_payment_value': column('total_payment_value', price),
+        'purchase_date': pd.Timestamp(purchase_date or datetime.now()),
+        'customer_state_geo': column('customer_state_geo', customer_state),
+        'seller_state_geo': column('seller_state_geo', seller_state),
+    }, index=df_batch.index)
+    return orders
+
+
+def score_batch(model, df_batch, zip_centroids, chunk_size=BATCH_CHUNK_ROWS, progress=None, purchase_date=None):
+    """
+    Prédit les délais d'un fichier de commandes par blocs vectorisés
+
+    Args:
+        model: ShippingForecastModel chargé
+        df_batch: DataFrame du fichier (colonnes optionnelles, voir BATCH_DEFAULTS)
+        zip_centroids: ZipCentroids pour les coordonnées client et vendeur
+        chunk_size: Lignes préparées et prédites par appel du modèle
+        progress: Fonction optionnelle appelée avec (lignes traitées, total)
+        purchase_date: Date d'achat appliquée aux commandes (défaut: maintenant)
+
+    Returns:
+        Tuple (délais prédits, distances en km), tableaux alignés sur df_batch
+    """
+    orders = batch_orders_frame(df_batch, purchase_date)
+
+    customer_lat, customer_lng = zip_centroids.lookup(orders['customer_zip_code_prefix'], orders['customer_state'])
+    seller_lat, seller_lng = zip_centroids.lookup(orders['seller_zip_code_prefix'], orders['seller_state'])
+    geolocation = pd.DataFrame({
+        'customer_lat': customer_lat,
+        'customer_lng': customer_lng,
+        'seller_lat': seller_lat,
+        'seller_lng': seller_lng
+    }, index=orders.index)
+    distances = haversine_distances(customer_lat, customer_lng, seller_lat, seller_lng)
+
+    total = len(orders)
+    predictions = np.full(total, np.nan)
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        chunk_predictions = model.predict_batch(orders.iloc[start:stop], geolocation.iloc[start:stop])
+        if chunk_predictions is not None:
+            predictions[start:stop] = chunk_predictions
+        if progress is not None:
+            progress(stop, total)
+
+    return predictions, distances
+
+
+
+def score_csv_stream(model, source, destination, zip_centroids, fmt='csv',
+                     chunk_size=BATCH_CHUNK_ROWS, progress=None, preview_rows=100):
+    """
+    Prédit les délais d'un fichier CSV lu et écrit bloc par bloc
+
+    Un seul bloc de chunk_size lignes est en mémoire à la fois: chaque bloc lu
+    est prédit (score_batch) puis ajouté au fichier de sortie avec les colonnes
+    predicted_delivery_days et distance_km.
+
+    Args:
+        model: ShippingForecastModel chargé
+        source: Chemin ou fichier binaire (ex. fichier uploadé) au format CSV
+        destination: Fichier de sortie (remplacé s'il existe)
+        zip_centroids: ZipCentroids pour les coordonnées client et vendeur
+        fmt: 'csv' ou 'parquet'
+        chunk_size: Lignes lues, prédites et écrites par bloc
+        progress: Fonction optionnelle appelée avec (lignes traitées, fraction du fichier lue)
+        preview_rows: Lignes du début du résultat conservées pour l'aperçu
+
+    Returns:
+        dict: lignes traitées et prédites, délais moyen/min/max, aperçu
+    """
+    handle = open(source, 'rb') if isinstance(source, (str, Path)) else source
+    handle.seek(0, os.SEEK_END)
+    total_bytes = handle.tell()
+    handle.seek(0)
+
+    # Une seule date d'achat pour tout le fichier, comme en lecture complète
+    purchase_date = datetime.now()
+    writer = TableWriter(destination, fmt, widen_numeric=True)
+    predicted = 0
+    days_sum = 0.0
+    days_min, days_max = np.inf, -np.inf
+    preview = None
+
+    try:
+        for chunk in pd.read_csv(handle, chunksize=chunk_size):
+            predictions, distances = score_batch(
+                model, chunk, zip_centroids, chunk_size=chunk_size, purchase_date=purchase_date
+            )
+            chunk['predicted_delivery_days'] = predictions
+            chunk['distance_km'] = distances
+            writer.write(chunk)
+
+            valid = predictions[~np.isnan(predictions)]
+            if len(valid):
+                predicted += len(valid)
+                days_sum += valid.sum()
+                days_min = min(days_min, valid.min())
+                days_max = max(days_max, valid.max())
+            if preview is None:
+                preview = chunk.head(preview_rows)
+
+            if progress is not None:
+                progress(writer.rows, handle.tell() / max(total_bytes, 1))
+    finally:
+        writer.close()
+        if handle is not source:
+            handle.close()
+
+    return {
+        'rows': writer.rows,
+        'predicted': predicted,
+        'mean_days': days_sum / predicted if predicted else np.nan,
+        'min_days': days_min if predicted else np.nan,
+        'max_days': days_max if predicted else np.nan,
+        'preview': preview if preview is not None else pd.DataFrame(),
+    }
+
+# Résultats des prédictions par lot en streaming, gardés sur disque pour le téléchargement
+BATCH_OUTPUT_MAX_AGE_HOURS = 24
+BATCH_DOWNLOAD_MAX_MB = 200
+
+
+def get_batch_output_dir():
+    """Dossier des fichiers de résultats par lot (dans le cache columnaire)"""
+    return get_cache_dir(DATA_PATH / "olist_orders_dataset.csv") / "batch_predictions"
+
+
+def get_batch_download_limit():
+    """Taille maximale (octets) d'un résultat proposé au téléchargement"""
+    return float(get_app_settings().get('batch_download_max_mb', BATCH_DOWNLOAD_MAX_MB)) * 1024 ** 2
+
+
+def new_batch_output_path(fmt):
+    """
+    Chemin d'un nouveau fichier de résultats par lot
+
+    Les fichiers plus anciens que batch_output_max_age_hours (sessions
+    fermées sans nouveau lancement) sont supprimés au passage.
+    """
+    output_dir = get_batch_output_dir()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    max_age = float(get_app_settings().get('batch_output_max_age_hours', BATCH_OUTPUT_MAX_AGE_HOURS)) * 3600
+    now = time.time()
+    for stale in output_dir.glob("predictions_delivery_*"):
+        try:
+            if now - stale.stat().st_mtime > max_age:
+                stale.unlink()
+        except OSError:
+            pass
+
+    return output_dir / f"predictions_delivery_{os.getpid()}_{time.time_ns()}.{fmt}"
+
 # ========================================
 # FONCTION POUR STREAMLIT
 # ========================================
 
 @st.cache_resource
-def get_shipping_forecast_model():
-    """Retourne une instance du modèle de prédiction (cached)"""
+def _load_shipping_forecast_model():
     return ShippingForecastModel()
+
+
+def get_shipping_forecast_model():
+    """Retourne une instance du modèle de prédiction (cached), délais d'expédition à jour des commandes"""
+    model = _load_shipping_forecast_model()
+    if model.is_model_loaded() and is_dispatch_update_enabled():
+        # Vérification des commandes espacée: cet accès est sur le chemin de chaque prédiction
+        model.seller_dispatch.refresh_if_due(get_refresh_interval())
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prédit les délais de livraison d'un fichier CSV de commandes")
+    parser.add_argument('--input', required=True, help="fichier CSV de commandes")
+    parser.add_argument('--output', required=True, help="fichier de résultat")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='parquet', help="format du résultat")
+    parser.add_argument('--chunk-rows', type=int, default=BATCH_CHUNK_ROWS, help="lignes par bloc")
+    args = parser.parse_args(argv)
+
+    # Hors serveur, Streamlit signale l'absence de runtime pour chaque fonction mise en cache importée
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+
+    from utils.geolocation import get_zip_centroids
+
+    model = ShippingForecastModel()
+    if not model.is_model_loaded():
+        return 1
+
+    start = time.perf_counter()
+    summary = score_csv_stream(
+        model,
+        args.input,
+        args.output,
+        get_zip_centroids(),
+        fmt=args.format,
+        chunk_size=args.chunk_rows
+    )
+    print(f"✅ {summary['rows']:,} lignes, {summary['predicted']:,} prédictions "
+          f"(délai moyen {summary['mean_days']:.1f} jours) → {args.output}")
+    print(f"⏱️ Total: {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,515 @@
+"""
+Générateur de données Olist synthétiques (tests de charge et benchmarks)
+
+Produit les tables Olist avec le même schéma que les CSV d'origine, à une
+échelle configurable (1 = volumes du dataset public, ~99k commandes), avec
+des distributions réalistes: produits par catégorie (loi de puissance),
+popularité des produits et des vendeurs, items par commande, notes
+asymétriques (et plus basses en cas de retard), délais de livraison
+log-normaux, répartition des clients par état.
+
+Les commandes sont générées par blocs et écrites au fil de l'eau (CSV ou
+Parquet): la mémoire utilisée dépend de la taille des blocs, pas de l'échelle.
+Depuis le dossier streamlit_app:
+
+    python -m utils.synthetic_data --scale 10 --output ../Data_x10 [--format parquet] [--geolocation]
+
+puis OLIST_DATA_DIR=../Data_x10 streamlit run app.py (sortie CSV).
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_cache import TableWriter
+from utils.data_loader import DEFAULT_DATA_PATH
+
+# Volumes du dataset public (échelle 1)
+BASE_COUNTS = {
+    'orders': 99_441,
+    'products': 32_951,
+    'sellers': 3_095,
+    'geolocation_prefixes': 19_015,
+}
+GEOLOCATION_POINTS_PER_PREFIX = 52
+CHUNK_ORDERS = 100_000
+TIME_RANGE = (pd.Timestamp('2016-09-04'), pd.Timestamp('2018-10-17'))
+
+# État -> (poids clients, poids vendeurs, plage de préfixes postaux, capitale, (lat, lng))
+STATES = {
+    'SP': (41.9, 59.7, (1000, 19999), 'sao paulo', (-23.55, -46.63)),
+    'RJ': (12.9, 5.5, (20000, 28999), 'rio de janeiro', (-22.91, -43.17)),
+    'MG': (11.7, 7.9, (30000, 39999), 'belo horizonte', (-19.92, -43.94)),
+    'RS': (5.5, 4.3, (90000, 99999), 'porto alegre', (-30.03, -51.23)),
+    'PR': (5.1, 11.3, (80000, 87999), 'curitiba', (-25.42, -49.27)),
+    'SC': (3.7, 6.1, (88000, 89999), 'florianopolis', (-27.59, -48.55)),
+    'BA': (3.4, 0.6, (40000, 48999), 'salvador', (-12.97, -38.51)),
+    'DF': (2.2, 1.0, (70000, 72799), 'brasilia', (-15.79, -47.88)),
+    'ES': (2.0, 0.8, (29000, 29999), 'vitoria', (-20.32, -40.34)),
+    'GO': (2.0, 1.3, (72800, 76799), 'goiania', (-16.68, -49.25)),
+    'PE': (1.7, 0.3, (50000, 56999), 'recife', (-8.05, -34.88)),
+    'CE': (1.3, 0.4, (60000, 63999), 'fortaleza', (-3.73, -38.52)),
+    'PA': (1.0, 0.1, (66000, 68899), 'belem', (-1.46, -48.49)),
+    'MT': (0.9, 0.1, (78000, 78899), 'cuiaba', (-15.60, -56.10)),
+    'MA': (0.7, 0.05, (65000, 65999), 'sao luis', (-2.53, -44.30)),
+    'MS': (0.7, 0.1, (79000, 79999), 'campo grande', (-20.47, -54.62)),
+    'PB': (0.5, 0.2, (58000, 58999), 'joao pessoa', (-7.12, -34.86)),
+    'PI': (0.5, 0.05, (64000, 64999), 'teresina', (-5.09, -42.80)),
+    'RN': (0.5, 0.2, (59000, 59999), 'natal', (-5.79, -35.21)),
+    'AL': (0.4, 0.05, (57000, 57999), 'maceio', (-9.67, -35.74)),
+    'SE': (0.3, 0.05, (49000, 49999), 'aracaju', (-10.91, -37.07)),
+    'TO': (0.3, 0.05, (77000, 77999), 'palmas', (-10.18, -48.33)),
+    'RO': (0.25, 0.05, (76800, 76999), 'porto velho', (-8.76, -63.90)),
+    'AM': (0.15, 0.05, (69000, 69299), 'manaus', (-3.12, -60.02)),
+    'AC': (0.08, 0.01, (69900, 69999), 'rio branco', (-9.97, -67.81)),
+    'AP': (0.07, 0.01, (68900, 68999), 'macapa', (0.03, -51.07)),
+    'RR': (0.05, 0.01, (69300, 69399), 'boa vista', (2.82, -60.67)),
+}
+
+ORDER_STATUSES = {
+    'delivered': 97.0,
+    'shipped': 1.1,
+    'canceled': 0.6,
+    'unavailable': 0.6,
+    'invoiced': 0.3,
+    'processing': 0.3,
+    'approved': 0.1,
+}
+ITEMS_PER_ORDER = {1: 90.1, 2: 7.6, 3: 1.3, 4: 0.5, 5: 0.2, 6: 0.3}
+REVIEW_SCORES = {1: 11.5, 2: 3.2, 3: 8.2, 4: 19.3, 5: 57.8}
+LATE_REVIEW_SCORES = {1: 45.0, 2: 10.0, 3: 15.0, 4: 12.0, 5: 18.0}
+PAYMENT_TYPES = {'credit_card': 74.0, 'boleto': 19.0, 'voucher': 5.5, 'debit_card': 1.5}
+
+REVIEW_MESSAGES = {
+    'positive': [
+        'Produto chegou antes do prazo, recomendo',
+        'Excelente qualidade, muito satisfeito',
+        'Entrega rápida e produto conforme anunciado',
+        'Ótimo produto, bem embalado',
+    ],
+    'neutral': [
+        'Produto ok, mas a embalagem veio danificada',
+        'Dentro do esperado',
+        'Demorou um pouco mas chegou',
+    ],
+    'negative': [
+        'Produto não chegou até agora',
+        'Veio com defeito, quero devolver',
+        'Péssimo atendimento, não recomendo',
+        'Recebi o produto errado',
+    ],
+}
+
+# Catégories utilisées si la table de traduction n'est pas disponible
+DEFAULT_CATEGORIES = {
+    'cama_mesa_banho': 'bed_bath_table',
+    'beleza_saude': 'health_beauty',
+    'esporte_lazer': 'sports_leisure',
+    'moveis_decoracao': 'furniture_decor',
+    'informatica_acessorios': 'computers_accessories',
+    'utilidades_domesticas': 'housewares',
+    'relogios_presentes': 'watches_gifts',
+    'telefonia': 'telephony',
+    'ferramentas_jardim': 'garden_tools',
+    'automotivo': 'auto',
+    'brinquedos': 'toys',
+    'cool_stuff': 'cool_stuff',
+    'perfumaria': 'perfumery',
+    'bebes': 'baby',
+    'eletronicos': 'electronics',
+}
+
+TRANSLATION_FILE = "product_category_name_translation.csv"
+
+
+def _weights(mapping):
+    """Clés et probabilités normalisées d'un dict de poids"""
+    keys = list(mapping)
+    weights = np.array([mapping[k] for k in keys], dtype=float)
+    return keys, weights / weights.sum()
+
+
+def _power_law(n, exponent, rng):
+    """Probabilités décroissantes (rang^-exposant) attribuées dans un ordre aléatoire"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return rng.permutation(weights / weights.sum())
+
+
+def _splitmix64(values):
+    """Hash 64 bits vectorisé (identifiants et tirages déterministes par indice)"""
+    z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def make_ids(kind, index):
+    """Identifiants hexadécimaux de 32 caractères, stables pour (type, indice)"""
+    index = np.asarray(index, dtype=np.uint64)
+    salt = np.uint64(sum(ord(c) << (8 * i) for i, c in enumerate(kind[:8])))
+    high = _splitmix64(index ^ salt)
+    low = _splitmix64(high ^ index)
+    return [f'{h:016x}{l:016x}' for h, l in zip(high.tolist(), low.tolist())]
+
+
+def _uniform(kind, index):
+    """Tirage uniforme [0, 1) déterministe par indice"""
+    salt = np.uint64(sum(ord(c) << (8 * i) for i, c in enumerate(kind[:8])))
+    return (_splitmix64(np.asarray(index, dtype=np.uint64) ^ salt) >> np.uint64(11)) / float(1 << 53)
+
+
+def _zip_prefixes(states, rng):
+    """Préfixes postaux tirés dans la plage de chaque état"""
+    low = np.array([STATES[s][2][0] for s in states])
+    high = np.array([STATES[s][2][1] for s in states])
+    return rng.integers(low, high + 1)
+
+
+def load_categories(source_dir=None):
+    """Table de traduction des catégories (source si disponible, sinon liste intégrée)"""
+    path = Path(source_dir or DEFAULT_DATA_PATH) / TRANSLATION_FILE
+    if path.exists():
+        return pd.read_csv(path, encoding='utf-8-sig')
+    return pd.DataFrame({
+        'product_category_name': list(DEFAULT_CATEGORIES),
+        'product_category_name_english': list(DEFAULT_CATEGORIES.values())
+    })
+
+
+class SyntheticOlist:
+    """Générateur des tables Olist à une échelle donnée"""
+
+    def __init__(self, scale=1.0, seed=42, source_dir=None):
+        self.scale = scale
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+        self.n_orders = max(1, int(BASE_COUNTS['orders'] * scale))
+        self.n_products = max(1, int(BASE_COUNTS['products'] * scale))
+        self.n_sellers = max(1, int(BASE_COUNTS['sellers'] * scale))
+        # Environ 3% des commandes proviennent de clients déjà venus
+        self.n_unique_customers = max(1, int(self.n_orders * 0.97))
+
+        self.translation = load_categories(source_dir)
+        self.categories = self.translation['product_category_name'].to_numpy()
+        self.category_probs = _power_law(len(self.categories), 0.9, self.rng)
+
+        # Popularité des produits et des vendeurs (quelques best-sellers, longue traîne)
+        self.product_cdf = np.cumsum(_power_law(self.n_products, 0.8, self.rng))
+        self.seller_cdf = np.cumsum(_power_law(self.n_sellers, 1.0, self.rng))
+
+        self.state_names = list(STATES)
+        self.customer_state_probs = np.array([STATES[s][0] for s in self.state_names])
+        self.customer_state_probs /= self.customer_state_probs.sum()
+        self.seller_state_probs = np.array([STATES[s][1] for s in self.state_names])
+        self.seller_state_probs /= self.seller_state_probs.sum()
+
+    # ---- Tables de référence -------------------------------------------
+
+    def products(self, start, stop):
+        """Produits [start, stop)"""
+        n = stop - start
+        index = np.arange(start, stop)
+        rng = np.random.default_rng([self.seed, 1, start])
+        weight = np.round(rng.lognormal(6.6, 1.1, n)).clip(50, 40000)
+        side = np.cbrt(weight).clip(5, 100)
+        return pd.DataFrame({
+            'product_id': make_ids('product', index),
+            'product_category_name': rng.choice(self.categories, n, p=self.category_probs),
+            'product_name_lenght': rng.integers(10, 77, n),
+            'product_description_lenght': np.round(rng.lognormal(6.4, 0.7, n)).clip(4, 3992).astype(int),
+            'product_photos_qty': rng.choice([1, 2, 3, 4, 5, 6], n, p=[.5, .2, .12, .08, .05, .05]),
+            'product_weight_g': weight.astype(int),
+            'product_length_cm': np.round(side * rng.uniform(1.0, 2.2, n)).clip(7, 105).astype(int),
+            'product_height_cm': np.round(side * rng.uniform(0.4, 1.2, n)).clip(2, 105).astype(int),
+            'product_width_cm': np.round(side * rng.uniform(0.8, 1.6, n)).clip(6, 118).astype(int),
+        })
+
+    def sellers(self):
+        """Vendeurs"""
+        rng = np.random.default_rng([self.seed, 2])
+        states = rng.choice(self.state_names, self.n_sellers, p=self.seller_state_probs)
+        return pd.DataFrame({
+            'seller_id': make_ids('seller', np.arange(self.n_sellers)),
+            'seller_zip_code_prefix': _zip_prefixes(states, rng),
+            'seller_city': [STATES[s][3] for s in states],
+            'seller_state': states,
+        })
+
+    def geolocation(self, start, stop):
+        """Points de géolocalisation des préfixes [start, stop)"""
+        rng = np.random.default_rng([self.seed, 3, start])
+        n_prefixes = stop - start
+        states = rng.choice(self.state_names, n_prefixes, p=self.customer_state_probs)
+        prefixes = _zip_prefixes(states, rng)
+        centers = np.array([STATES[s][4] for s in states]) + rng.normal(0, 1.0, (n_prefixes, 2))
+
+        points = rng.poisson(GEOLOCATION_POINTS_PER_PREFIX, n_prefixes).clip(1)
+        rows = np.repeat(np.arange(n_prefixes), points)
+        return pd.DataFrame({
+            'geolocation_zip_code_prefix': prefixes[rows],
+            'geolocation_lat': centers[rows, 0] + rng.normal(0, 0.03, len(rows)),
+            'geolocation_lng': centers[rows, 1] + rng.normal(0, 0.03, len(rows)),
+            'geolocation_city': [STATES[s][3] for s in states[rows]],
+            'geolocation_state': states[rows],
+        })
+
+    # ---- Commandes et tables associées ---------------------------------
+
+    def _purchase_times(self, n, rng):
+        """Dates d'achat avec une croissance de l'activité dans le temps"""
+        start, end = TIME_RANGE
+        span = (end - start).total_seconds()
+        u = rng.random(n)
+        # Mélange uniforme / densité croissante (activité ~ x4 sur la période)
+        position = np.where(rng.random(n) < 0.4, u, np.sqrt(u))
+        return start + pd.to_timedelta(position * span, unit='s').floor('s')
+
+    def order_chunk(self, start, stop):
+        """
+        Commandes [start, stop) et lignes associées
+
+        Returns:
+            Dict table -> DataFrame (customers, orders, order_items, order_payments, order_reviews)
+        """
+        n = stop - start
+        rng = np.random.default_rng([self.seed, 4, start])
+        index = np.arange(start, stop)
+
+        # Clients (un customer_id par commande, comme dans Olist)
+        unique_index = (_uniform('unique', index) * self.n_unique_customers).astype(np.int64)
+        states = np.array(self.state_names)[
+            np.searchsorted(np.cumsum(self.customer_state_probs), _uniform('state', unique_index), side='right')
+            .clip(0, len(self.state_names) - 1)
+        ]
+        customer_ids = make_ids('customer', index)
+        customers = pd.DataFrame({
+            'customer_id': customer_ids,
+            'customer_unique_id': make_ids('unique', unique_index),
+            'customer_zip_code_prefix': _zip_prefixes(states, rng),
+            'customer_city': [STATES[s][3] for s in states],
+            'customer_state': states,
+        })
+
+        # Commandes et délais
+        statuses, status_probs = _weights(ORDER_STATUSES)
+        status = rng.choice(statuses, n, p=status_probs)
+        purchase = self._purchase_times(n, rng)
+        approved = purchase + pd.to_timedelta(rng.exponential(10, n) * 3600, unit='s').floor('s')
+        carrier = approved + pd.to_timedelta(rng.lognormal(0.9, 0.7, n) * 86400, unit='s').floor('s')
+        delivery_days = rng.lognormal(2.25, 0.55, n)
+        delivered = purchase + pd.to_timedelta(delivery_days * 86400, unit='s').floor('s')
+        estimated = (purchase + pd.to_timedelta(rng.normal(24, 7, n).clip(3, 60), unit='D')).floor('D')
+
+        is_delivered = status == 'delivered'
+        is_shipped = np.isin(status, ['delivered', 'shipped'])
+        is_approved = status != 'canceled'
+        orders = pd.DataFrame({
+            'order_id': make_ids('order', index),
+            'customer_id': customer_ids,
+            'order_status': status,
+            'order_purchase_timestamp': purchase,
+            'order_approved_at': approved.where(is_approved),
+            'order_delivered_carrier_date': carrier.where(is_shipped),
+            'order_delivered_customer_date': delivered.where(is_delivered),
+            'order_estimated_delivery_date': estimated,
+        })
+
+        # Items: produit selon sa popularité, vendeur attitré du produit
+        counts, count_probs = _weights(ITEMS_PER_ORDER)
+        items_per_order = rng.choice(counts, n, p=count_probs)
+        rows = np.repeat(np.arange(n), items_per_order)
+        product_index = np.searchsorted(self.product_cdf, rng.random(len(rows)), side='right').clip(0, self.n_products - 1)
+        seller_index = np.searchsorted(
+            self.seller_cdf, _uniform('seller', product_index), side='right'
+        ).clip(0, self.n_sellers - 1)
+        base_price = np.exp(np.log(75) + 0.9 * np.sqrt(2) * _erfinv(2 * _uniform('price', product_index) - 1))
+        price = np.round(base_price * rng.uniform(0.95, 1.05, len(rows)), 2).clip(0.85, 6735)
+        item_position = np.arange(len(rows)) - np.repeat(np.cumsum(items_per_order) - items_per_order, items_per_order)
+        order_items = pd.DataFrame({
+            'order_id': orders['order_id'].to_numpy()[rows],
+            'order_item_id': item_position + 1,
+            'product_id': make_ids('product', product_index),
+            'seller_id': make_ids('seller', seller_index),
+            'shipping_limit_date': purchase[rows] + pd.Timedelta(days=6),
+            'price': price,
+            'freight_value': np.round(rng.lognormal(2.7, 0.5, len(rows)) + price * 0.05, 2),
+        })
+
+        # Paiements: total des items, parfois complété par un bon d'achat
+        order_total = np.bincount(rows, weights=order_items['price'] + order_items['freight_value'], minlength=n)
+        types, type_probs = _weights({k: v for k, v in PAYMENT_TYPES.items() if k != 'voucher'})
+        first_type = rng.choice(types, n, p=type_probs)
+        split = rng.random(n) < 0.03
+        voucher_value = np.round(order_total * rng.uniform(0.1, 0.5, n), 2)
+        payments = pd.concat([
+            pd.DataFrame({
+                'order_id': orders['order_id'],
+                'payment_sequential': 1,
+                'payment_type': first_type,
+                'payment_installments': np.where(first_type == 'credit_card', rng.choice(np.arange(1, 11), n), 1),
+                'payment_value': np.round(np.where(split, order_total - voucher_value, order_total), 2),
+            }),
+            pd.DataFrame({
+                'order_id': orders['order_id'][split],
+                'payment_sequential': 2,
+                'payment_type': 'voucher',
+                'payment_installments': 1,
+                'payment_value': voucher_value[split],
+            }),
+        ], ignore_index=True)
+
+        # Avis: ~99% des commandes, notes plus basses en cas de retard
+        reviewed = rng.random(n) < 0.992
+        late = is_delivered & (delivered > estimated)
+        scores_ok, probs_ok = _weights(REVIEW_SCORES)
+        scores_late, probs_late = _weights(LATE_REVIEW_SCORES)
+        score = np.where(late, rng.choice(scores_late, n, p=probs_late), rng.choice(scores_ok, n, p=probs_ok))
+        review_base = pd.Series(delivered.where(is_delivered, estimated))
+        creation = (review_base + pd.to_timedelta(rng.integers(0, 4, n), unit='D')).dt.floor('D')
+        answer = creation + pd.to_timedelta(rng.exponential(2.5, n) * 86400 + 3600, unit='s').floor('s')
+
+        sentiment = np.where(score >= 4, 'positive', np.where(score <= 2, 'negative', 'neutral'))
+        has_message = rng.random(n) < 0.41
+        messages = np.array([
+            REVIEW_MESSAGES[s][i % len(REVIEW_MESSAGES[s])]
+            for s, i in zip(sentiment, rng.integers(0, 1000, n))
+        ], dtype=object)
+        titles = np.where(score >= 4, 'Recomendo', np.where(score <= 2, 'Não recomendo', 'Ok'))
+
+        reviews = pd.DataFrame({
+            'review_id': make_ids('review', index),
+            'order_id': orders['order_id'],
+            'review_score': score,
+            'review_comment_title': pd.Series(titles, dtype=object).where(rng.random(n) < 0.12),
+            'review_comment_message': pd.Series(messages).where(has_message),
+            'review_creation_date': creation,
+            'review_answer_timestamp': answer,
+        })[reviewed].reset_index(drop=True)
+
+        return {
+            'customers': customers,
+            'orders': orders,
+            'order_items': order_items,
+            'order_payments': payments,
+            'order_reviews': reviews,
+        }
+
+
+def _erfinv(x):
+    """Inverse de la fonction d'erreur (approximation de Giles, précision ~1e-7)"""
+    w = -np.log((1.0 - x) * (1.0 + x))
+    small = w < 5.0
+    w_small = w - 2.5
+    w_large = np.sqrt(np.maximum(w, 5.0)) - 3.0
+
+    p_small = 2.81022636e-08
+    for c in (3.43273939e-07, -3.5233877e-06, -4.39150654e-06, 0.00021858087,
+              -0.00125372503, -0.00417768164, 0.246640727, 1.50140941):
+        p_small = c + p_small * w_small
+    p_large = -0.000200214257
+    for c in (0.000100950558, 0.00134934322, -0.00367342844, 0.00573950773,
+              -0.0076224613, 0.00943887047, 1.00167406, 2.83297682):
+        p_large = c + p_large * w_large
+    return np.where(small, p_small, p_large) * x
+
+
+def generate(output_dir, scale=1.0, fmt='csv', seed=42, chunk_orders=CHUNK_ORDERS,
+             geolocation=False, source_dir=None):
+    """
+    Génère toutes les tables Olist dans un dossier
+
+    Args:
+        output_dir: Dossier de sortie
+        scale: Facteur d'échelle (1 = volumes du dataset public)
+        fmt: 'csv' ou 'parquet'
+        seed: Graine aléatoire (mêmes graine, échelle et taille de bloc = mêmes données)
+        chunk_orders: Nombre de commandes générées et écrites par bloc
+        geolocation: Génère aussi olist_geolocation_dataset (~1M lignes à l'échelle 1)
+        source_dir: Dossier d'où lire la table de traduction des catégories
+
+    Returns:
+        Dict nom de fichier -> nombre de lignes écrites
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    generator = SyntheticOlist(scale=scale, seed=seed, source_dir=source_dir)
+    suffix = '.csv' if fmt == 'csv' else '.parquet'
+
+    def writer(name):
+        return TableWriter(output_dir / f"{name}{suffix}", fmt)
+
+    written = {}
+
+    translation = writer("product_category_name_translation")
+    translation.write(generator.translation)
+    translation.close()
+    written[translation.path.name] = translation.rows
+
+    products = writer("olist_products_dataset")
+    for start in range(0, generator.n_products, chunk_orders):
+        products.write(generator.products(start, min(start + chunk_orders, generator.n_products)))
+    products.close()
+    written[products.path.name] = products.rows
+
+    sellers = writer("olist_sellers_dataset")
+    sellers.write(generator.sellers())
+    sellers.close()
+    written[sellers.path.name] = sellers.rows
+
+    tables = ('customers', 'orders', 'order_items', 'order_payments', 'order_reviews')
+    writers = {table: writer(f"olist_{table}_dataset") for table in tables}
+    for start in range(0, generator.n_orders, chunk_orders):
+        chunk = generator.order_chunk(start, min(start + chunk_orders, generator.n_orders))
+        for table in tables:
+            writers[table].write(chunk[table])
+    for table_writer in writers.values():
+        table_writer.close()
+        written[table_writer.path.name] = table_writer.rows
+
+    if geolocation:
+        geo = writer("olist_geolocation_dataset")
+        n_prefixes = max(1, int(BASE_COUNTS['geolocation_prefixes'] * scale))
+        prefixes_per_chunk = max(1, chunk_orders // GEOLOCATION_POINTS_PER_PREFIX)
+        for start in range(0, n_prefixes, prefixes_per_chunk):
+            geo.write(generator.geolocation(start, min(start + prefixes_per_chunk, n_prefixes)))
+        geo.close()
+        written[geo.path.name] = geo.rows
+
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des données Olist synthétiques")
+    parser.add_argument('--output', required=True, help="dossier de sortie")
+    parser.add_argument('--scale', type=float, default=1.0, help="facteur d'échelle (1 = dataset public)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="format des fichiers")
+    parser.add_argument('--seed', type=int, default=42, help="graine aléatoire")
+    parser.add_argument('--chunk-orders', type=int, default=CHUNK_ORDERS, help="commandes par bloc")
+    parser.add_argument('--geolocation', action='store_true', help="génère aussi la table de géolocalisation")
+    args = parser.parse_args(argv)
+
+    # Hors serveur, Streamlit signale l'absence de runtime pour chaque fonction mise en cache importée
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+
+    start = time.perf_counter()
+    written = generate(
+        args.output,
+        scale=args.scale,
+        fmt=args.format,
+        seed=args.seed,
+        chunk_orders=args.chunk_orders,
+        geolocation=args.geolocation
+    )
+    for name, rows in written.items():
+        print(f"✅ {name}: {rows:,} lignes")
+    print(f"⏱️ Total: {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""
+Préchauffage des caches de données et des modèles
+
+Construit à l'avance les produits de données mis en cache et charge les
+modèles, pour que le premier utilisateur après un déploiement (ou après une
+mise à jour des données) n'attende pas les lectures, jointures et désérialisations.
+
+Deux usages:
+    - au démarrage du serveur: app.py lance warmup_in_background() (une fois
+      par processus et après chaque modification des données)
+    - avant un déploiement, depuis le dossier streamlit_app:
+          python -m utils.warmup [--parallel] [--workers N] [--only nom ...]
+      remplit les caches sur disque (cache columnaire Parquet, store Arrow
+      partagé s'il est configuré) et affiche les durées par élément.
+"""
+
+import argparse
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import get_app_settings
+from utils.data_loader import cached_on
+
+# Éléments préchauffés: nom -> (module, fonction sans argument)
+WARMUP_ITEMS = {
+    'order_items_fact': ('utils.data_loader', 'get_order_items_fact'),
+    'order_item_reviews': ('utils.data_loader', 'get_order_item_reviews'),
+    'products_with_stats': ('utils.data_loader', 'get_products_with_stats'),
+    'dashboard_kpis': ('utils.data_loader', 'get_dashboard_kpis'),
+    'sales_over_time': ('utils.data_loader', 'get_sales_over_time'),
+    'category_performance': ('utils.data_loader', 'get_category_performance'),
+    'geographic_distribution': ('utils.data_loader', 'get_geographic_distribution'),
+    'product_review_stats': ('utils.data_loader', 'get_product_review_stats'),
+    'review_comment_index': ('utils.data_loader', 'get_review_comment_index'),
+    'olap_cube': ('utils.olap_cube', 'get_olap_cube'),
+    'zip_centroids': ('utils.geolocation', 'get_zip_centroids'),
+    'recommendation_engine': ('utils.recommendation_engine', 'get_recommendation_engine'),
+    'shipping_forecast_model': ('utils.shipping_forecast', 'get_shipping_forecast_model'),
+    'delivery_eta': ('utils.delivery_eta', 'get_eta_matrix'),
+    'orders_forecast_model': ('utils.orders_forecast', 'get_orders_forecast_model'),
+    'sentiment_model': ('utils.model_manager', 'load_sentiment_model'),
+}
+
+
+def _run_item(name):
+    """Exécute un élément et mesure sa durée"""
+    module_name, func_name = WARMUP_ITEMS[name]
+    start = time.perf_counter()
+    try:
+        func = getattr(importlib.import_module(module_name), func_name)
+        func()
+        error = None
+    except Exception as e:
+        error = str(e)
+    return {'name': name, 'seconds': time.perf_counter() - start, 'ok': error is None, 'error': error}
+
+
+def warmup(items=None, parallel=False, max_workers=4):
+    """
+    Préchauffe les caches
+
+    Args:
+        items: Noms des éléments (défaut: tous, dans l'ordre de WARMUP_ITEMS)
+        parallel: Exécute les éléments dans un pool de threads
+        max_workers: Taille du pool en mode parallèle
+
+    Returns:
+        Liste de dicts {'name', 'seconds', 'ok', 'error'} dans l'ordre des éléments
+    """
+    names = list(items) if items else list(WARMUP_ITEMS)
+    unknown = [name for name in names if name not in WARMUP_ITEMS]
+    if unknown:
+        raise ValueError(f"Éléments inconnus: {', '.join(unknown)}")
+
+    if not parallel:
+        return [_run_item(name) for name in names]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run_item, names))
+
+
+def print_report(results, total_seconds=None):
+    """Affiche les durées par élément"""
+    width = max(len(r['name']) for r in results)
+    for r in results:
+        status = "✅" if r['ok'] else "❌"
+        line = f"{status} {r['name']:<{width}}  {r['seconds']:8.2f} s"
+        if not r['ok']:
+            line += f"  ({r['error']})"
+        print(line)
+    if total_seconds is not None:
+        print(f"⏱️ Total: {total_seconds:.2f} s")
+
+
+def _warmup_job():
+    """Préchauffage complet exécuté par le thread de démarrage"""
+    start = time.perf_counter()
+    results = warmup(parallel=True)
+    print("🔥 Préchauffage des caches terminé")
+    print_report(results, time.perf_counter() - start)
+
+
+@cached_on('all_tables', resource=True)
+def warmup_in_background():
+    """
+    Lance le préchauffage dans un thread (une fois par processus, puis à
+    nouveau dès que les fichiers sources changent)
+
+    Les fonctions mises en cache étant protégées par clé, une session qui
+    demande une donnée en cours de construction attend ce calcul au lieu
+    de le refaire.
+    """
+    if not get_app_settings().get('warmup_on_startup', True):
+        return None
+
+    thread = threading.Thread(target=_warmup_job, name="cache-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Préchauffe les caches de données et les modèles")
+    parser.add_argument('--parallel', action='store_true', help="exécute les éléments en parallèle")
+    parser.add_argument('--workers', type=int, default=4, help="taille du pool en mode parallèle")
+    parser.add_argument('--only', nargs='+', choices=list(WARMUP_ITEMS), help="éléments à préchauffer")
+    args = parser.parse_args(argv)
+
+    # Hors serveur, Streamlit signale l'absence de runtime à chaque appel mis en cache
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+
+    start = time.perf_counter()
+    results = warmup(items=args.only, parallel=args.parallel, max_workers=args.workers)
+    print_report(results, time.perf_counter() - start)
+    return 0 if all(r['ok'] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())